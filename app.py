@@ -1,3 +1,6 @@
+import time
+_INIT_STARTED = time.perf_counter()
+
 import logging
 from typing import Dict
 from chalice import Chalice
@@ -35,5 +38,14 @@ app.register_blueprint(swagger_bp, name_prefix='swagger')
 app.register_blueprint(product_bp, name_prefix='product')
 app.register_blueprint(webui_bp, name_prefix='webui')
 
-# Log application startup
-logger.info("EC2 Quicklook application initialized")
+# Apply queued persistent cache writes before the handler returns
+from chalicelib.store import register_store_flush
+register_store_flush(app)
+
+# Negotiate gzip/brotli for responses
+from chalicelib.compression import register_compression
+register_compression(app)
+
+# Log application startup with the time spent importing and registering routes
+INIT_DURATION_MS = (time.perf_counter() - _INIT_STARTED) * 1000
+logger.info(f"EC2 Quicklook application initialized in {INIT_DURATION_MS:.0f} ms")
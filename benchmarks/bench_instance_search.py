@@ -0,0 +1,125 @@
+"""Query latency of spec-based instance search over a full-size catalog
+
+Builds an InstanceCatalog of synthetic describe_instance_types records, about
+the size of a large region, and times typical searches and a cheapest-match
+recommendation against a Python loop over the same records.
+
+Usage:
+    python -m benchmarks.bench_instance_search [-t TYPES] [-n QUERIES]
+"""
+import time
+import random
+import argparse
+from chalicelib.search import InstanceCatalog, parse_network, parse_search_query
+
+
+SIZES = [('large', 2), ('xlarge', 4), ('2xlarge', 8), ('4xlarge', 16), ('8xlarge', 32),
+         ('12xlarge', 48), ('16xlarge', 64), ('24xlarge', 96), ('metal', 128)]
+
+QUERIES = {
+    'arm64, >=16 vCPU, >=64 GiB, >=25 Gbps, NVMe': {
+        'vcpus': '16-', 'memory': '64-', 'arch': 'arm64', 'network': '25-', 'nvme': 'true'
+    },
+    'GPU, top 10 by memory': {'gpus': '1-', 'sort': '-memory', 'limit': '10'},
+    '4-8 vCPU, any, top 50': {'vcpus': '4-8'},
+}
+
+
+def synthetic_catalog(types):
+    """describe_instance_types-like records for `types` instance types"""
+    rng = random.Random(42)
+    records = []
+    family = 0
+    while len(records) < types:
+        family += 1
+        arch = rng.choice(['x86_64', 'arm64'])
+        ratio = rng.choice([2, 4, 8, 16])
+        nvme = rng.random() < 0.4
+        gpus = rng.choice([0, 0, 0, 1, 4, 8])
+        for size, vcpus in SIZES[:types - len(records)]:
+            record = {
+                'InstanceType': f"f{family}.{size}",
+                'VCpuInfo': {'DefaultVCpus': vcpus},
+                'MemoryInfo': {'SizeInMiB': vcpus * ratio * 1024},
+                'NetworkInfo': {'NetworkPerformance': f"Up to {min(200, vcpus * 1.5):g} Gigabit"},
+                'ProcessorInfo': {'SupportedArchitectures': [arch]},
+            }
+            if nvme:
+                record['InstanceStorageInfo'] = {'TotalSizeInGB': vcpus * 59, 'NvmeSupport': 'required'}
+            if gpus:
+                record['GpuInfo'] = {'Gpus': [{'Count': gpus}]}
+            records.append(record)
+    return records
+
+
+def scan(records, criteria):
+    """Python loop over the records with the same predicates, for comparison"""
+    ranges = criteria['ranges']
+    matches = []
+    for r in records:
+        values = {
+            'vcpus': r['VCpuInfo']['DefaultVCpus'],
+            'memory': r['MemoryInfo']['SizeInMiB'] / 1024,
+            'network': parse_network(r['NetworkInfo']),
+            'gpus': sum(g['Count'] for g in r.get('GpuInfo', {}).get('Gpus', [])),
+        }
+        if any((lo is not None and values[f] < lo) or (hi is not None and values[f] > hi)
+               for f, (lo, hi) in ranges.items() if f in values):
+            continue
+        if criteria['architectures'] and not set(criteria['architectures']) & set(r['ProcessorInfo']['SupportedArchitectures']):
+            continue
+        if criteria['flags'].get('nvme') and 'InstanceStorageInfo' not in r:
+            continue
+        matches.append((values[criteria['sort'].lstrip('-')], r['InstanceType']))
+    reverse = criteria['sort'].startswith('-')
+    matches.sort(key=lambda m: (-m[0] if reverse else m[0], m[1]))
+    return matches[:criteria['limit']]
+
+
+def timed(func, queries):
+    start = time.perf_counter()
+    for _ in range(queries):
+        result = func()
+    return (time.perf_counter() - start) / queries * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-t', '--types', type=int, default=1000)
+    parser.add_argument('-n', '--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    records = synthetic_catalog(args.types)
+    start = time.perf_counter()
+    catalog = InstanceCatalog(records)
+    print(f"Catalog of {len(catalog)} types built in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'query':<45} {'matches':>7} {'loop us':>9} {'numpy us':>9} {'speedup':>8}")
+    for label, query in QUERIES.items():
+        criteria = parse_search_query(query)
+        loop_us, _ = timed(lambda: scan(records, criteria), max(1, args.queries // 20))
+        numpy_us, found = timed(lambda: catalog.search(**criteria), args.queries)
+        print(f"{label:<45} {found['count']:>7} {loop_us:>9.1f} {numpy_us:>9.1f} {loop_us / numpy_us:>7.1f}x")
+
+    # Cheapest matches, joining a price table of every type in the catalog
+    rng = random.Random(7)
+    table = {
+        'currency': 'USD',
+        'hourly': {r['InstanceType']: rng.uniform(0.01, 40) for r in records},
+        'normalizationSizeFactor': {}
+    }
+    criteria = parse_search_query({'vcpus': '16-', 'memory': '64-', 'limit': '10'})
+    del criteria['sort']
+
+    def loop_cheapest():
+        matches = scan(records, {**criteria, 'sort': 'vcpus', 'limit': len(records)})
+        return sorted((table['hourly'][t] * 730, t) for _, t in matches)[:10]
+
+    loop_us, _ = timed(loop_cheapest, max(1, args.queries // 20))
+    numpy_us, found = timed(lambda: catalog.cheapest(table, 730, **criteria), args.queries)
+    label = 'cheapest 10, >=16 vCPU, >=64 GiB'
+    print(f"{label:<45} {found['count']:>7} {loop_us:>9.1f} {numpy_us:>9.1f} {loop_us / numpy_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Micro-benchmark of PriceList entry decoding
+
+Compares the former ast.literal_eval path with the PriceItem decoding layer
+on representative get_products documents.
+
+Usage:
+    python -m benchmarks.bench_pricelist_decode [-n ITERATIONS]
+"""
+import os
+import ast
+import copy
+import json
+import timeit
+import argparse
+from chalicelib import sdk
+
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests', 'test_data')
+# get_products returns every term of a product; Linux instances carry a dozen RI offers
+RESERVED_OFFERS = [
+    (length, option, cls)
+    for length in ('1yr', '3yr')
+    for option in ('No Upfront', 'Partial Upfront', 'All Upfront')
+    for cls in ('standard', 'convertible')
+]
+
+
+def load_document(name):
+    with open(os.path.join(TEST_DATA, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def with_reserved_terms(document):
+    '''Add Reserved terms so the document matches real get_products output in size'''
+    document = copy.deepcopy(document)
+    sku = document['product']['sku']
+    on_demand = next(iter(document['terms']['OnDemand'].values()))
+    reserved = {}
+    for i, (length, option, cls) in enumerate(RESERVED_OFFERS):
+        code = f"{sku}.RI{i:08d}"
+        term = copy.deepcopy(on_demand)
+        term.update({
+            'offerTermCode': f"RI{i:08d}",
+            'termAttributes': {
+                'LeaseContractLength': length,
+                'OfferingClass': cls,
+                'PurchaseOption': option
+            }
+        })
+        term['priceDimensions'] = {
+            f"{code}.{rate}": dict(next(iter(on_demand['priceDimensions'].values())), rateCode=f"{code}.{rate}")
+            for rate in ('2TG2D8R56U', '6YS6EN2CT7')
+        }
+        reserved[code] = term
+    document['terms']['Reserved'] = reserved
+    return document
+
+
+def old_path(raw):
+    document = ast.literal_eval(raw)
+    terms = document['terms']['OnDemand']
+    return document['product']['attributes'], next(iter(terms.values()))
+
+
+def json_path(raw):
+    document = json.loads(raw)
+    terms = document['terms']['OnDemand']
+    return document['product']['attributes'], next(iter(terms.values()))
+
+
+def price_item_path(backend):
+    def decode(raw):
+        sdk.JSON_BACKEND = backend
+        record = sdk.PriceItem(raw).extract('OnDemand')
+        return record['attributes'], record['term']
+    return decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    documents = {
+        'instance': json.dumps(load_document('price_list_instance.json')),
+        'instance+RI': json.dumps(with_reserved_terms(load_document('price_list_instance.json'))),
+        'volume': json.dumps(load_document('price_list_volume.json')),
+    }
+    decoders = [
+        ('ast.literal_eval', old_path),
+        ('json.loads', json_path),
+        ('PriceItem[json]', price_item_path('json')),
+    ]
+    if sdk.JSON_BACKEND == 'orjson':
+        decoders.append(('PriceItem[orjson]', price_item_path('orjson')))
+    default_backend = sdk.JSON_BACKEND
+
+    print(f"{'document':<12} {'size':>7}  {'decoder':<18} {'us/doc':>9} {'speedup':>8}")
+    for name, raw in documents.items():
+        expected = old_path(raw)
+        baseline = None
+        for label, decode in decoders:
+            assert decode(raw) == expected, label
+            seconds = min(timeit.repeat(lambda: decode(raw), number=args.iterations, repeat=3))
+            per_doc = seconds / args.iterations * 1e6
+            baseline = baseline or per_doc
+            print(f"{name:<12} {len(raw):>7}  {label:<18} {per_doc:>9.1f} {baseline / per_doc:>7.1f}x")
+    sdk.JSON_BACKEND = default_backend
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Wall-clock scaling of batch instance pricing with pool size
+
+Prices a batch of distinct instance sizes through PricingClient against a
+stubbed Pricing client with fixed per-call latency, once per pool size.
+
+Usage:
+    python -m benchmarks.bench_pricing_fanout [-n ITEMS] [-l LATENCY] [-r RATE]
+"""
+import os
+import time
+import argparse
+from chalicelib.cache import clear_caches
+from chalicelib.sdk import PricingClient
+from chalicelib.throttle import RetryController, TokenBucket
+
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'tests', 'test_data')
+POOL_SIZES = (1, 2, 4, 8, 16, 32)
+
+
+class StubPricing:
+    """boto3 pricing stand-in answering get_products after a fixed delay"""
+    def __init__(self, price_item, latency):
+        self.price_item = price_item
+        self.latency = latency
+
+    def get_products(self, **kwargs):
+        time.sleep(self.latency)
+        return {'PriceList': [self.price_item]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--items', type=int, default=48, help='distinct instance sizes per batch')
+    parser.add_argument('-l', '--latency', type=float, default=0.08, help='seconds per get_products call')
+    parser.add_argument('-r', '--rate', type=float, default=50, help='client-side calls per second')
+    args = parser.parse_args()
+
+    with open(os.path.join(TEST_DATA, 'price_list_instance.json'), encoding='utf-8') as f:
+        stub = StubPricing(f.read(), args.latency)
+    items = [
+        {'region': 'us-east-1', 'typesize': f"m7g.{i}xlarge", 'op': 'RunInstances'}
+        for i in range(args.items)
+    ]
+
+    print(f"{args.items} items, {args.latency * 1000:.0f} ms per call, limit {args.rate:g}/s")
+    print(f"{'workers':>7} {'seconds':>8} {'items/s':>8} {'speedup':>8}")
+    baseline = None
+    for workers in POOL_SIZES:
+        clear_caches()
+        # No burst allowance, so the rate limit caps throughput from the first call
+        pclient = PricingClient(stub, retry=RetryController(TokenBucket(args.rate, burst=1)))
+        start = time.perf_counter()
+        resp = pclient.get_product_instances(items, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(resp['results']) == args.items, resp['errors'][:1]
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {args.items / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
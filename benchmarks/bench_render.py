@@ -0,0 +1,102 @@
+"""Render time of the index and detail pages
+
+Requests / and /detail through the Chalice test client with the AWS lookups
+stubbed out, comparing the former render (a new Jinja2 environment per call)
+with the shared environment, with and without precompiled templates.
+
+Usage:
+    python -m benchmarks.bench_render [-n REQUESTS]
+"""
+import os
+import time
+import argparse
+import tempfile
+import jinja2
+from chalice.test import Client
+import app as application
+from chalicelib.webui import view
+
+
+REGIONS = [{'code': c, 'name': c} for c in ('us-east-1', 'us-west-2', 'eu-west-1', 'ap-southeast-1')]
+HEADERS = {'Accept': 'text/html,*/*;q=0.8'}
+
+
+class StubEC2:
+    def list_usage_operations(self):
+        return [{'operation': 'RunInstances', 'description': 'Linux/UNIX'}]
+
+    def list_instance_family(self, architecture):
+        return [{'family': f, 'category': 'General purpose'} for f in ('m5', 'm6i', 'm7i', 'm7g')]
+
+
+class StubPricing:
+    def get_attribute_values(self, service_code, attribute_name):
+        return {'count': 4, 'data': ['gp2', 'gp3', 'io1', 'io2']}
+
+
+def former_render(templ_path, context):
+    '''render() before the shared environment: a new Environment per call'''
+    path, filename = os.path.split(templ_path)
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(path or "./"))
+    return env.get_template(filename).render({**context, 'asset_url': view.asset_url})
+
+
+def first_template_load():
+    '''Milliseconds to load main.html into a fresh environment'''
+    view._TEMPLATE_ENV = None
+    start = time.perf_counter()
+    view.get_template_env().get_template('main.html')
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(requests):
+    timings = {}
+    with Client(application.app) as client:
+        for page in ('/', '/detail'):
+            resp = client.http.get(page, headers=HEADERS)
+            assert resp.status_code == 200, resp.body[:200]
+            start = time.perf_counter()
+            for _ in range(requests):
+                client.http.get(page, headers=HEADERS)
+            timings[page] = (time.perf_counter() - start) / requests * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    view.list_ec2_regions = lambda: REGIONS
+    view.get_ec2_client = lambda region='us-east-1': StubEC2()
+    view.get_pricing_client = lambda: StubPricing()
+    shared_render = view.render
+
+    view.render = former_render
+    results = [('new environment per call', measure(args.requests))]
+
+    view.render = shared_render
+    view.TEMPLATE_AUTO_RELOAD = False
+    view.COMPILED_TEMPLATE_PATH = os.path.join(view.TEMPLATE_PATH, 'no-compiled-templates')
+    first_loads = {'compiled on first use': first_template_load()}
+    results.append(('shared environment', measure(args.requests)))
+
+    with tempfile.TemporaryDirectory() as compiled:
+        jinja2.Environment(loader=jinja2.FileSystemLoader(view.TEMPLATE_PATH)).compile_templates(
+            compiled, zip=None, filter_func=lambda n: n.endswith('.html')
+        )
+        view.COMPILED_TEMPLATE_PATH = compiled
+        first_loads['precompiled modules'] = first_template_load()
+        results.append(('precompiled templates', measure(args.requests)))
+
+    print(f"{'render':<26} {'index ms':>9} {'detail ms':>10} {'speedup':>8}")
+    baseline = results[0][1]
+    for label, timings in results:
+        speedup = (baseline['/'] + baseline['/detail']) / (timings['/'] + timings['/detail'])
+        print(f"{label:<26} {timings['/']:>9.3f} {timings['/detail']:>10.3f} {speedup:>7.1f}x")
+    for label, ms in first_loads.items():
+        print(f"first main.html load, {label}: {ms:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
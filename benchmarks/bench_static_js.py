@@ -0,0 +1,72 @@
+"""Request latency of the /js route before and after memoized minification
+
+The former handler located the file with os.walk, read it and ran
+optimize_js on every request. The current route serves the registry asset
+and reuses the minified output; a conditional request is answered with 304.
+
+Usage:
+    python -m benchmarks.bench_static_js [-n REQUESTS]
+"""
+import time
+import argparse
+from chalice import Chalice, Response
+from chalice.test import Client
+import app as application
+from chalicelib import file
+from chalicelib.utils import optimize_js
+
+
+HEADERS = {'Accept': '*/*', 'Accept-Encoding': 'gzip, deflate, br'}
+
+
+def build_former_app():
+    '''Chalice app with the former /js handler'''
+    former = Chalice(app_name='former-js')
+
+    @former.route('/js/{file_path}', methods=['GET'])
+    def get_optimized_js(file_path):
+        content = file.get_static_file(file_name=file_path + '.js')
+        return Response(
+            body=optimize_js(content),
+            status_code=200,
+            headers={
+                "Content-Type": "application/javascript; charset=utf-8",
+                "Cache-Control": "no-cache"
+            },
+        )
+    return former
+
+
+def measure(app, path, requests, headers):
+    with Client(app) as client:
+        client.http.get(path, headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            resp = client.http.get(path, headers=headers)
+        elapsed = time.perf_counter() - start
+    return elapsed / requests * 1000, resp.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'script':<8} {'handler':<22} {'status':>6} {'ms/req':>8} {'speedup':>8}")
+    for name in ('main', 'detail'):
+        with Client(application.app) as client:
+            etag = client.http.get(f'/js/{name}', headers=HEADERS).headers['ETag']
+        cases = [
+            ('former', build_former_app(), HEADERS),
+            ('memoized', application.app, HEADERS),
+            ('memoized, 304', application.app, {**HEADERS, 'If-None-Match': etag}),
+        ]
+        baseline = None
+        for label, app, headers in cases:
+            ms, status = measure(app, f'/js/{name}', args.requests, headers)
+            baseline = baseline or ms
+            print(f"{name:<8} {label:<22} {status:>6} {ms:>8.3f} {baseline / ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import argparse
+import tempfile
+import urllib.request
+import boto3
+from chalicelib.pricelist import build_price_index
+
+
+DEFAULT_INDEX_PATH = os.path.join('chalicelib', 'data', 'price-index.db')
+
+
+def download_offer_file(region, pricing_region='us-east-1'):
+    '''Download the current regional AmazonEC2 offer file to a temp file'''
+    # Import here to avoid building the Chalice app for local offer files
+    from chalicelib.sdk import PricingClient
+
+    pclient = PricingClient(boto3.client('pricing', region_name=pricing_region))
+    url = pclient.get_price_list_file_url(region)
+    fd, path = tempfile.mkstemp(suffix='.json', prefix=f'offer-{region}-')
+    os.close(fd)
+    print(f"Downloading offer file for {region} ...")
+    urllib.request.urlretrieve(url, path)
+    return path
+
+
+def print_result(label, result):
+    '''Print index counts and the throughput/memory figures of the build'''
+    print(f"- {label}: {result['instances']} instance and {result['volumes']} volume prices indexed")
+    print(f"  {result['rows']} rows, {result['bytes'] / 1024 / 1024:.1f} MiB in {result['elapsed']:.1f}s "
+          f"({result['rowsPerSec']:.0f} rows/s, peak RSS {result['peakRssMb']:.0f} MiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the offline EC2 price index from Price List offer files'
+    )
+    parser.add_argument('-r', '--region', action='append', required=True,
+                        help='Region code to index, can be repeated')
+    parser.add_argument('-f', '--offer-file',
+                        help='Local offer file, downloaded via the Pricing API if omitted')
+    parser.add_argument('-o', '--output', default=DEFAULT_INDEX_PATH,
+                        help=f'Index file path (default: {DEFAULT_INDEX_PATH})')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    if args.offer_file:
+        result = build_price_index(args.offer_file, args.output, regions=args.region)
+        print_result(', '.join(args.region), result)
+    else:
+        # Each regional offer file only replaces the rows of its own region
+        for region in args.region:
+            offer_path = download_offer_file(region)
+            try:
+                result = build_price_index(offer_path, args.output, regions=[region])
+                print_result(region, result)
+            finally:
+                os.remove(offer_path)
+    print(f"Price index written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+import json
+import time
+import inspect
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Tuple, TypeVar, cast
+from chalicelib.store import get_cache_store
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Define a generic type for the function
+T = TypeVar('T')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'stale', 'maxsize', 'currsize'])
+
+# Sentinel for cache lookups, so that None can be cached as a value
+_MISSING = object()
+
+# Caches created by ttl_cache, see clear_caches()
+_CACHES = []
+
+# Callbacks told about values dropped from any TTLCache, see on_drop()
+_DROP_LISTENERS = []
+
+
+def on_drop(listener: Callable[[Any], None]) -> None:
+    """Register a callback for values dropped from any TTLCache
+
+    A value is dropped when its entry is replaced, evicted, popped, cleared or
+    found past its stale window. Memos keyed by the identity of cached values
+    use this to release their entries together with the value.
+    """
+    _DROP_LISTENERS.append(listener)
+
+
+def _notify_dropped(values) -> None:
+    for value in values:
+        for listener in _DROP_LISTENERS:
+            try:
+                listener(value)
+            except Exception as ex:
+                logger.warning(f"Cache drop listener failed: {str(ex)}")
+
+
+class TTLCache:
+    """Thread-safe LRU cache where every entry carries its own expiry
+
+    An entry is fresh until `ttl` seconds after it was stored. After that it
+    is kept for another `stale_ttl` seconds, during which it may be served
+    stale while a single refresh runs. Past that window it is a plain miss.
+    """
+    def __init__(self, ttl: float, maxsize: int = 128, stale_ttl: float = 0) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, key: Hashable) -> Tuple[Any, bool]:
+        """Look up a key
+
+        Returns:
+            Tuple of (value, is_stale); value is the `_MISSING` sentinel on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING, False
+            value, expires_at = entry
+            if now < expires_at:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, False
+            if now < expires_at + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale += 1
+                return value, True
+            # Past the stale window, drop the entry
+            del self._data[key]
+            self.misses += 1
+        _notify_dropped((value,))
+        return _MISSING, False
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value with its own expiry, evicting the least recently used entry"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        dropped = []
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None and previous[0] is not value:
+                dropped.append(previous[0])
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                dropped.append(self._data.popitem(last=False)[1][0])
+        _notify_dropped(dropped)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove a single entry if present"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is not None:
+            _notify_dropped((entry[0],))
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters"""
+        with self._lock:
+            dropped = [value for value, _ in self._data.values()]
+            self._data.clear()
+            self.hits = self.misses = self.stale = 0
+        _notify_dropped(dropped)
+
+    def info(self) -> CacheInfo:
+        """Return cache statistics in the style of functools.lru_cache"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.stale, self.maxsize, len(self._data))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class _Call:
+    """An in-flight call whose outcome is shared by every waiter"""
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and receive the same result or exception.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run `func(*args, **kwargs)` once for all concurrent callers of `key`"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+def make_key(args: Tuple[Any, ...], kwargs: dict) -> Hashable:
+    """Build a hashable cache key from call arguments
+
+    Objects exposing a `cache_scope` attribute (e.g. SDK clients) are keyed by
+    that scope, so a rebuilt client for the same region reuses the entries.
+    """
+    args = tuple(getattr(a, 'cache_scope', a) for a in args)
+    if kwargs:
+        return args + (_MISSING,) + tuple(sorted(kwargs.items()))
+    return args
+
+
+def clear_caches() -> None:
+    """Clear every cache created by ttl_cache"""
+    for cache in _CACHES:
+        cache.clear()
+
+
+def stable_key(args: Tuple[Any, ...], kwargs: dict) -> str:
+    """Build a cache key that is stable across processes
+
+    Objects exposing a `cache_scope` attribute (e.g. SDK clients) are keyed by
+    that scope instead of their identity.
+    """
+    parts = [getattr(a, 'cache_scope', a) for a in args]
+    return json.dumps([parts, sorted(kwargs.items())], separators=(',', ':'), default=str)
+
+
+def ttl_cache(
+    seconds: int,
+    maxsize: int = 128,
+    stale_seconds: Optional[int] = None,
+    persist: Optional[str] = None
+):
+    """TTL cache decorator with per-entry expiry and stale-while-revalidate
+
+    Args:
+        seconds: Number of seconds each entry stays fresh
+        maxsize: Maximum cache size (default: 128)
+        stale_seconds: How long an expired entry may still be served while it
+            is refreshed in the background (default: 10% of `seconds`)
+        persist: Namespace in the persistent cache store; when set and a store
+            is configured, misses read through it and results are written
+            behind to it (default: in-process only)
+
+    Returns:
+        Decorated function with `cache_info()`, `cache_clear()`, `cache_get()`,
+        `cache_put()` and `cache_prime()` helpers
+
+    Concurrent misses for the same key are coalesced, so only one call per
+    key reaches the wrapped function at a time. Arguments are bound to the
+    function's signature with defaults applied before keying, so positional,
+    keyword and default-omitting calls share one entry.
+    """
+    if stale_seconds is None:
+        stale_seconds = seconds // 10
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        cache = TTLCache(ttl=seconds, maxsize=maxsize, stale_ttl=stale_seconds)
+        _CACHES.append(cache)
+        flight = SingleFlight()
+        refreshing = set()
+        refresh_lock = threading.Lock()
+        signature = inspect.signature(func)
+
+        def normalize(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound.args, bound.kwargs
+
+        def store_value(key, value, args, kwargs):
+            cache.set(key, value)
+            store = get_cache_store() if persist else None
+            if store is not None:
+                store.put_async(f"{persist}#{stable_key(args, kwargs)}", value, seconds)
+
+        def compute(key, args, kwargs):
+            value = func(*args, **kwargs)
+            store_value(key, value, args, kwargs)
+            return value
+
+        def load(key, args, kwargs):
+            store = get_cache_store() if persist else None
+            if store is not None:
+                record = store.get(f"{persist}#{stable_key(args, kwargs)}")
+                if record is not None:
+                    value, remaining = record
+                    cache.set(key, value, ttl=remaining)
+                    return value
+            return compute(key, args, kwargs)
+
+        def refresh(key, args, kwargs):
+            try:
+                compute(key, args, kwargs)
+                logger.debug(f"Cache refreshed for {func.__name__}")
+            except Exception as ex:
+                logger.warning(f"Background refresh failed for {func.__name__}: {str(ex)}")
+            finally:
+                with refresh_lock:
+                    refreshing.discard(key)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            args, kwargs = normalize(args, kwargs)
+            key = make_key(args, kwargs)
+            value, is_stale = cache.get(key)
+            if value is _MISSING:
+                return flight.do(key, load, key, args, kwargs)
+            if is_stale:
+                # Only one refresh per key, everyone else keeps the stale value
+                with refresh_lock:
+                    start = key not in refreshing
+                    refreshing.add(key)
+                if start:
+                    logger.debug(f"Serving stale entry for {func.__name__}, refreshing")
+                    threading.Thread(
+                        target=refresh, args=(key, args, kwargs), daemon=True
+                    ).start()
+            return value
+
+        def cache_get(*args, **kwargs):
+            """Return the cached value for these arguments without calling the function"""
+            value, _ = cache.get(make_key(*normalize(args, kwargs)))
+            return None if value is _MISSING else value
+
+        def cache_put(value, *args, **kwargs):
+            """Store a value as the result for these arguments"""
+            args, kwargs = normalize(args, kwargs)
+            store_value(make_key(args, kwargs), value, args, kwargs)
+
+        def cache_prime(value, *args, **kwargs):
+            """Store a value in the in-process cache only, skipping the persistent store"""
+            cache.set(make_key(*normalize(args, kwargs)), value)
+
+        wrapper.cache = cache
+        wrapper.flight = flight
+        wrapper.cache_get = cache_get
+        wrapper.cache_put = cache_put
+        wrapper.cache_prime = cache_prime
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return cast(Callable[..., T], wrapper)
+
+    return decorator
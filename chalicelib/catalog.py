@@ -0,0 +1,110 @@
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from chalicelib.config_cache import get_config_cache
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Name of the instance family catalog in the config table
+CATALOG_CONFIG = 'instance'
+
+_CATALOG = None
+_CATALOG_LOCK = threading.Lock()
+
+
+class CatalogIndex:
+    """Immutable indexes over the instance family catalog
+
+    Built once from the `instance` config. Families are indexed by name,
+    architecture and category, so every lookup is a dict access instead of a
+    scan of the catalog. Family entries are shared between the indexes and
+    must not be modified by callers.
+    """
+    __slots__ = ('version', 'source', '_categories', '_families', '_by_arch', '_by_category', '_by_arch_category')
+
+    def __init__(self, catalog: List[Dict[str, Any]], version: Optional[str] = None) -> None:
+        self.version = version
+        self.source = catalog
+        categories: Dict[str, Dict[str, Any]] = {}
+        families: Dict[str, Dict[str, Any]] = {}
+        by_arch: Dict[str, List[Dict[str, Any]]] = {}
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        by_arch_category: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+        for group in catalog:
+            category = group['category']
+            categories.setdefault(category, {
+                'category': category,
+                'description': group['description'],
+                'display_name': group['display_name']
+            })
+            for instance in group['family']:
+                entry = {
+                    'category': category,
+                    'name': instance['name'],
+                    'note': instance['note'],
+                    'architecture': instance['architecture']
+                }
+                families[entry['name']] = entry
+                by_arch.setdefault(entry['architecture'], []).append(entry)
+                by_category.setdefault(category, []).append(entry)
+                by_arch_category.setdefault((entry['architecture'], category), []).append(entry)
+
+        self._categories = tuple(categories.values())
+        self._families = MappingProxyType(families)
+        self._by_arch = MappingProxyType({k: tuple(v) for k, v in by_arch.items()})
+        self._by_category = MappingProxyType({k: tuple(v) for k, v in by_category.items()})
+        self._by_arch_category = MappingProxyType({k: tuple(v) for k, v in by_arch_category.items()})
+
+    @property
+    def categories(self) -> Tuple[Dict[str, Any], ...]:
+        """Categories in catalog order, each with its description and display name"""
+        return self._categories
+
+    @property
+    def families(self) -> Mapping[str, Dict[str, Any]]:
+        """Family entries by family name"""
+        return self._families
+
+    def category_of(self, family: str) -> Optional[str]:
+        """Get the category of a family, None for families not in the catalog"""
+        entry = self._families.get(family)
+        return entry['category'] if entry is not None else None
+
+    def find(self, architecture: Optional[str] = None, category: Optional[str] = None) -> Tuple[Dict[str, Any], ...]:
+        """Get the families of an architecture and/or category, in catalog order
+
+        Args:
+            architecture: Processor architecture, e.g. 'x86_64' (default: any)
+            category: Category name, e.g. 'general' (default: any)
+        """
+        if architecture and category:
+            return self._by_arch_category.get((architecture, category), ())
+        if architecture:
+            return self._by_arch.get(architecture, ())
+        if category:
+            return self._by_category.get(category, ())
+        return tuple(self._families.values())
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Get the catalog index of the current `instance` config
+
+    The config cache returns the same config object until the stored version
+    changes, so the index is rebuilt only when a new version is loaded.
+    """
+    global _CATALOG
+    version, catalog = get_config_cache().get_versioned(CATALOG_CONFIG)
+    index = _CATALOG
+    if index is not None and index.source is catalog and index.version == version:
+        return index
+    with _CATALOG_LOCK:
+        index = _CATALOG
+        if index is None or index.source is not catalog or index.version != version:
+            index = CatalogIndex(catalog, version)
+            _CATALOG = index
+            logger.debug(f"Built catalog index for version {version}: {len(index.families)} families")
+    return index
@@ -0,0 +1,192 @@
+import os
+import ast
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional
+from chalicelib.cache import ttl_cache
+from chalicelib.models import AWSServiceError, EC2ServiceError
+
+# boto3, botocore and the SDK wrappers are imported when the first client is
+# built, so that importing the app stays cheap
+if TYPE_CHECKING:
+    from botocore.config import Config
+    from chalicelib.sdk import EC2Client, PricingClient
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# AWS China regions, accessed with credentials from Secrets Manager
+CN_REGIONS = ('cn-north-1', 'cn-northwest-1')
+# Pricing API endpoint region
+PRICING_REGION = 'ap-south-1'
+
+# Keep connections warm between invocations and allow concurrent fan-out
+BOTO_CONFIG_OPTIONS = {
+    'max_pool_connections': int(os.environ.get('BOTO_MAX_POOL_CONNECTIONS', 25)),
+    'tcp_keepalive': True,
+    'connect_timeout': 5,
+    'read_timeout': 20,
+    'retries': {'mode': 'standard', 'max_attempts': 3}
+}
+
+# Throttled Pricing API calls are retried by the client-side rate limiter instead
+PRICING_RETRIES = {'mode': 'standard', 'max_attempts': 1}
+
+PoolInfo = namedtuple('PoolInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+_PRICING_CLIENT = None
+_PRICING_LOCK = threading.Lock()
+
+
+class ClientPool:
+    """Thread-safe LRU pool of SDK clients keyed by region"""
+    def __init__(self, maxsize: int = 8) -> None:
+        self.maxsize = maxsize
+        self._clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the pooled client for `key`, creating it with `factory` on a miss"""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+            self.misses += 1
+
+        # Build outside the lock, clients for other regions stay available
+        client = factory()
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                return existing
+            self._clients[key] = client
+            while len(self._clients) > self.maxsize:
+                evicted, _ = self._clients.popitem(last=False)
+                self.evictions += 1
+                logger.debug(f"Evicted client from pool: {evicted}")
+        return client
+
+    def clear(self) -> None:
+        """Remove all clients and reset counters"""
+        with self._lock:
+            self._clients.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> PoolInfo:
+        """Return pool statistics in the style of functools.lru_cache"""
+        with self._lock:
+            return PoolInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._clients))
+
+
+@lru_cache(maxsize=None)
+def get_boto_config(pricing: bool = False) -> 'Config':
+    """Get the botocore config of SDK clients, built once
+
+    Args:
+        pricing: Whether the config is for the Pricing API, whose throttled
+            calls are not retried by botocore
+    """
+    from botocore.config import Config
+    config = Config(**BOTO_CONFIG_OPTIONS)
+    if pricing:
+        config = config.merge(Config(retries=PRICING_RETRIES))
+    return config
+
+
+EC2_CLIENT_POOL = ClientPool(maxsize=int(os.environ.get('EC2_CLIENT_POOL_SIZE', 8)))
+
+
+@ttl_cache(seconds=3600, maxsize=1, stale_seconds=0)  # Cache for 1 hour to pick up rotated keys, see get_ec2_client()
+def get_cn_credentials() -> Dict[str, str]:
+    """Get AWS China region credentials from Secrets Manager"""
+    try:
+        secret_id = os.environ.get('SECRET_NAME')
+        if not secret_id:
+            logger.error("SECRET_NAME environment variable not set")
+            raise ValueError("SECRET_NAME environment variable not set")
+
+        import boto3
+        client = boto3.client('secretsmanager', config=get_boto_config())
+        secret = client.get_secret_value(SecretId=secret_id)
+        secret_string = secret.get('SecretString')
+        if not secret_string:
+            logger.error("Empty secret value retrieved from Secrets Manager")
+            raise ValueError("Empty secret value")
+
+        return ast.literal_eval(secret_string)
+    except Exception as e:
+        logger.error(f"Failed to get China region credentials: {str(e)}")
+        raise AWSServiceError("Failed to access China region credentials", "SecretsManager")
+
+
+def _create_ec2_client(region: str, cn_keys: Optional[Dict[str, str]] = None) -> 'EC2Client':
+    import boto3
+    from chalicelib.sdk import EC2Client
+    logger.debug(f"Initializing new EC2 client for region: {region}")
+    if region in CN_REGIONS:
+        return EC2Client(
+            boto3.client(
+                'ec2', region_name=region, config=get_boto_config(),
+                aws_access_key_id=cn_keys.get('access_key'),
+                aws_secret_access_key=cn_keys.get('secret_key')
+            )
+        )
+    return EC2Client(boto3.client('ec2', region_name=region, config=get_boto_config()))
+
+
+def get_ec2_client(region: str = 'us-east-1') -> 'EC2Client':
+    """Get the pooled EC2 client for a region
+
+    Args:
+        region: AWS region name
+
+    Returns:
+        EC2Client instance
+
+    Raises:
+        EC2ServiceError: If the client cannot be created
+
+    Note:
+        China region clients are pooled per access key, so a client built
+        with rotated-out keys is no longer used once get_cn_credentials()
+        returns new ones; it ages out of the pool as least recently used.
+    """
+    try:
+        if region in CN_REGIONS:
+            cn_keys = get_cn_credentials()
+            client = EC2_CLIENT_POOL.get(
+                (region, cn_keys.get('access_key')),
+                lambda: _create_ec2_client(region, cn_keys)
+            )
+        else:
+            client = EC2_CLIENT_POOL.get(region, lambda: _create_ec2_client(region))
+    except Exception as e:
+        logger.error(f"Failed to initialize EC2 client: {str(e)}")
+        raise EC2ServiceError("Failed to initialize EC2 service")
+    logger.debug(f"EC2 client pool: {EC2_CLIENT_POOL.info()}")
+    return client
+
+
+def get_pricing_client(region: str = PRICING_REGION) -> 'PricingClient':
+    """Get the shared pricing client from the ap-south-1 endpoint"""
+    global _PRICING_CLIENT
+    if _PRICING_CLIENT is None:
+        with _PRICING_LOCK:
+            if _PRICING_CLIENT is None:
+                import boto3
+                from chalicelib.pricelist import get_price_index
+                from chalicelib.sdk import PricingClient
+                logger.debug(f"Initializing new pricing client for region: {region}")
+                _PRICING_CLIENT = PricingClient(
+                    boto3.client('pricing', region_name=region, config=get_boto_config(pricing=True)),
+                    price_index=get_price_index()
+                )
+    return _PRICING_CLIENT
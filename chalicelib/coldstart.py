@@ -0,0 +1,9 @@
+import os
+
+
+# Cold import budget of the app module in milliseconds, checked by
+# import-report.py and tests/test_cold_start.py
+COLD_START_BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', 1000))
+
+# Modules that should only load on first use, never when the app is imported
+DEFERRED_MODULES = ('boto3', 'botocore', 'jinja2', 'numpy', 'chalicelib.sdk', 'chalicelib.pricelist')
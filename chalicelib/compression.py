@@ -0,0 +1,217 @@
+import os
+import gzip
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+from chalice.app import CaseInsensitiveMapping, Chalice, Response, handle_extra_types
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Brotli is optional, gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+
+# Content types worth compressing
+COMPRESSIBLE_TYPES = [
+    'application/json',
+    'application/javascript',
+    'text/css',
+    'text/html',
+    'image/svg+xml',
+]
+
+# Binary media type of the API. API Gateway decodes a base64 body only when the
+# request's Accept header matches a binary media type; '*/*' matches every
+# request, so compressed and identity bodies are sent base64 encoded and
+# reach every client as raw bytes, whatever Accept header it sends
+BINARY_MEDIA_TYPE = '*/*'
+
+# File suffixes of precompressed static variants, see compress-static.py
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_STATIC_VARIANTS: Dict[str, Dict[str, bytes]] = {}
+_STATIC_LOCK = threading.Lock()
+
+
+def supported_encodings() -> List[str]:
+    """Content encodings this deployment can produce, most preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """Pick the content encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+        available: Encodings to choose from (default: supported_encodings())
+
+    Returns:
+        The accepted encoding with the highest q-value, ties broken by our
+        preference, or None for identity
+    """
+    if not accept_encoding:
+        return None
+    available = supported_encodings() if available is None else available
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress data, with maximum compression for static assets built once"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if static else 5)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def is_compressible(content_type: str) -> bool:
+    """Check whether a Content-Type is in COMPRESSIBLE_TYPES"""
+    return content_type.split(';')[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+def get_static_variants(path: str, content: Optional[bytes] = None) -> Dict[str, bytes]:
+    """Get the identity and compressed variants of a static file
+
+    Variants prebuilt by compress-static.py are loaded from disk, a missing
+    gzip variant is built in memory. Either way this happens once per cold
+    start.
+
+    Args:
+        path: Path of the static file
+        content: File content when already loaded
+
+    Returns:
+        Dict mapping 'identity' and content encodings to bytes
+    """
+    variants = _STATIC_VARIANTS.get(path)
+    if variants is not None:
+        return variants
+
+    with _STATIC_LOCK:
+        variants = _STATIC_VARIANTS.get(path)
+        if variants is not None:
+            return variants
+        if content is None:
+            with open(path, 'rb') as f:
+                content = f.read()
+        variants = {'identity': content}
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            if os.path.exists(path + suffix):
+                with open(path + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+        if 'gzip' not in variants:
+            variants['gzip'] = compress(content, 'gzip', static=True)
+        _STATIC_VARIANTS[path] = variants
+        logger.debug(f"Loaded static variants for {path}: {sorted(variants)}")
+        return variants
+
+
+def static_response(path: str, headers: Dict[str, str], request, content: Optional[bytes] = None) -> Response:
+    """Build a response for a static file, precompressed when the client accepts it
+
+    Args:
+        path: Path of the static file
+        headers: Response headers, including Content-Type
+        request: Current request, checked for Accept-Encoding
+        content: File content when already loaded
+
+    Returns:
+        Response with the best accepted variant as bytes
+    """
+    variants = get_static_variants(path, content)
+    encoding = negotiate_encoding(
+        request.headers.get('accept-encoding') if request is not None else None,
+        # Prebuilt brotli variants are served even without the brotli module
+        [e for e in ENCODING_SUFFIXES if e in variants]
+    )
+    headers = {**headers, 'Vary': 'Accept-Encoding'}
+    if encoding is None:
+        return Response(body=variants['identity'], status_code=200, headers=headers)
+    headers['Content-Encoding'] = encoding
+    return Response(body=variants[encoding], status_code=200, headers=headers)
+
+
+def compress_response(response: Response, request) -> Response:
+    """Compress a response body when the client accepts it and it is large enough
+
+    Bodies are always returned as bytes, since every response is sent base64
+    encoded under the '*/*' binary media type.
+    """
+    headers = response.headers
+    content_type = next((v for k, v in headers.items() if k.lower() == 'content-type'), None)
+    if content_type is None:
+        # Chalice treats responses without a Content-Type as JSON
+        content_type = headers['Content-Type'] = 'application/json'
+
+    body = response.body
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        body = json.dumps(body, separators=(',', ':'), default=handle_extra_types).encode('utf-8')
+    response.body = body
+
+    if not is_compressible(content_type) or any(k.lower() == 'content-encoding' for k in headers):
+        return response
+    if response.status_code != 200 or len(body) < COMPRESS_MIN_SIZE:
+        return response
+    headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_encoding(request.headers.get('accept-encoding') if request is not None else None)
+    if encoding is None:
+        return response
+
+    response.body = compress(body, encoding)
+    headers['Content-Encoding'] = encoding
+    # The encoded body differs byte for byte, so its validator becomes weak
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = f"W/{etag}"
+    return response
+
+
+def default_accept(request) -> None:
+    """Treat a request without an Accept header as accepting any media type
+
+    That is what a missing Accept header means (RFC 9110), but Chalice
+    rejects binary responses to such requests, and under '*/*' every
+    response is binary.
+    """
+    if 'accept' not in request.headers:
+        request.headers = CaseInsensitiveMapping({**request.headers, 'accept': BINARY_MEDIA_TYPE})
+
+
+def register_compression(app: Chalice) -> None:
+    """Register the '*/*' binary media type and add the compression middleware"""
+    if BINARY_MEDIA_TYPE not in app.api.binary_types:
+        app.api.binary_types.append(BINARY_MEDIA_TYPE)
+
+    @app.middleware('http')
+    def compression_middleware(event, get_response):
+        default_accept(event)
+        return compress_response(get_response(event), event)
@@ -1,8 +1,12 @@
 import os
-import boto3
+import logging
 from typing import Dict, Any
 from chalice.app import BadRequestError
-from app import logger
+from chalicelib.config_cache import get_config_cache
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
 
 
 _CONF_DB = None
@@ -18,6 +22,7 @@ def get_conf_db():
         Uses environment variables:
         - AWS_REGION: Runtime region
         - APP_TABLE_NAME: DynamoDB table name
+        - DDB_ENDPOINT_URL: Optional endpoint, e.g. DynamoDB Local for testing
     """
     global _CONF_DB
     if _CONF_DB is None:
@@ -33,13 +38,22 @@ def get_conf_db():
         except KeyError:
             raise RuntimeError("APP_TABLE_NAME environment variable not set")
 
-        _CONF_DB = boto3.resource('dynamodb', region_name=runtime_region).Table(table_name)
+        # boto3 takes a large share of a cold start, load it on first use
+        import boto3
+        _CONF_DB = boto3.resource(
+            'dynamodb',
+            region_name=runtime_region,
+            endpoint_url=os.environ.get('DDB_ENDPOINT_URL')
+        ).Table(table_name)
         logger.debug(f"Connected to DDB [{table_name}] in [{runtime_region}]")
     return _CONF_DB
 
 
 def load_config(name: str) -> Dict[str, Any]:
     """Load config by name from DynamoDB table
+
+    Configs are served from the in-process config cache, which re-reads an
+    item only when its version changes.
     
     Args:
         name: Configuration name to load
@@ -51,12 +65,7 @@ def load_config(name: str) -> Dict[str, Any]:
         BadRequestError: If configuration cannot be loaded
     """
     try:
-        logger.debug(f"Loading config '{name}' from DynamoDB")
-        response = get_conf_db().get_item(Key={'name': name}, ConsistentRead=True)
-        if 'Item' not in response:
-            raise KeyError(f"Configuration '{name}' not found")
-        config = response['Item']['config']
-        return config
+        return get_config_cache().get(name)
     except Exception as ex:
         logger.error(f"Failed to load config '{name}': {str(ex)}")
         raise BadRequestError(str(ex))
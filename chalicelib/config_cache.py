@@ -0,0 +1,163 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+from chalicelib.cache import SingleFlight
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Config items in the app table, loaded together on first use
+CONFIG_NAMES = ('regions', 'operation', 'instance')
+
+# Seconds a loaded config is trusted before its version is checked again
+CONFIG_CHECK_INTERVAL = float(os.environ.get('CONFIG_CHECK_INTERVAL', 300))
+
+# Attempts at reading keys that BatchGetItem left unprocessed
+BATCH_GET_ATTEMPTS = 3
+
+_CONFIG_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+class ConfigCache:
+    """In-process cache of config items, revalidated by their version attribute
+
+    All known configs are read with one BatchGetItem on first use. Once an
+    entry is older than `check_interval`, only its `version` attribute is read
+    (eventually consistent); the full item is fetched again only when the
+    version has changed. Items without a version are always fetched in full.
+    """
+    def __init__(
+        self,
+        table,
+        names: Iterable[str] = CONFIG_NAMES,
+        check_interval: float = CONFIG_CHECK_INTERVAL
+    ) -> None:
+        self._table = table
+        self.names = tuple(names)
+        self.check_interval = check_interval
+        # name -> (version, config, checked_at)
+        self._entries: Dict[str, Tuple[Optional[str], Any, float]] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._warmed = False
+        self.full_reads = 0
+        self.version_reads = 0
+
+    def warm(self) -> None:
+        """Load all known configs with one BatchGetItem"""
+        table_name = self._table.name
+        request = {table_name: {'Keys': [{'name': n} for n in self.names], 'ConsistentRead': True}}
+        now = time.monotonic()
+        for attempt in range(1, BATCH_GET_ATTEMPTS + 1):
+            response = self._table.meta.client.batch_get_item(RequestItems=request)
+            self.full_reads += 1
+            items = response.get('Responses', {}).get(table_name, [])
+            with self._lock:
+                for item in items:
+                    self._entries[item['name']] = (item.get('version'), item['config'], now)
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            if attempt < BATCH_GET_ATTEMPTS:
+                time.sleep(0.05 * 2 ** attempt)
+        else:
+            logger.warning(f"Config keys left unprocessed: {request}")
+        self._warmed = True
+        logger.debug(f"Config cache warmed with {len(self._entries)} of {len(self.names)} configs")
+
+    def _fetch(self, name: str) -> Tuple[Optional[str], Any]:
+        """Read the full config item, strongly consistent"""
+        response = self._table.get_item(Key={'name': name}, ConsistentRead=True)
+        self.full_reads += 1
+        if 'Item' not in response:
+            raise KeyError(f"Configuration '{name}' not found")
+        item = response['Item']
+        with self._lock:
+            self._entries[name] = (item.get('version'), item['config'], time.monotonic())
+        return item.get('version'), item['config']
+
+    def _revalidate(self, name: str) -> Tuple[Optional[str], Any]:
+        """Check the stored version and re-fetch the config only if it changed"""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None:
+            return self._fetch(name)
+        version, config, checked_at = entry
+        if time.monotonic() - checked_at < self.check_interval:
+            # Another caller revalidated it meanwhile
+            return version, config
+        if version is None:
+            return self._fetch(name)
+
+        try:
+            response = self._table.get_item(
+                Key={'name': name},
+                ProjectionExpression='#v',
+                ExpressionAttributeNames={'#v': 'version'}
+            )
+            self.version_reads += 1
+        except Exception as ex:
+            logger.warning(f"Version check of config '{name}' failed, serving cached config: {str(ex)}")
+            return version, config
+        current = response.get('Item', {}).get('version')
+        if current != version:
+            logger.debug(f"Config '{name}' changed from version {version} to {current}")
+            return self._fetch(name)
+        with self._lock:
+            self._entries[name] = (version, config, time.monotonic())
+        return version, config
+
+    def get(self, name: str) -> Any:
+        """Get a config by name, revalidating it once it is older than the check interval
+
+        Raises:
+            KeyError: If the config item does not exist
+        """
+        return self.get_versioned(name)[1]
+
+    def get_versioned(self, name: str) -> Tuple[Optional[str], Any]:
+        """Get a config by name together with its version
+
+        The returned config object stays the same until its version changes.
+
+        Raises:
+            KeyError: If the config item does not exist
+        """
+        if not self._warmed and name in self.names:
+            self._flight.do('#warm', self._warm_once)
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None and time.monotonic() - entry[2] < self.check_interval:
+            return entry[0], entry[1]
+        return self._flight.do(name, self._revalidate, name)
+
+    def _warm_once(self) -> None:
+        if not self._warmed:
+            self.warm()
+
+    def clear(self) -> None:
+        """Drop all entries, the next lookup warms the cache again"""
+        with self._lock:
+            self._entries.clear()
+            self._warmed = False
+
+
+def get_config_cache() -> ConfigCache:
+    """Get the config cache of the app table"""
+    global _CONFIG_CACHE
+    if _CONFIG_CACHE is None:
+        with _CACHE_LOCK:
+            if _CONFIG_CACHE is None:
+                from chalicelib.config import get_conf_db
+                _CONFIG_CACHE = ConfigCache(get_conf_db())
+    return _CONFIG_CACHE
+
+
+def set_config_cache(cache: Optional[ConfigCache]) -> None:
+    """Replace the config cache, mainly for tests"""
+    global _CONFIG_CACHE
+    _CONFIG_CACHE = cache
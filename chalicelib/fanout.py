@@ -0,0 +1,97 @@
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+FanOutResult = Tuple[T, Optional[R], Optional[BaseException]]
+
+
+def fan_out(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    max_workers: int = 8,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None
+) -> List[FanOutResult]:
+    """Call `func` for every item on a bounded thread pool
+
+    Args:
+        func: Function taking a single item
+        items: Items to process
+        max_workers: Maximum number of concurrent calls
+        timeout: Seconds each call may run once started (default: no limit);
+            calls past it are reported with a TimeoutError and left to finish
+            in the background
+        deadline: Seconds the whole fan-out may take from submission
+            (default: no limit); items not finished by then, whether running
+            or still queued behind hung calls, are reported with a
+            TimeoutError and queued ones are cancelled
+
+    Returns:
+        List of (item, result, error) tuples in item order; `error` is the
+        exception raised for that item, in which case `result` is None
+    """
+    if not items:
+        return []
+
+    workers = max(1, min(max_workers, len(items)))
+    started = {}
+
+    def run(index):
+        started[index] = time.monotonic()
+        return func(items[index])
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fan-out')
+    submitted = time.monotonic()
+    futures = [executor.submit(run, i) for i in range(len(items))]
+    timed_out = {}
+    try:
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            wait_for = None
+            if deadline is not None:
+                wait_for = submitted + deadline - now
+                if wait_for <= 0:
+                    for index, future in enumerate(futures):
+                        if future in pending:
+                            timed_out[index] = f"Deadline of {deadline:g}s exceeded"
+                    break
+            if timeout is not None:
+                for index, future in enumerate(futures):
+                    if future not in pending or index not in started:
+                        continue
+                    remaining = started[index] + timeout - now
+                    if remaining <= 0:
+                        pending.discard(future)
+                        timed_out[index] = f"Timed out after {timeout:g}s"
+                    else:
+                        wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                if not pending:
+                    break
+                if wait_for is None:
+                    # Nothing has started yet, check again once a call could have expired
+                    wait_for = timeout
+            _, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+    finally:
+        # Do not wait for calls that timed out, and drop the ones never started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for index, (item, future) in enumerate(zip(items, futures)):
+        if index in timed_out:
+            results.append((item, None, TimeoutError(timed_out[index])))
+            continue
+        error = future.exception()
+        results.append((item, None if error else future.result(), error))
+    if timed_out:
+        logger.warning(f"Fan-out of {len(items)} items: {len(timed_out)} timed out")
+    logger.debug(f"Fan-out of {len(items)} items on {workers} workers finished")
+    return results
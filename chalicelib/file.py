@@ -1,10 +1,39 @@
 import logging
+import hashlib
+import mimetypes
+import threading
 import os
+import re
+from collections import namedtuple
+from typing import Dict, Optional, Tuple
 
 
 # Get logger
 logger = logging.getLogger()
 
+# Static assets served by the web UI and Swagger routes
+STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Hex digits of the content hash used in fingerprinted asset names
+FINGERPRINT_LENGTH = 12
+# Precompressed variants are loaded alongside their asset, see compression.py
+VARIANT_SUFFIXES = ('.gz', '.br')
+
+# Content types of served assets, independent of the platform mimetypes table
+MIME_TYPES = {
+    '.css': 'text/css',
+    '.js': 'application/javascript',
+    '.json': 'application/json',
+    '.html': 'text/html',
+    '.svg': 'image/svg+xml',
+}
+
+_FINGERPRINT = re.compile(r'^(?P<name>.+)\.(?P<fingerprint>[0-9a-f]{%d})$' % FINGERPRINT_LENGTH)
+
+StaticAsset = namedtuple('StaticAsset', ['name', 'path', 'content', 'digest', 'mime_type'])
+
+_STATIC_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
 
 def get_static_file(file_name: str, search_from_base_path: str = None) -> str:
     """Function to return file content
@@ -24,8 +53,6 @@ def get_static_file(file_name: str, search_from_base_path: str = None) -> str:
         if static_file_path is not None:
             with open(static_file_path, encoding='utf-8') as f:
                 content = f.read()
-                logger.debug(content)
-                # print(content)
                 if content is None or len(content) == 0:
                     raise ValueError(f"Empty content {file_name}")
         return content
@@ -62,3 +89,73 @@ def find_file(file_name: str, search_from_base_path: str = None) -> str:
         raise FileNotFoundError(f"File {file_name} not found.")
 
     return file_path
+
+
+def split_fingerprint(name: str) -> Tuple[str, Optional[str]]:
+    """Split a fingerprinted asset name such as 'main.0123456789ab'
+
+    Returns:
+        Tuple of (name, fingerprint), fingerprint is None for plain names
+    """
+    match = _FINGERPRINT.match(name)
+    if match is None:
+        return name, None
+    return match.group('name'), match.group('fingerprint')
+
+
+class StaticRegistry:
+    """In-memory index of the static assets, built once per cold start
+
+    Assets are keyed by their path relative to the static folder, and by
+    their file name for the routes that only know the name.
+    """
+    def __init__(self, base_path: str = STATIC_PATH) -> None:
+        self._assets: Dict[str, StaticAsset] = {}
+        self._by_name: Dict[str, StaticAsset] = {}
+        for root, _, files in os.walk(base_path):
+            for name in sorted(files):
+                if name.endswith(VARIANT_SUFFIXES):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    content = f.read()
+                key = os.path.relpath(path, base_path).replace(os.sep, '/')
+                asset = StaticAsset(
+                    name=key,
+                    path=path,
+                    content=content,
+                    digest=hashlib.sha256(content).hexdigest(),
+                    mime_type=MIME_TYPES.get(os.path.splitext(name)[1])
+                    or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                )
+                self._assets[key] = asset
+                self._by_name.setdefault(name, asset)
+        logger.debug(f"Indexed {len(self._assets)} static assets from {base_path}")
+
+    def get(self, name: str) -> StaticAsset:
+        """Get an asset by relative path or file name
+
+        Raises:
+            FileNotFoundError: When no asset has that name
+        """
+        asset = self._assets.get(name) or self._by_name.get(name)
+        if asset is None:
+            raise FileNotFoundError(f"Static asset {name} not found.")
+        return asset
+
+    def fingerprint(self, name: str) -> str:
+        """Get the content fingerprint of an asset"""
+        return self.get(name).digest[:FINGERPRINT_LENGTH]
+
+    def __len__(self) -> int:
+        return len(self._assets)
+
+
+def get_static_registry() -> StaticRegistry:
+    """Get the static asset registry, building it on first use"""
+    global _STATIC_REGISTRY
+    if _STATIC_REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _STATIC_REGISTRY is None:
+                _STATIC_REGISTRY = StaticRegistry()
+    return _STATIC_REGISTRY
@@ -0,0 +1,441 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import logging
+import resource
+import threading
+from collections import namedtuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Product families answered by get_product_instance / get_product_volume
+INSTANCE_FAMILIES = ('Compute Instance', 'Compute Instance (bare metal)')
+VOLUME_FAMILIES = ('Storage',)
+
+# Index key fields, in the order of the price lookup filters
+INSTANCE_KEY = ('regionCode', 'instanceType', 'operation', 'tenancy', 'capacitystatus', 'marketoption')
+VOLUME_KEY = ('regionCode', 'volumeApiName', 'marketoption')
+
+# Read size of the streaming offer parser
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_PRICE_INDEX = None
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS instance_price ('
+    'region TEXT, instance_type TEXT, operation TEXT, tenancy TEXT, '
+    'capacitystatus TEXT, marketoption TEXT, sku TEXT, attributes TEXT, term TEXT, '
+    'PRIMARY KEY (region, instance_type, operation, tenancy, capacitystatus, marketoption))',
+    'CREATE TABLE IF NOT EXISTS volume_price ('
+    'region TEXT, volume_api_name TEXT, marketoption TEXT, sku TEXT, attributes TEXT, term TEXT, '
+    'PRIMARY KEY (region, volume_api_name, marketoption))',
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)',
+)
+
+# Products waiting for their OnDemand term while an offer file is indexed,
+# with the columns of the index tables but keyed by sku
+_STAGING_SCHEMA = (
+    'CREATE TEMP TABLE staged_instance_price ('
+    'region TEXT, instance_type TEXT, operation TEXT, tenancy TEXT, '
+    'capacitystatus TEXT, marketoption TEXT, sku TEXT PRIMARY KEY, attributes TEXT, term TEXT)',
+    'CREATE TEMP TABLE staged_volume_price ('
+    'region TEXT, volume_api_name TEXT, marketoption TEXT, sku TEXT PRIMARY KEY, attributes TEXT, term TEXT)',
+    'CREATE TEMP TABLE staged_term (sku TEXT PRIMARY KEY, term TEXT)',
+)
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+class StreamStats:
+    """Throughput and memory counters of an offer file pass"""
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bytes = 0
+        self.started = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @staticmethod
+    def peak_rss_mb() -> float:
+        """Peak resident set size of this process in MiB"""
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'elapsed': round(self.elapsed, 3),
+            'rowsPerSec': round(self.rows_per_sec, 1),
+            'peakRssMb': round(self.peak_rss_mb(), 1)
+        }
+
+
+OfferRecord = namedtuple('OfferRecord', ['kind', 'term_type', 'key', 'data'])
+
+
+class OfferReader:
+    """Incremental reader for Price List offer files
+
+    Only the record being decoded and one read chunk are held in memory, so
+    peak memory does not grow with the size of the file. Each product and
+    each per-sku term entry is decoded on its own with json.JSONDecoder.
+    """
+    def __init__(self, fileobj: TextIO, chunk_size: int = CHUNK_SIZE, stats: Optional[StreamStats] = None) -> None:
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.stats = stats or StreamStats()
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping what was consumed"""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self.stats.bytes += len(chunk)
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of offer file")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Malformed offer file: expected '{char}', found '{found}'")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        """Decode the next JSON value, reading more chunks until it is complete"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A value ending at the buffer edge may be a truncated number
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _members(self) -> Iterator[str]:
+        """Yield the keys of an object, the caller consumes each value"""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Malformed offer file: unexpected '{char}'")
+
+    def records(self, term_types: Iterable[str] = ('OnDemand',)) -> Iterator[OfferRecord]:
+        """Yield metadata, product and term records in file order
+
+        Term types not listed in `term_types` are decoded and dropped one
+        record at a time.
+        """
+        for section in self._members():
+            if section == 'products':
+                for sku in self._members():
+                    self.stats.rows += 1
+                    yield OfferRecord('product', None, sku, self._value())
+            elif section == 'terms':
+                for term_type in self._members():
+                    keep = term_type in term_types
+                    for sku in self._members():
+                        terms = self._value()
+                        self.stats.rows += 1
+                        if keep:
+                            yield OfferRecord('term', term_type, sku, terms)
+            else:
+                yield OfferRecord('meta', None, section, self._value())
+
+
+def match_product(product: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Check a product against TERM_MATCH style filters
+
+    Filter values may be a single value or a collection of accepted values.
+    `productFamily` is matched on the product, other fields on its attributes.
+    """
+    attributes = product.get('attributes', {})
+    for field, expected in filters.items():
+        value = product.get(field) if field == 'productFamily' else attributes.get(field)
+        if isinstance(expected, (set, frozenset, list, tuple)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def iter_offer(
+    offer_path: str,
+    filters: Optional[Dict[str, Any]] = None,
+    term_types: Iterable[str] = ('OnDemand',),
+    stats: Optional[StreamStats] = None
+) -> Iterator[OfferRecord]:
+    """Stream the records of an offer file, keeping products that match `filters`"""
+    with open(offer_path, encoding='utf-8') as f:
+        for record in OfferReader(f, stats=stats).records(term_types):
+            if record.kind == 'product' and filters and not match_product(record.data, filters):
+                continue
+            yield record
+
+
+def _index_key(product: Dict[str, Any], regions: Optional[set]) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Return (table, key) for a product worth indexing, None otherwise"""
+    attributes = product.get('attributes', {})
+    if attributes.get('locationType') != 'AWS Region':
+        return None
+    if regions and attributes.get('regionCode') not in regions:
+        return None
+    family = product.get('productFamily')
+    if family in INSTANCE_FAMILIES:
+        fields, table = INSTANCE_KEY, 'instance_price'
+    elif family in VOLUME_FAMILIES and attributes.get('volumeApiName'):
+        fields, table = VOLUME_KEY, 'volume_price'
+    else:
+        return None
+    # Storage products carry no marketoption attribute, they are OnDemand only
+    key = tuple(attributes.get(f, 'OnDemand' if f == 'marketoption' else None) for f in fields)
+    if None in key:
+        return None
+    return table, key
+
+
+def build_price_index(
+    offer_path: str,
+    index_path: str,
+    regions: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Build a compact SQLite price index from an AmazonEC2 offer file
+
+    The offer file is streamed and each selected product is staged in SQLite
+    until its term arrives, so multi-GB regional files can be indexed with
+    flat memory usage.
+
+    Args:
+        offer_path: Path of the regional (or global) offer JSON file
+        index_path: Path of the SQLite index to write
+        regions: Region codes to keep (default: all regions in the file);
+            rows of other regions already in the index are left untouched
+
+    Returns:
+        Dict with the number of indexed instance and volume prices, and the
+        rows, rows/s and peak RSS of the pass over the offer file
+    """
+    regions = set(regions) if regions else None
+    filters = {'locationType': 'AWS Region'}
+    if regions:
+        filters['regionCode'] = regions
+    stats = StreamStats()
+    counts = {'instance_price': 0, 'volume_price': 0}
+    meta = {}
+    # Offer files list products before terms; terms seen earlier are staged too
+    products_seen = False
+    terms_first = False
+
+    conn = sqlite3.connect(index_path)
+    try:
+        # Staged rows live in SQLite pages, not Python objects, so memory
+        # stays flat however many products the file holds
+        conn.execute('PRAGMA temp_store = FILE')
+        with conn:
+            for statement in _SCHEMA + _STAGING_SCHEMA:
+                conn.execute(statement)
+            # Replace the indexed regions only, so regional files can be merged
+            for table in ('instance_price', 'volume_price'):
+                if regions:
+                    conn.executemany(f'DELETE FROM {table} WHERE region = ?', [(r,) for r in regions])
+                else:
+                    conn.execute(f'DELETE FROM {table}')
+
+            def set_term(sku, terms):
+                term = _compact(next(iter(terms.values())))
+                updated = 0
+                for table in ('instance_price', 'volume_price'):
+                    updated += conn.execute(
+                        f'UPDATE staged_{table} SET term = ? WHERE sku = ? AND term IS NULL', (term, sku)
+                    ).rowcount
+                return updated
+
+            for record in iter_offer(offer_path, filters, stats=stats):
+                if record.kind == 'product':
+                    products_seen = True
+                    index_key = _index_key(record.data, regions)
+                    if index_key is not None:
+                        table, key = index_key
+                        placeholders = ', '.join('?' * (len(key) + 3))
+                        conn.execute(
+                            f'INSERT OR IGNORE INTO staged_{table} VALUES ({placeholders})',
+                            key + (record.key, _compact(record.data['attributes']), None)
+                        )
+                elif record.kind == 'term':
+                    terms_first = terms_first or not products_seen
+                    if record.data and not set_term(record.key, record.data) and terms_first:
+                        conn.execute(
+                            'INSERT OR IGNORE INTO staged_term VALUES (?, ?)',
+                            (record.key, _compact(next(iter(record.data.values()))))
+                        )
+                else:
+                    meta[record.key] = record.data
+
+            for table in ('instance_price', 'volume_price'):
+                if terms_first:
+                    conn.execute(
+                        f'UPDATE staged_{table} SET term = '
+                        f'(SELECT term FROM staged_term WHERE staged_term.sku = staged_{table}.sku) '
+                        'WHERE term IS NULL'
+                    )
+                counts[table] = conn.execute(
+                    f'INSERT OR IGNORE INTO {table} SELECT * FROM staged_{table} '
+                    'WHERE term IS NOT NULL ORDER BY rowid'
+                ).rowcount
+
+            conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [
+                ('publicationDate', str(meta.get('publicationDate', ''))),
+                ('version', str(meta.get('version', ''))),
+                ('builtAt', str(int(time.time()))),
+            ])
+    finally:
+        conn.close()
+
+    result = {'instances': counts['instance_price'], 'volumes': counts['volume_price']}
+    result.update(stats.as_dict())
+    logger.info(
+        f"Indexed {result['instances']} instance and {result['volumes']} volume prices from "
+        f"{result['rows']} rows in {result['elapsed']:.2f}s ({result['rowsPerSec']:.0f} rows/s, "
+        f"peak RSS {result['peakRssMb']:.0f} MiB)"
+    )
+    return result
+
+
+class PriceIndex:
+    """Read-only lookups against a price index built by build_price_index"""
+    def __init__(self, index_path: str) -> None:
+        self.path = index_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{index_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        logger.debug(f"Opened price index: {index_path}")
+
+    def _fetch(self, sql: str, params: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        if row is None:
+            return None
+        sku, attributes, term = row
+        return {'sku': sku, 'attributes': json.loads(attributes), 'term': json.loads(term)}
+
+    def lookup_instance(
+        self,
+        region: str,
+        instance_type: str,
+        operation: str,
+        tenancy: str = 'Shared',
+        capacitystatus: str = 'UnusedCapacityReservation',
+        marketoption: str = 'OnDemand'
+    ) -> Optional[Dict[str, Any]]:
+        """Find the attributes and OnDemand term of an instance price"""
+        return self._fetch(
+            'SELECT sku, attributes, term FROM instance_price WHERE region = ? AND instance_type = ? '
+            'AND operation = ? AND tenancy = ? AND capacitystatus = ? AND marketoption = ?',
+            (region, instance_type, operation, tenancy, capacitystatus, marketoption)
+        )
+
+    def list_instances(
+        self,
+        region: str,
+        operation: str,
+        tenancy: str = 'Shared',
+        capacitystatus: str = 'UnusedCapacityReservation',
+        marketoption: str = 'OnDemand'
+    ) -> List[Dict[str, Any]]:
+        """Find the attributes and OnDemand terms of all instance types of a region and operation"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT sku, attributes, term FROM instance_price WHERE region = ? AND operation = ? '
+                'AND tenancy = ? AND capacitystatus = ? AND marketoption = ?',
+                (region, operation, tenancy, capacitystatus, marketoption)
+            ).fetchall()
+        return [{'sku': sku, 'attributes': json.loads(a), 'term': json.loads(t)} for sku, a, t in rows]
+
+    def lookup_volume(
+        self,
+        region: str,
+        volume_api_name: str,
+        marketoption: str = 'OnDemand'
+    ) -> Optional[Dict[str, Any]]:
+        """Find the attributes and OnDemand term of a volume price"""
+        return self._fetch(
+            'SELECT sku, attributes, term FROM volume_price WHERE region = ? '
+            'AND volume_api_name = ? AND marketoption = ?',
+            (region, volume_api_name, marketoption)
+        )
+
+    def meta(self) -> Dict[str, str]:
+        """Return index metadata such as the offer publication date"""
+        with self._lock:
+            return dict(self._conn.execute('SELECT key, value FROM meta').fetchall())
+
+
+def get_price_index() -> Optional[PriceIndex]:
+    """Get the offline price index configured for this stage
+
+    Returns:
+        PriceIndex instance, or None if no index is configured
+
+    Note:
+        Uses environment variables:
+        - PRICE_INDEX_PATH: Path of the SQLite index built by build-price-index.py
+    """
+    global _PRICE_INDEX
+    if _PRICE_INDEX is None:
+        index_path = os.environ.get('PRICE_INDEX_PATH')
+        if not index_path:
+            return None
+        if not os.path.exists(index_path):
+            logger.warning(f"Price index not found: {index_path}")
+            return None
+        _PRICE_INDEX = PriceIndex(index_path)
+    return _PRICE_INDEX
@@ -1,21 +1,25 @@
-import boto3
-import ast
-import os
+import logging
 from datetime import datetime, timedelta
-from typing import Dict
-from chalicelib.sdk import PricingClient, EC2Client
+from typing import Any, Dict, List
+from chalicelib.cache import ttl_cache
+from chalicelib.fanout import fan_out
+from chalicelib.clients import CN_REGIONS, get_ec2_client, get_pricing_client
 from chalicelib.models import (
-    AWSServiceError, EC2ServiceError, PricingServiceError,
+    EC2ServiceError, PricingServiceError,
     InstanceProductParams, VolumeProductParams
 )
+from chalicelib.responses import json_response
 from chalice.app import Response, BadRequestError
 from chalicelib.webui.view import list_ec2_regions
-from app import logger
 from . import bp
 
 
-_PRICING_CLIENT = None
-_EC2_CLIENT = None
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+
+# Maximum queries per batch pricing request
+MAX_BATCH_ITEMS = 100
 
 def get_cache_headers(max_age: int = 3600) -> Dict[str, str]:
     """Generate cache control headers with specified max age"""
@@ -27,67 +31,47 @@ def get_cache_headers(max_age: int = 3600) -> Dict[str, str]:
     }
 
 
-def get_pricing_client(region: str = 'ap-south-1') -> PricingClient:
-    """
-    Get cached pricing client instance form ap-south-1 endpoint
-    """
-    global _PRICING_CLIENT
-    if _PRICING_CLIENT is None:
-        logger.debug(f"Initializing new pricing client for region: {region}")
-        _PRICING_CLIENT = PricingClient(
-            boto3.client('pricing', region_name=region)
-        )
-    return _PRICING_CLIENT
+def get_error_status(error_code: str) -> int:
+    """Map a service error code to the HTTP status code"""
+    if error_code in ['INVALID_PARAMS', 'NOT_FOUND']:
+        return 400
+    if error_code == 'THROTTLED':
+        return 429
+    return 500
 
 
-def get_cn_credentials() -> Dict[str, str]:
-    """Get AWS China region credentials from Secrets Manager"""
-    try:
-        secret_id = os.environ.get('SECRET_NAME')
-        if not secret_id:
-            logger.error("SECRET_NAME environment variable not set")
-            raise ValueError("SECRET_NAME environment variable not set")
-            
-        client = boto3.client('secretsmanager')
-        secret = client.get_secret_value(SecretId=secret_id)
-        secret_string = secret.get('SecretString')
-        if not secret_string:
-            logger.error("Empty secret value retrieved from Secrets Manager")
-            raise ValueError("Empty secret value")
-            
-        return ast.literal_eval(secret_string)
-    except Exception as e:
-        logger.error(f"Failed to get China region credentials: {str(e)}")
-        raise AWSServiceError("Failed to access China region credentials")
+@ttl_cache(seconds=86400, maxsize=1)  # Cache the filtered list, so its encoding is reused
+def list_volume_types() -> List[str]:
+    """Get the EBS volume types that can be used as system disk"""
+    resp = get_pricing_client().get_attribute_values(
+        service_code='AmazonEC2',
+        attribute_name='volumeApiName'
+    ).get('data', [])
+    # Remove unsupported volume types
+    return [v for v in resp if v not in ['sc1', 'st1']]
 
 
-def get_ec2_client(region: str = 'ap-southeast-1') -> EC2Client:
-    """Get cached EC2 client instance"""
-    global _EC2_CLIENT
+@ttl_cache(seconds=3600, maxsize=1)  # Cache the assembled document, so its ETag is computed once
+def get_bootstrap_data() -> Dict[str, Any]:
+    """Get the web UI's startup datasets in one document
 
-    if _EC2_CLIENT is not None and _EC2_CLIENT.region == region:
-        logger.debug(f"Using cached EC2 client for region: {region}")
-        return _EC2_CLIENT
-    else:
-        try:
-            logger.debug(f"Initializing new EC2 client for region: {region}")
-            if region in ['cn-north-1', 'cn-northwest-1']:
-                cn_keys = get_cn_credentials()
-                _EC2_CLIENT = EC2Client(
-                        boto3.client(
-                        'ec2', region_name=region,
-                        aws_access_key_id=cn_keys.get('access_key'),
-                        aws_secret_access_key=cn_keys.get('secret_key')
-                    )
-                )
-            else:
-                _EC2_CLIENT = EC2Client(
-                    boto3.client('ec2', region_name=region)
-                )
-        except Exception as e:
-            logger.error(f"Failed to initialize EC2 client: {str(e)}")
-            raise EC2ServiceError("Failed to initialize EC2 service")
-        return _EC2_CLIENT
+    Returns:
+        Dict with `regions`, `operations`, `voltypes` and `categories`, as
+        returned by the matching /instance/{res} endpoints
+    """
+    eclient = get_ec2_client('us-east-1')  # Default region for operations and categories
+    lookups = {
+        'regions': list_ec2_regions,
+        'operations': eclient.list_usage_operations,
+        'voltypes': list_volume_types,
+        'categories': eclient.list_instance_categories,
+    }
+    data = {}
+    for name, result, error in fan_out(lambda name: lookups[name](), list(lookups), max_workers=len(lookups)):
+        if error is not None:
+            raise error
+        data[name] = result
+    return data
 
 
 @bp.route('/product/instance', methods=['GET'], cors=True, authorizer=None)
@@ -114,12 +98,53 @@ def get_product_instance() -> Response:
             params['tenancy'] = query['tenancy']
             
         resp = pclient.get_product_instance(params)
+        return json_response(resp, get_cache_headers(), bp.current_request, cached=True)
+    except (EC2ServiceError, PricingServiceError) as ex:
+        status_code = get_error_status(ex.error_code)
         return Response(
-            body=resp,
-            headers=get_cache_headers()
+            body={'error': ex.service, 'message': str(ex), 'code': ex.error_code},
+            status_code=status_code,
+            headers={'Content-Type': 'application/json'}
         )
+    except Exception as ex:
+        logger.error(f"Unexpected error: {str(ex)}")
+        return Response(
+            body={'error': 'InternalServerError', 'message': str(ex)},
+            status_code=500,
+            headers={'Content-Type': 'application/json'}
+        )
+
+
+@bp.route('/product/instance/regions', methods=['GET'], cors=True, authorizer=None)
+def compare_product_instance_regions() -> Response:
+    """Compare EC2 instance list prices across all regions"""
+    query = bp.current_request.query_params
+    if not query:
+        logger.warning("Missing query parameters for product instance regions request")
+        raise BadRequestError('Incorrect query parameter')
+    missing = [k for k in ('typesize', 'op') if k not in query]
+    if missing:
+        raise BadRequestError(f"Missing query parameter: {', '.join(missing)}")
+
+    try:
+        pclient = get_pricing_client()
+        params: InstanceProductParams = {
+            'region': '',
+            'typesize': query['typesize'],
+            'op': query['op']
+        }
+        if query.get('option'):
+            params['option'] = query['option']
+        if query.get('tenancy'):
+            params['tenancy'] = query['tenancy']
+
+        # The Pricing API only covers the aws partition
+        regions = [r['code'] for r in list_ec2_regions() if r['code'] not in CN_REGIONS]
+        logger.debug(f"Comparing {params['typesize']} across {len(regions)} regions")
+        resp = pclient.compare_instance_regions(params, regions)
+        return json_response(resp, get_cache_headers(), bp.current_request)
     except (EC2ServiceError, PricingServiceError) as ex:
-        status_code = 400 if ex.error_code in ['INVALID_PARAMS', 'NOT_FOUND'] else 500
+        status_code = get_error_status(ex.error_code)
         return Response(
             body={'error': ex.service, 'message': str(ex), 'code': ex.error_code},
             status_code=status_code,
@@ -134,6 +159,89 @@ def get_product_instance() -> Response:
         )
 
 
+@bp.route('/product/recommend', methods=['GET'], cors=True, authorizer=None)
+def recommend_product_instances() -> Response:
+    """Get the cheapest EC2 instance types matching resource requirements"""
+    query = bp.current_request.query_params
+    if not query:
+        logger.warning("Missing query parameters for product recommend request")
+        raise BadRequestError('Incorrect query parameter')
+    missing = [k for k in ('region', 'op') if k not in query]
+    if missing:
+        raise BadRequestError(f"Missing query parameter: {', '.join(missing)}")
+
+    try:
+        from chalicelib.sdk import MONTHLY_HOURS
+        from chalicelib.search import parse_search_query
+        try:
+            criteria = parse_search_query(query)
+        except ValueError as ex:
+            raise PricingServiceError(str(ex), error_code="INVALID_PARAMS")
+        # Results are ordered by price
+        criteria.pop('sort')
+        region, op = query['region'], query['op']
+        option, tenancy = query.get('option', 'OnDemand'), query.get('tenancy', 'Shared')
+
+        # Load the spec catalog and the price table concurrently, both are cached
+        lookups = {
+            'catalog': lambda: get_ec2_client(region).get_instance_catalog(),
+            'prices': lambda: get_pricing_client().get_instance_price_table(region, op, option, tenancy),
+        }
+        loaded = {}
+        for name, result, error in fan_out(lambda name: lookups[name](), list(lookups), max_workers=len(lookups)):
+            if error is not None:
+                raise error
+            loaded[name] = result
+
+        logger.debug(f"Recommending instances in {region} for {op}/{tenancy}")
+        resp = loaded['catalog'].cheapest(loaded['prices'], MONTHLY_HOURS, **criteria)
+        return json_response(resp, get_cache_headers(), bp.current_request)
+    except (EC2ServiceError, PricingServiceError) as ex:
+        status_code = get_error_status(ex.error_code)
+        return Response(
+            body={'error': ex.service, 'message': str(ex), 'code': ex.error_code},
+            status_code=status_code,
+            headers={'Content-Type': 'application/json'}
+        )
+    except Exception as ex:
+        logger.error(f"Unexpected error: {str(ex)}")
+        return Response(
+            body={'error': 'InternalServerError', 'message': str(ex)},
+            status_code=500,
+            headers={'Content-Type': 'application/json'}
+        )
+
+
+@bp.route('/product/instances', methods=['POST'], cors=True, authorizer=None,
+          content_types=['application/json'])
+def get_product_instances() -> Response:
+    """Get EC2 instance product information for a batch of queries"""
+    body = bp.current_request.json_body
+    # Accept a bare list or {"items": [...]}
+    items = body.get('items') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        logger.warning("Missing items for product instances request")
+        raise BadRequestError('Request body must contain a list of items')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise BadRequestError(f'At most {MAX_BATCH_ITEMS} items are allowed per request')
+
+    try:
+        pclient = get_pricing_client()
+        logger.debug(f"Getting {len(items)} product instances")
+        resp = pclient.get_product_instances(items)
+        return Response(
+            body=resp,
+            headers={'Content-Type': 'application/json'}
+        )
+    except Exception as ex:
+        logger.error(f"Unexpected error: {str(ex)}")
+        return Response(
+            body={'error': 'InternalServerError', 'message': str(ex)},
+            status_code=500,
+            headers={'Content-Type': 'application/json'}
+        )
+
+
 @bp.route('/product/volume', methods=['GET'], cors=True, authorizer=None)
 def get_product_volume() -> Response:
     """Get EBS volume product information"""
@@ -156,12 +264,9 @@ def get_product_volume() -> Response:
             params['option'] = query['option']
             
         resp = pclient.get_product_volume(params)
-        return Response(
-            body=resp,
-            headers=get_cache_headers()
-        )
+        return json_response(resp, get_cache_headers(), bp.current_request, cached=True)
     except (EC2ServiceError, PricingServiceError) as ex:
-        status_code = 400 if ex.error_code in ['INVALID_PARAMS', 'NOT_FOUND'] else 500
+        status_code = get_error_status(ex.error_code)
         return Response(
             body={'error': ex.service, 'message': str(ex), 'code': ex.error_code},
             status_code=status_code,
@@ -194,16 +299,19 @@ def get_param_list(res: str) -> Response:
                 eclient = get_ec2_client('us-east-1')  # Default region for categories
                 resp = eclient.list_instance_categories()
             case 'voltypes':
-                pclient = get_pricing_client()
-                resp = pclient.get_attribute_values(
-                    service_code='AmazonEC2',
-                    attribute_name='volumeApiName'
-                ).get('data', [])
-                # Remove unsupported volume types
-                resp = [v for v in resp if v not in ['sc1', 'st1']]
+                resp = list_volume_types()
+            case 'bootstrap':
+                resp = get_bootstrap_data()
 
             # Endpoints that require query parameters
-            case 'family' | 'sizes' | 'detail':
+            case 'search':  # /instance/search?region=xx&vcpus=16-&memory=64-&arch=arm64&network=25-&nvme=true
+                from chalicelib.search import parse_search_query
+                try:
+                    criteria = parse_search_query(query)
+                except ValueError as ex:
+                    raise EC2ServiceError(str(ex), error_code="INVALID_PARAMS")
+                resp = get_ec2_client(query.get('region', 'us-east-1')).search_instance_types(**criteria)
+            case 'family' | 'sizes' | 'detail' | 'details':
                 if not query:
                     logger.warning(f"Missing query parameters for instance {res} request")
                     raise BadRequestError('incorrect query parameter')
@@ -214,11 +322,9 @@ def get_param_list(res: str) -> Response:
                 match res:
                     case 'family':  # /instance/family?region=xx&arch=xx&category=xx
                         resp = eclient.list_instance_family(
-                            architecture=query['arch']
+                            architecture=query['arch'],
+                            category=query.get('category')
                         )
-                        # Filter by category if provided
-                        if query.get('category'):
-                            resp = [f for f in resp if f['category'] == query['category']]
                     case 'sizes':  # /instance/sizes?region=xx&arch=xx&family=xx
                         resp = eclient.get_instance_sizes(
                             architecture=query['arch'],
@@ -228,6 +334,11 @@ def get_param_list(res: str) -> Response:
                         resp = eclient.get_instance_detail(
                             instance_type=query['type']
                         )
+                    case 'details':  # /instance/details?region=xx&types=xx,yy
+                        instance_types = [t for t in query.get('types', '').split(',') if t.strip()]
+                        if not instance_types:
+                            raise BadRequestError('incorrect query parameter')
+                        resp = list(eclient.get_instance_details(instance_types).values())
 
             case _:
                 logger.error(f"Invalid resource type requested: {res}")
@@ -237,14 +348,15 @@ def get_param_list(res: str) -> Response:
                 )
 
         # Use longer cache duration (24 hours) for relatively static data
-        max_age = 86400 if res in ['regions', 'operations', 'categories', 'voltypes', 'sizes', 'detail'] else 3600
-        return Response(
-            body=resp,
-            headers=get_cache_headers(max_age)
-        )
+        max_age = 86400 if res in ['regions', 'operations', 'categories', 'voltypes', 'bootstrap', 'sizes', 'detail', 'details'] else 3600
+        # Results returned as-is from a result cache keep their encoding across requests
+        cached = res in ['operations', 'categories', 'voltypes', 'bootstrap', 'family', 'sizes', 'detail']
+        return json_response(resp, get_cache_headers(max_age), bp.current_request, cached=cached)
     
+    except BadRequestError:
+        raise
     except (EC2ServiceError, PricingServiceError) as ex:
-        status_code = 400 if ex.error_code in ['INVALID_PARAMS', 'NOT_FOUND'] else 500
+        status_code = get_error_status(ex.error_code)
         return Response(
             body={'error': ex.service, 'message': str(ex), 'code': ex.error_code},
             status_code=status_code,
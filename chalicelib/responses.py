@@ -0,0 +1,156 @@
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+from chalice.app import Request, Response
+from chalicelib.cache import TTLCache, on_drop, _MISSING
+from chalicelib.compression import static_response
+from chalicelib.file import StaticAsset
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Cache lifetime of fingerprinted asset URLs, whose content never changes
+IMMUTABLE_MAX_AGE = 31536000
+
+# Serialized bodies by identity of cache-owned result objects, kept as long as
+# the longest result cache so every cache hit reuses its serialization; an
+# entry is released as soon as its body leaves the owning cache
+_ENCODED_BODIES = TTLCache(ttl=86400, maxsize=512)
+
+
+def make_etag(payload: bytes) -> str:
+    """Build a strong ETag from a stable hash of the response payload"""
+    return '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+
+
+def encode_json(body: Any, cached: bool = False) -> Tuple[str, str]:
+    """Serialize a JSON body and compute its ETag
+
+    Args:
+        body: JSON-serializable body
+        cached: The body is owned by a result cache and is the same object on
+            every hit, so its serialization and ETag are memoized by identity.
+            Bodies built per request are never memoized, as they would only
+            be pinned in memory without ever being reused.
+
+    Returns:
+        Tuple of (serialized body, ETag)
+    """
+    if not cached:
+        payload = json.dumps(body, separators=(',', ':'), default=str)
+        return payload, make_etag(payload.encode('utf-8'))
+
+    key = id(body)
+    entry, _ = _ENCODED_BODIES.get(key)
+    # The entry holds a reference to the body, so its id cannot be reused
+    if entry is not _MISSING and entry[0] is body:
+        return entry[1], entry[2]
+
+    payload = json.dumps(body, separators=(',', ':'), default=str)
+    etag = make_etag(payload.encode('utf-8'))
+    _ENCODED_BODIES.set(key, (body, payload, etag))
+    return payload, etag
+
+
+def _release_encoding(body: Any) -> None:
+    """Drop the memoized encoding of a body its result cache let go of"""
+    entry, _ = _ENCODED_BODIES.get(id(body))
+    if entry is not _MISSING and entry[0] is body:
+        _ENCODED_BODIES.pop(id(body))
+
+
+on_drop(_release_encoding)
+
+
+def etag_matches(request: Optional[Request], etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison)"""
+    if request is None:
+        return False
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header.split(',')]
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+
+def not_modified(etag: str, headers: Dict[str, str]) -> Response:
+    """Build a 304 response carrying the validators and caching headers"""
+    headers = {k: v for k, v in headers.items() if k != 'Content-Type'}
+    headers['ETag'] = etag
+    return Response(body='', status_code=304, headers=headers)
+
+
+def json_response(
+    body: Any,
+    headers: Dict[str, str],
+    request: Optional[Request] = None,
+    status_code: int = 200,
+    cached: bool = False
+) -> Response:
+    """Build a JSON response with an ETag, or a 304 if the client has it
+
+    Args:
+        body: JSON-serializable response body
+        headers: Response headers, typically from get_cache_headers()
+        request: Current request, checked for If-None-Match
+        status_code: Status code of a full response
+        cached: The body is a cache-owned object, see encode_json()
+
+    Returns:
+        Response with the serialized body, or an empty 304 response
+    """
+    payload, etag = encode_json(body, cached)
+    if etag_matches(request, etag):
+        logger.debug(f"ETag {etag} matched, responding 304")
+        return not_modified(etag, headers)
+    return Response(
+        body=payload,
+        status_code=status_code,
+        headers={**headers, 'Content-Type': 'application/json', 'ETag': etag}
+    )
+
+
+def asset_response(
+    asset: StaticAsset,
+    request: Optional[Request] = None,
+    fingerprint: Optional[str] = None,
+    max_age: int = 86400,
+    body: Optional[str] = None
+) -> Response:
+    """Serve a static asset from memory with an ETag and caching headers
+
+    Args:
+        asset: Asset from the static registry
+        request: Current request, checked for If-None-Match and Accept-Encoding
+        fingerprint: Fingerprint from the requested URL; when it matches the
+            asset content the response is cached as immutable
+        max_age: Cache lifetime of plain URLs, 0 to revalidate every time
+        body: Derived content to send instead of the asset (e.g. minified JS)
+
+    Returns:
+        Response with the asset, or an empty 304 response
+    """
+    if fingerprint is not None and asset.digest.startswith(fingerprint):
+        cache_control = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    elif max_age:
+        cache_control = f'public, max-age={max_age}'
+    else:
+        cache_control = 'no-cache'
+    content_type = asset.mime_type
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    etag = '"' + asset.digest[:32] + '"'
+    headers = {'Content-Type': content_type, 'Cache-Control': cache_control, 'ETag': etag}
+
+    if etag_matches(request, etag):
+        return not_modified(etag, headers)
+    if body is not None:
+        return Response(body=body, status_code=200, headers=headers)
+    response = static_response(asset.path, headers, request, content=asset.content)
+    if 'Content-Encoding' in response.headers:
+        response.headers['ETag'] = f"W/{etag}"
+    return response
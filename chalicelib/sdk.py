@@ -1,52 +1,193 @@
-import ast
+import os
+import re
+import sys
+import json
 import time
-from functools import lru_cache, wraps
+import logging
 import boto3
-from typing import Dict, List, Any, Callable, TypeVar, cast
+from botocore.exceptions import ClientError
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
+from chalicelib.cache import SingleFlight, TTLCache, ttl_cache, _MISSING
+from chalicelib.catalog import get_catalog_index
 from chalicelib.config import load_config
+from chalicelib.fanout import fan_out
+from chalicelib.throttle import AdaptiveTokenBucket, RetryController, is_throttle_error
+from chalicelib.pricelist import PriceIndex
 from chalicelib.models import (
     EC2ServiceError, PricingServiceError,
     ProductResponse, InstanceProductParams, VolumeProductParams
 )
-from app import logger
 
+if TYPE_CHECKING:
+    from chalicelib.search import InstanceCatalog
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Prefer orjson for PriceList decoding when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    json_loads = json.loads
+    JSON_BACKEND = 'json'
+
+# Documents above this size are decoded lazily even with orjson
+LAZY_DECODE_MIN_SIZE = 4096
+
+_DECODER = json.JSONDecoder()
+_ATTRIBUTES_KEY = re.compile(r'"attributes"\s*:\s*')
+_TERMS_KEY = re.compile(r'"terms"\s*:\s*')
+
+# Maximum instance types per describe_instance_types call
+DESCRIBE_BATCH_SIZE = 100
+
+# Client-side limit of Pricing API calls per second, lowered while throttled
+PRICING_RATE_LIMIT = float(os.environ.get('PRICING_RATE_LIMIT', 10))
+# Attempts per Pricing API call when throttled
+PRICING_MAX_ATTEMPTS = int(os.environ.get('PRICING_MAX_ATTEMPTS', 5))
+# Concurrent lookups per batch pricing request
+PRICING_MAX_WORKERS = int(os.environ.get('PRICING_MAX_WORKERS', 8))
+# Seconds a single region may take in a cross-region comparison
+REGION_LOOKUP_TIMEOUT = float(os.environ.get('REGION_LOOKUP_TIMEOUT', 10))
+# Seconds a whole cross-region comparison may take, within API Gateway's 29s limit
+REGION_COMPARE_DEADLINE = float(os.environ.get('REGION_COMPARE_DEADLINE', 25))
+# Hours per month of monthly instance prices
+MONTHLY_HOURS = 730
+# Products per get_products page when listing a whole price table
+PRICE_TABLE_PAGE_SIZE = 100
+
+# Priced copies of cached products by product identity and quantity, kept as
+# long as the product caches, see apply_list_price()
+_PRICED_PRODUCTS = TTLCache(ttl=3600, maxsize=1024)
 
 # Define EC2 Product Page URLs
 INSTANCE_TYPE_URL = 'https://aws.amazon.com/cn/ec2/instance-types/'
 VOLUME_TYPE_URL = 'https://aws.amazon.com/cn/ebs/volume-types/'
 
-# Define a generic type for the function
-T = TypeVar('T')
 
-def timed_lru_cache(seconds: int, maxsize: int = 128):
-    """LRU Cache decorator with timeout
-    
-    Args:
-        seconds: Number of seconds to keep entries in cache
-        maxsize: Maximum cache size (default: 128)
-        
-    Returns:
-        Decorated function with timed cache
+def instance_product_key(params: InstanceProductParams) -> Tuple[str, str, str, str, str]:
+    """Build the canonical cache key (region, typesize, op, option, tenancy) for an instance query"""
+    return (
+        params['region'].strip().lower(),
+        params['typesize'].strip().lower(),
+        params['op'].strip(),
+        (params.get('option') or 'OnDemand').strip(),
+        (params.get('tenancy') or 'Shared').strip().capitalize()
+    )
+
+
+def volume_product_key(params: VolumeProductParams) -> Tuple[str, str, str]:
+    """Build the canonical cache key (region, type, option) for a volume query"""
+    return (
+        params['region'].strip().lower(),
+        params['type'].strip().lower(),
+        (params.get('option') or 'OnDemand').strip()
+    )
+
+
+def apply_list_price(product_info: ProductResponse, quantity: float) -> ProductResponse:
+    """Return a copy of a cached product with its unit price scaled to a monthly price
+
+    Only the listPrice part is copied, the rest of the cached product is shared.
+    Copies are memoized per cached product and quantity, so repeated lookups
+    return the same object and the response layer can reuse its encoding.
     """
-    def decorator(func: Callable[..., T]) -> Callable[..., T]:
-        # Create cache with timeout
-        func = lru_cache(maxsize=maxsize)(func)
-        func.lifetime = seconds
-        func.expiration = time.time() + seconds
-        
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if time.time() > func.expiration:
-                func.cache_clear()
-                func.expiration = time.time() + func.lifetime
-                logger.debug(f"Cache cleared for {func.__name__} due to expiration")
-            return func(*args, **kwargs)
-        
-        wrapper.cache_info = func.cache_info
-        wrapper.cache_clear = func.cache_clear
-        return cast(Callable[..., T], wrapper)
-    
-    return decorator
+    key = (id(product_info), quantity)
+    entry, _ = _PRICED_PRODUCTS.get(key)
+    # The entry holds a reference to the product, so its id cannot be reused
+    if entry is not _MISSING and entry[0] is product_info:
+        return entry[1]
+    list_price = dict(product_info['listPrice'])
+    unit_price = list_price['pricePerUnit']
+    list_price.update({
+        'unit': 'Month',
+        'pricePerUnit': {
+            'currency': unit_price['currency'],
+            'value': unit_price['value'] * quantity
+        }
+    })
+    priced = {**product_info, 'listPrice': list_price}
+    _PRICED_PRODUCTS.set(key, (product_info, priced))
+    return priced
+
+
+def intern_strings(value: Any) -> Any:
+    """Return a copy of a record with its strings interned
+
+    Instance descriptions repeat the same keys and values (architectures,
+    feature flags, units), so interning shares them across cached records.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k): intern_strings(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    return value
+
+
+class PriceItem:
+    """Lazily decoded PriceList entry
+
+    get_products returns each product as a JSON document string. Only the
+    `product.attributes` object and the selected term type are decoded from
+    their offsets, skipping the rest of the document (mostly Reserved terms).
+    Small documents are parsed whole when orjson is installed, which is faster.
+    """
+    __slots__ = ('raw', '_document')
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self._document = None
+
+    @property
+    def document(self) -> Dict[str, Any]:
+        """The fully decoded document"""
+        if self._document is None:
+            self._document = json_loads(self.raw)
+        return self._document
+
+    def _value_offset(self, pattern: re.Pattern, start: int = 0) -> int:
+        """Offset of the value following the first match of a `"key":` pattern"""
+        match = pattern.search(self.raw, start)
+        if match is None:
+            raise ValueError(f"{pattern.pattern} not found")
+        return match.end()
+
+    @property
+    def _lazy(self) -> bool:
+        return self._document is None and (JSON_BACKEND == 'json' or len(self.raw) > LAZY_DECODE_MIN_SIZE)
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        """The `product.attributes` object"""
+        if self._lazy:
+            try:
+                return _DECODER.raw_decode(self.raw, self._value_offset(_ATTRIBUTES_KEY))[0]
+            except ValueError:
+                pass
+        return self.document['product']['attributes']
+
+    def term(self, option: str = 'OnDemand') -> Optional[Dict[str, Any]]:
+        """The first term of a term type (e.g. 'OnDemand'), None if absent"""
+        if self._lazy:
+            try:
+                option_key = re.compile(f'"{re.escape(option)}"\\s*:\\s*')
+                offset = self._value_offset(option_key, self._value_offset(_TERMS_KEY))
+                terms = _DECODER.raw_decode(self.raw, offset)[0]
+                return next(iter(terms.values()), None)
+            except (ValueError, AttributeError):
+                pass
+        terms = self.document.get('terms', {}).get(option)
+        return next(iter(terms.values()), None) if terms else None
+
+    def extract(self, option: str = 'OnDemand') -> Dict[str, Any]:
+        """Return the attributes and selected term in the shape of a price index record"""
+        return {'attributes': self.attributes, 'term': self.term(option)}
 
 
 class EC2Client:
@@ -56,60 +197,50 @@ class EC2Client:
         self.region = boto3_client._client_config.region_name
         logger.debug(f"Initialized EC2Client for region: {self.region}")
 
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since this rarely changes
+    @property
+    def cache_scope(self) -> str:
+        """Scope of persisted cache entries, results differ per region"""
+        return f"ec2:{self.region}"
+
     def list_usage_operations(self) -> Dict[str, Any]:
-        """List EC2 usage operations with caching"""
+        """List EC2 usage operations
+
+        Served from the config cache, which revalidates the stored version and
+        returns the same object until the config changes.
+        """
         try:
             return load_config('operation')
         except Exception as ex:
             logger.error(f"Failed to load operations config: {str(ex)}")
             raise EC2ServiceError(f"Failed to load operations config: {str(ex)}")
 
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since categories rarely change
-    def list_instance_categories(self) -> List[Dict[str, Any]]:
-        """List EC2 instance categories"""
+    def list_instance_categories(self) -> Tuple[Dict[str, Any], ...]:
+        """List EC2 instance categories
+
+        Served from the catalog index of the current config version, which
+        returns the same object until the catalog changes.
+        """
         try:
-            instance_list = load_config('instance')
-            categories = {}
-            
-            for family in instance_list:
-                if family['category'] not in categories:
-                    categories[family['category']] = {
-                        'category': family['category'],
-                        'description': family['description'],
-                        'display_name': family['display_name']
-                    }
-            
-            return list(categories.values())
+            return get_catalog_index().categories
         except Exception as ex:
             logger.error(f"Failed to load instance categories: {str(ex)}")
             raise EC2ServiceError(f"Failed to load instance categories: {str(ex)}")
 
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since families rarely change
-    def list_instance_family(self, architecture: str) -> List[Dict[str, Any]]:
-        """List EC2 instance families"""
+    def list_instance_family(self, architecture: str, category: Optional[str] = None) -> Tuple[Dict[str, Any], ...]:
+        """List EC2 instance families of an architecture, optionally of one category
+
+        Served from the catalog index of the current config version, see
+        list_instance_categories().
+        """
         try:
-            logger.debug(f"Cache info before: {self.list_instance_family.cache_info()}")
-            instance_list = load_config('instance')
-            
-            family_list = []            
-            for family in instance_list:
-                for instance in family['family']:
-                    if instance['architecture'] == architecture:
-                        family_list.append({
-                            'category': family['category'],
-                            'name': instance['name'],
-                            'note': instance['note'],
-                            'architecture': instance['architecture']
-                        })
-
-            logger.debug(f"Filtered family list for {architecture}: {len(family_list)}")
+            family_list = get_catalog_index().find(architecture, category)
+            logger.debug(f"Filtered family list for {architecture}/{category}: {len(family_list)}")
             return family_list
         except Exception as ex:
             logger.error(f"Failed to load instance families: {str(ex)}")
             raise EC2ServiceError(f"Failed to load instance families: {str(ex)}")
 
-    @timed_lru_cache(seconds=3600, maxsize=256)
+    @ttl_cache(seconds=3600, maxsize=256, persist='ec2.instance_sizes')
     def get_instance_sizes(self, architecture: str, instance_type: str) -> List[Dict[str, str]]:
         """Get available EC2 instance sizes with enhanced caching and pagination
         
@@ -138,24 +269,13 @@ class EC2Client:
                 })
 
             instance_sizes = []
-
-            # Use paginator instead of manual pagination for better efficiency
-            paginator = self._boto3_client.get_paginator('describe_instance_types')
-            page_iterator = paginator.paginate(
-                Filters=filters,
-                # Use PaginationConfig to limit page size for more responsive results
-                PaginationConfig={'PageSize': 100}
-            )
-
-            # Process pages more efficiently
-            for page in page_iterator:
-                for i in page['InstanceTypes']:
-                    # Extract only the fields we need (data minimization)
-                    insType = i['InstanceType']
-                    instance_sizes.append({
-                        'instanceType': insType,
-                        'instanceFamily': insType.split('.')[0]
-                    })
+            for i in self._paginate_instance_types(filters):
+                # Extract only the fields we need (data minimization)
+                insType = i['InstanceType']
+                instance_sizes.append({
+                    'instanceType': insType,
+                    'instanceFamily': sys.intern(insType.split('.')[0])
+                })
             
             # Sort results for consistent ordering
             instance_sizes.sort(key=lambda x: x['instanceType'])
@@ -172,7 +292,63 @@ class EC2Client:
                 raise EC2ServiceError(str(ex), error_code=ex.__class__.__name__)
             raise EC2ServiceError(f"Failed to get instance types: {str(ex)}")
 
-    @timed_lru_cache(seconds=3600, maxsize=128)  # Cache for 1 hour since details may change
+    def _paginate_instance_types(self, filters: List[Dict[str, Any]]):
+        """Yield the instance types matching the filters, page by page
+
+        Pages carry full descriptions, so every record is also kept in the
+        get_instance_detail cache for later detail lookups.
+        """
+        detail_cache = EC2Client.get_instance_detail
+        # Use paginator instead of manual pagination for better efficiency
+        paginator = self._boto3_client.get_paginator('describe_instance_types')
+        page_iterator = paginator.paginate(
+            Filters=filters,
+            # Use PaginationConfig to limit page size for more responsive results
+            PaginationConfig={'PageSize': 100}
+        )
+        for page in page_iterator:
+            for i in page['InstanceTypes']:
+                i = intern_strings(i)
+                detail_cache.cache_prime(i, self, i['InstanceType'])
+                yield i
+
+    @ttl_cache(seconds=3600, maxsize=32)  # Cache the columnar catalog per region, rebuilt hourly
+    def get_instance_catalog(self) -> 'InstanceCatalog':
+        """Get the searchable catalog of current generation instance types
+
+        Returns:
+            InstanceCatalog of the region
+
+        Raises:
+            EC2ServiceError: If the API call fails
+        """
+        # NumPy loads with the first search, not with the app
+        from chalicelib.search import InstanceCatalog
+        try:
+            start_time = time.time()
+            catalog = InstanceCatalog(self._paginate_instance_types([
+                {'Name': 'current-generation', 'Values': ['true']}
+            ]))
+            logger.debug(f"Built instance catalog of {len(catalog)} types in {time.time() - start_time:.2f}s")
+            return catalog
+        except Exception as ex:
+            logger.error(f"Failed to build instance catalog: {str(ex)}")
+            if isinstance(ex, boto3.exceptions.Boto3Error):
+                raise EC2ServiceError(str(ex), error_code=ex.__class__.__name__)
+            raise EC2ServiceError(f"Failed to build instance catalog: {str(ex)}")
+
+    def search_instance_types(self, **criteria) -> Dict[str, Any]:
+        """Search the instance types of the region by spec
+
+        Args:
+            **criteria: Arguments of InstanceCatalog.search()
+
+        Returns:
+            Dict with the number of matches and the top result rows
+        """
+        return self.get_instance_catalog().search(**criteria)
+
+    @ttl_cache(seconds=3600, maxsize=1024, persist='ec2.instance_detail')  # Cache for 1 hour since details may change
     def get_instance_detail(self, instance_type: str) -> Dict[str, Any]:
         """Get detailed information about an EC2 instance type"""
         try:
@@ -193,15 +369,106 @@ class EC2Client:
                 raise EC2ServiceError(str(ex), error_code=ex.__class__.__name__)
             raise EC2ServiceError(f"Failed to get instance details: {str(ex)}")
 
+    def get_instance_details(self, instance_types: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get detailed information about many EC2 instance types
+        
+        Types already in the get_instance_detail cache are served from it, the
+        rest are fetched in batches of up to 100 per describe_instance_types
+        call and added to that cache.
+        
+        Args:
+            instance_types: Instance types (e.g., ['m5.large', 't3.micro'])
+            
+        Returns:
+            Dict of instance type to its details, in request order; unknown
+            instance types are left out
+            
+        Raises:
+            EC2ServiceError: If the API call fails
+        """
+        detail_cache = EC2Client.get_instance_detail
+        details = {}
+        missing = []
+        for instance_type in dict.fromkeys(t.strip() for t in instance_types if t.strip()):
+            cached = detail_cache.cache_get(self, instance_type)
+            details[instance_type] = cached
+            if cached is None:
+                missing.append(instance_type)
+
+        logger.debug(f"Instance details: {len(details) - len(missing)} cached, {len(missing)} to fetch")
+        for i in range(0, len(missing), DESCRIBE_BATCH_SIZE):
+            for instance in self._describe_instance_types(missing[i:i + DESCRIBE_BATCH_SIZE]):
+                instance_type = instance['InstanceType']
+                detail_cache.cache_put(instance, self, instance_type)
+                details[instance_type] = instance
+
+        for instance_type in [t for t, d in details.items() if d is None]:
+            logger.warning(f"Instance type not found: {instance_type}")
+            del details[instance_type]
+        return details
+
+    def _describe_instance_types(self, instance_types: List[str]) -> List[Dict[str, Any]]:
+        """Describe a batch of instance types, skipping unknown ones"""
+        try:
+            resp = self._boto3_client.describe_instance_types(InstanceTypes=instance_types)
+            return resp.get('InstanceTypes', [])
+        except ClientError as ex:
+            error_code = ex.response.get('Error', {}).get('Code')
+            if error_code == 'InvalidInstanceType':
+                if len(instance_types) == 1:
+                    return []
+                # One unknown type fails the whole batch, retry the types one by one
+                return [i for t in instance_types for i in self._describe_instance_types([t])]
+            logger.error(f"Failed to describe instance types: {str(ex)}")
+            raise EC2ServiceError(str(ex), error_code=error_code)
+        except Exception as ex:
+            logger.error(f"Failed to describe instance types: {str(ex)}")
+            raise EC2ServiceError(f"Failed to describe instance types: {str(ex)}")
+
 
 class PricingClient:
     """Client for AWS Pricing operations"""
-    def __init__(self, boto3_client) -> None:
+    def __init__(
+        self,
+        boto3_client,
+        price_index: Optional[PriceIndex] = None,
+        retry: Optional[RetryController] = None
+    ) -> None:
         self._boto3_client = boto3_client
+        # Coalesce identical in-flight get_products calls
+        self._flight = SingleFlight()
+        # Offline price index, consulted before the Pricing API
+        self._price_index = price_index
+        # Keep calls under the Pricing API rate limit, backing off when throttled
+        self._retry = retry or RetryController(
+            AdaptiveTokenBucket(PRICING_RATE_LIMIT),
+            max_attempts=PRICING_MAX_ATTEMPTS
+        )
         logger.debug("Initialized PricingClient")
 
+    @property
+    def cache_scope(self) -> str:
+        """Scope of persisted cache entries, pricing data is global"""
+        return "pricing"
+
+    def _get_products(self, filters: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Call get_products, sharing one upstream call among concurrent identical requests"""
+        key = tuple((f['Field'], f['Value']) for f in filters)
+        return self._flight.do(key, self._call_get_products, filters)
+
+    def _call_get_products(self, filters: List[Dict[str, str]]) -> Dict[str, Any]:
+        return self._call('get_products', ServiceCode='AmazonEC2', Filters=filters)
+
+    def _call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        """Call a Pricing API operation within the client-side rate limit"""
+        return self._retry.call(getattr(self._boto3_client, operation), **kwargs)
+
+    def throttle_stats(self) -> Dict[str, Any]:
+        """Get counters of throttled calls, retries and time spent waiting"""
+        return self._retry.stats()
+
     #SDK: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/pricing.html#Pricing.Client.describe_services
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since service codes rarely change
+    @ttl_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since service codes rarely change
     def get_service_codes(self) -> Dict[str, Any]:
         """Get AWS service codes with caching"""
         try:
@@ -209,7 +476,8 @@ class PricingClient:
             service_codes = []
             describe_args = {}
             while True:
-                describe_result = self._boto3_client.describe_services(
+                describe_result = self._call(
+                    'describe_services',
                     **describe_args,
                     # FormatVersion='string',
                     # NextToken='string',
@@ -231,11 +499,12 @@ class PricingClient:
             logger.error(f"Failed to get service codes: {str(ex)}")
             raise PricingServiceError(f"Failed to get service codes: {str(ex)}")
 
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since attributes rarely change
+    @ttl_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since attributes rarely change
     def get_service_attributes(self, service_code: str = 'AmazonEC2') -> Dict[str, Any]:
         """Get service attributes with caching"""
         try:
-            resp = self._boto3_client.describe_services(
+            resp = self._call(
+                'describe_services',
                 ServiceCode=service_code
             )
             services = resp.get('Services', [])
@@ -253,7 +522,7 @@ class PricingClient:
             logger.error(f"Failed to get service attributes: {str(ex)}")
             raise PricingServiceError(f"Failed to get service attributes: {str(ex)}")
 
-    @timed_lru_cache(seconds=86400, maxsize=128)  # Cache for 24 hours since values rarely change
+    @ttl_cache(seconds=86400, maxsize=128, persist='pricing.attribute_values')  # Cache for 24 hours since values rarely change
     def get_attribute_values(
         self,
         service_code: str = 'AmazonEC2',
@@ -267,7 +536,8 @@ class PricingClient:
                     'AttributeName' : attribute_name,
             }
             while True:        
-                response = self._boto3_client.get_attribute_values(
+                response = self._call(
+                    'get_attribute_values',
                     **describe_args
                 )
                 values.extend(
@@ -284,10 +554,235 @@ class PricingClient:
         
         except Exception as ex:
             logger.error(f"Failed to get attribute values: {str(ex)}")
+            if is_throttle_error(ex):
+                raise PricingServiceError("Pricing API rate exceeded, retry later", error_code="THROTTLED")
             raise PricingServiceError(f"Failed to get attribute values: {str(ex)}")
 
+    def get_price_list_file_url(self, region: str, currency: str = 'USD', file_format: str = 'json') -> str:
+        """Get the download URL of the current regional AmazonEC2 offer file"""
+        try:
+            price_lists = self._call(
+                'list_price_lists',
+                ServiceCode='AmazonEC2',
+                EffectiveDate=datetime.now(timezone.utc),
+                RegionCode=region,
+                CurrencyCode=currency
+            ).get('PriceLists', [])
+            if not price_lists:
+                raise PricingServiceError(f"No price list found for region: {region}", error_code="NOT_FOUND")
+
+            resp = self._call(
+                'get_price_list_file_url',
+                PriceListArn=price_lists[0]['PriceListArn'],
+                FileFormat=file_format
+            )
+            return resp['Url']
+        except PricingServiceError:
+            raise
+        except Exception as ex:
+            logger.error(f"Failed to get price list file url: {str(ex)}")
+            raise PricingServiceError(f"Failed to get price list file url: {str(ex)}")
+
     def get_product_instance(self, params: InstanceProductParams) -> ProductResponse:
         """Get EC2 instance Attributes and ListPrice [unit: Month]"""
+        product_info = self._load_product_instance(*instance_product_key(params))
+        # Monthly price (730 hours) is derived on read from the cached hourly price
+        return apply_list_price(product_info, MONTHLY_HOURS)
+
+    def get_product_instances(
+        self,
+        params_list: List[InstanceProductParams],
+        max_workers: int = PRICING_MAX_WORKERS
+    ) -> Dict[str, Any]:
+        """Get several EC2 instance products concurrently
+
+        Duplicate queries are looked up once. Lookups run on a bounded
+        thread pool and share the client's Pricing API rate limit.
+
+        Args:
+            params_list: Instance product queries
+            max_workers: Maximum number of concurrent lookups
+
+        Returns:
+            Dict with `results` (query and product) and `errors` (query and
+            error details); invalid queries are reported first
+        """
+        queries = {}
+        errors = []
+        for params in params_list:
+            try:
+                key = instance_product_key(params)
+            except (KeyError, TypeError, AttributeError):
+                errors.append({
+                    'request': params,
+                    'error': 'Pricing',
+                    'message': 'region, typesize and op are required',
+                    'code': 'INVALID_PARAMS'
+                })
+                continue
+            queries.setdefault(key, dict(zip(('region', 'typesize', 'op', 'option', 'tenancy'), key)))
+
+        results = []
+        outcomes = fan_out(
+            lambda key: apply_list_price(self._load_product_instance(*key), MONTHLY_HOURS),
+            list(queries),
+            max_workers=max_workers
+        )
+        for key, product, error in outcomes:
+            if error is None:
+                results.append({'request': queries[key], 'product': product})
+            elif isinstance(error, PricingServiceError):
+                errors.append({
+                    'request': queries[key],
+                    'error': error.service,
+                    'message': str(error),
+                    'code': error.error_code
+                })
+            else:
+                raise error
+        logger.debug(f"Priced {len(results)} of {len(queries)} instance products")
+        return {'results': results, 'errors': errors}
+
+    def compare_instance_regions(
+        self,
+        params: InstanceProductParams,
+        regions: List[str],
+        max_workers: int = PRICING_MAX_WORKERS,
+        timeout: float = REGION_LOOKUP_TIMEOUT,
+        deadline: float = REGION_COMPARE_DEADLINE
+    ) -> Dict[str, Any]:
+        """Compare the list price of one instance product across regions
+
+        Every region is looked up through get_product_instance, so prices
+        already cached for single lookups are reused.
+
+        Args:
+            params: Instance product query, its region is ignored
+            regions: Region codes to compare
+            max_workers: Maximum number of concurrent lookups
+            timeout: Seconds each region lookup may take
+            deadline: Seconds the whole comparison may take, including
+                regions still waiting for a worker
+
+        Returns:
+            Dict with `results` sorted by monthly price, cheapest first, and
+            `errors` for regions that failed or timed out
+        """
+        results = []
+        errors = []
+        outcomes = fan_out(
+            lambda region: self.get_product_instance({**params, 'region': region}),
+            list(dict.fromkeys(regions)),
+            max_workers=max_workers,
+            timeout=timeout,
+            deadline=deadline
+        )
+        for region, product, error in outcomes:
+            if error is None:
+                price = product['listPrice']
+                results.append({
+                    'regionCode': region,
+                    'location': product['productMeta']['location'],
+                    'pricePerUnit': price['pricePerUnit'],
+                    'unit': price['unit']
+                })
+            elif isinstance(error, (PricingServiceError, TimeoutError)):
+                errors.append({
+                    'regionCode': region,
+                    'message': str(error),
+                    'code': 'TIMEOUT' if isinstance(error, TimeoutError) else error.error_code
+                })
+            else:
+                raise error
+        results.sort(key=lambda r: r['pricePerUnit']['value'])
+        logger.debug(f"Compared {params.get('typesize')} in {len(results)} of {len(outcomes)} regions")
+        return {'results': results, 'errors': errors}
+
+    @ttl_cache(seconds=3600, maxsize=64, persist='pricing.instance_price_table')
+    def get_instance_price_table(
+        self, region: str, op: str, option: str = 'OnDemand', tenancy: str = 'Shared'
+    ) -> Dict[str, Any]:
+        """Get the hourly list prices of all instance types of a region
+
+        The offline price index is used when it covers the region, otherwise
+        one paginated get_products query without an instanceType filter.
+
+        Args:
+            region: AWS region code
+            op: Usage operation, e.g. 'RunInstances'
+            option: Market option
+            tenancy: Instance tenancy
+
+        Returns:
+            Dict with the `currency`, and the `hourly` price and
+            `normalizationSizeFactor` (None when not applicable) of each
+            instance type
+
+        Raises:
+            PricingServiceError: If the prices cannot be loaded
+        """
+        try:
+            records = []
+            if self._price_index is not None:
+                records = self._price_index.list_instances(
+                    region, op, tenancy,
+                    capacitystatus='UnusedCapacityReservation', marketoption=option
+                )
+            if not records:
+                filters = [
+                    {'Type': 'TERM_MATCH', 'Field': 'locationType', 'Value': 'AWS Region'},
+                    {'Type': 'TERM_MATCH', 'Field': 'capacitystatus', 'Value': 'UnusedCapacityReservation'},
+                    {'Type': 'TERM_MATCH', 'Field': 'RegionCode', 'Value': region},
+                    {'Type': 'TERM_MATCH', 'Field': 'operation', 'Value': op},
+                    {'Type': 'TERM_MATCH', 'Field': 'marketoption', 'Value': option},
+                    {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': tenancy}
+                ]
+                kwargs = {'ServiceCode': 'AmazonEC2', 'Filters': filters, 'MaxResults': PRICE_TABLE_PAGE_SIZE}
+                while True:
+                    result = self._call('get_products', **kwargs)
+                    records.extend(PriceItem(raw).extract(option) for raw in result.get('PriceList', []))
+                    if not result.get('NextToken'):
+                        break
+                    kwargs['NextToken'] = result['NextToken']
+
+            table = {'currency': 'USD', 'hourly': {}, 'normalizationSizeFactor': {}}
+            for record in records:
+                term = record['term']
+                if not term:
+                    continue
+                price = next(iter(term['priceDimensions'].values()))['pricePerUnit']
+                currency, value = next(iter(price.items()))
+                if float(value) <= 0:
+                    continue
+                attributes = record['attributes']
+                instance_type = sys.intern(attributes['instanceType'])
+                table['currency'] = currency
+                table['hourly'][instance_type] = float(value)
+                try:
+                    factor = float(attributes.get('normalizationSizeFactor'))
+                except (TypeError, ValueError):
+                    factor = None
+                table['normalizationSizeFactor'][instance_type] = factor
+            logger.debug(f"Loaded {len(table['hourly'])} instance prices for {region}/{op}/{tenancy}")
+            return table
+
+        except Exception as ex:
+            logger.error(f"Failed to get instance price table: {str(ex)}")
+            if is_throttle_error(ex):
+                raise PricingServiceError("Pricing API rate exceeded, retry later", error_code="THROTTLED")
+            if isinstance(ex, boto3.exceptions.Boto3Error):
+                raise PricingServiceError(str(ex), error_code=ex.__class__.__name__)
+            raise PricingServiceError(f"Failed to get instance price table: {str(ex)}")
+
+    @ttl_cache(seconds=3600, maxsize=1024, persist='pricing.product_instance')  # Cache for 1 hour, keyed by canonical params
+    def _load_product_instance(
+        self, region: str, typesize: str, op: str, option: str, tenancy: str
+    ) -> ProductResponse:
+        """Load EC2 instance Attributes and ListPrice [unit: Hrs]"""
+        params = {
+            'region': region, 'typesize': typesize, 'op': op,
+            'option': option, 'tenancy': tenancy
+        }
         try:
             # Build required filters
             filters = [
@@ -304,19 +799,25 @@ class PricingClient:
                 {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': params.get('tenancy', 'Shared')}
             ]
 
-            result = self._boto3_client.get_products(
-                ServiceCode='AmazonEC2',
-                Filters=filters
-            )
+            # Answer from the offline price index when it covers this product
+            record = None
+            if self._price_index is not None:
+                record = self._price_index.lookup_instance(
+                    region, typesize, op, tenancy,
+                    capacitystatus='UnusedCapacityReservation', marketoption=option
+                )
 
-            price_list = result.get('PriceList', [])
-            if len(price_list) != 1:
-                logger.warning("Invalid parameter combination for product instance")
-                raise PricingServiceError('Invalid parameter combination', error_code="INVALID_PARAMS")
+            if record is None:
+                result = self._get_products(filters)
 
-            # Convert the string to a dictionary using ast.literal_eval()
-            result_dict = ast.literal_eval(price_list[0])
-            attributes = result_dict['product']['attributes']
+                price_list = result.get('PriceList', [])
+                if len(price_list) != 1:
+                    logger.warning("Invalid parameter combination for product instance")
+                    raise PricingServiceError('Invalid parameter combination', error_code="INVALID_PARAMS")
+
+                # Decode only the attributes and the selected term
+                record = PriceItem(price_list[0]).extract(option)
+            attributes = record['attributes']
             
             # Extract and organize product information
             product_info = {
@@ -366,22 +867,20 @@ class PricingClient:
 
             # Extract and calculate pricing information
             option_type = params.get('option', 'OnDemand')
-            terms_dict = result_dict.get('terms', {}).get(option_type, {})
-            if not terms_dict:
+            terms = record['term']
+            if not terms:
                 raise PricingServiceError(f"No pricing terms found for option: {option_type}", error_code="INVALID_OPTION")
-            terms = next(iter(terms_dict.values()))
             price_dimensions = terms['priceDimensions']
             price_info = next(iter(price_dimensions.values()))
             # Extract unit price and currency
             currency = next(iter(price_info['pricePerUnit']))
             value = float(price_info['pricePerUnit'].get(currency))
             
-            # Calculate monthly price (730 hours)
+            # Keep the hourly price, monthly price is applied on read
             price_info.update({
-                'unit': 'Month',
                 'pricePerUnit': {
                     'currency': currency,
-                    'value': value * 730
+                    'value': value
                 },
                 'effectiveDate': terms['effectiveDate']
             })
@@ -391,12 +890,26 @@ class PricingClient:
 
         except Exception as ex:
             logger.error(f"Failed to get instance product data: {str(ex)}")
+            if is_throttle_error(ex):
+                raise PricingServiceError("Pricing API rate exceeded, retry later", error_code="THROTTLED")
             if isinstance(ex, boto3.exceptions.Boto3Error):
                 raise PricingServiceError(str(ex), error_code=ex.__class__.__name__)
             raise PricingServiceError(f"Failed to get instance product data: {str(ex)}")
 
     def get_product_volume(self, params: VolumeProductParams) -> ProductResponse:
-        """Get EBS volume Attributes and ListPrice [unit: GB-Mo]"""
+        """Get EBS volume Attributes and ListPrice [unit: Month]"""
+        try:
+            size = float(params['size'])
+        except (TypeError, ValueError):
+            raise PricingServiceError(f"Invalid volume size: {params.get('size')}", error_code="INVALID_PARAMS")
+        product_info = self._load_product_volume(*volume_product_key(params))
+        # Every volume size shares one cached entry priced per GB-Mo
+        return apply_list_price(product_info, size)
+
+    @ttl_cache(seconds=3600, maxsize=256, persist='pricing.product_volume')  # Cache for 1 hour, keyed by canonical params
+    def _load_product_volume(self, region: str, volume_type: str, option: str) -> ProductResponse:
+        """Load EBS volume Attributes and ListPrice [unit: GB-Mo]"""
+        params = {'region': region, 'type': volume_type, 'option': option}
         try:
             # Build filters, excluding None values
             filters = [
@@ -407,18 +920,22 @@ class PricingClient:
                 {'Type': 'TERM_MATCH', 'Field': 'volumeApiName', 'Value': params['type']}
             ]
 
-            result = self._boto3_client.get_products(
-                ServiceCode='AmazonEC2',
-                Filters=filters
-            )
+            # Answer from the offline price index when it covers this product
+            record = None
+            if self._price_index is not None:
+                record = self._price_index.lookup_volume(region, volume_type, marketoption=option)
+
+            if record is None:
+                result = self._get_products(filters)
 
-            price_list = result.get('PriceList', [])
-            if len(price_list) != 1:
-                logger.warning("Invalid parameter combination for product volume")
-                raise PricingServiceError('Invalid parameter combination', error_code="INVALID_PARAMS")
+                price_list = result.get('PriceList', [])
+                if len(price_list) != 1:
+                    logger.warning("Invalid parameter combination for product volume")
+                    raise PricingServiceError('Invalid parameter combination', error_code="INVALID_PARAMS")
 
-            result_dict = ast.literal_eval(price_list[0])
-            attributes = result_dict['product']['attributes']
+                # Decode only the attributes and the selected term
+                record = PriceItem(price_list[0]).extract(option)
+            attributes = record['attributes']
 
             # Extract and organize product information
             product_info = {
@@ -439,22 +956,20 @@ class PricingClient:
 
             # Extract and calculate pricing information
             option_type = params.get('option', 'OnDemand')
-            terms_dict = result_dict.get('terms', {}).get(option_type, {})
-            if not terms_dict:
+            terms = record['term']
+            if not terms:
                 raise PricingServiceError(f"No pricing terms found for option: {option_type}", error_code="INVALID_OPTION")
-            terms = next(iter(terms_dict.values()))
             price_dimensions = terms['priceDimensions']
             price_info = next(iter(price_dimensions.values()))
             
             currency = next(iter(price_info['pricePerUnit']))
             value = float(price_info['pricePerUnit'].get(currency))
             
-            # Calculate price for specified volume size
+            # Keep the per GB-Mo price, volume size is applied on read
             price_info.update({
-                'unit': 'Month',
                 'pricePerUnit': {
                     'currency': currency,
-                    'value': value * float(params['size'])
+                    'value': value
                 },
                 'effectiveDate': terms['effectiveDate']
             })
@@ -464,6 +979,8 @@ class PricingClient:
 
         except Exception as ex:
             logger.error(f"Failed to get volume product data: {str(ex)}")
+            if is_throttle_error(ex):
+                raise PricingServiceError("Pricing API rate exceeded, retry later", error_code="THROTTLED")
             if isinstance(ex, boto3.exceptions.Boto3Error):
                 raise PricingServiceError(str(ex), error_code=ex.__class__.__name__)
             raise PricingServiceError(f"Failed to get volume product data: {str(ex)}")
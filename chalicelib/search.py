@@ -0,0 +1,305 @@
+import re
+import sys
+import logging
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+from chalicelib.cache import TTLCache, _MISSING
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Bit of each processor architecture in the architecture column
+ARCHITECTURES = {'i386': 1, 'x86_64': 2, 'arm64': 4, 'x86_64_mac': 8, 'arm64_mac': 16}
+
+# Numeric columns that take range predicates and can be sorted on
+RANGE_FIELDS = ('vcpus', 'memory', 'network', 'gpus', 'storage', 'clock')
+
+# Boolean columns that take equality predicates
+FLAG_FIELDS = ('nvme', 'burstable')
+
+# Default and maximum number of results of a search
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+_BANDWIDTH = re.compile(r'(?:(\d+)x\s*)?([\d.]+)\s*Gigabit')
+
+
+def parse_network(info: Dict[str, Any]) -> float:
+    """Get the peak network bandwidth in Gbps from a NetworkInfo structure
+
+    Uses the per-card peak bandwidth when present, otherwise the number in
+    NetworkPerformance (e.g. 'Up to 12.5 Gigabit', '8x 100 Gigabit'). Labels
+    without a number ('Low', 'Moderate', 'High') count as 0.
+    """
+    cards = info.get('NetworkCards') or []
+    peak = sum(card.get('PeakBandwidthInGbps', 0) for card in cards)
+    if peak:
+        return float(peak)
+    match = _BANDWIDTH.search(info.get('NetworkPerformance', ''))
+    if not match:
+        return 0.0
+    return int(match.group(1) or 1) * float(match.group(2))
+
+
+def parse_range(value: str) -> Tuple[Optional[float], Optional[float]]:
+    """Parse a range predicate: '16' (exactly), '16-' (at least), '-64' (at most) or '16-64'
+
+    Raises:
+        ValueError: If the value is not a valid range
+    """
+    low, sep, high = value.strip().partition('-')
+    low = float(low) if low.strip() else None
+    high = float(high) if high.strip() else None
+    if not sep:
+        high = low
+    if low is None and high is None:
+        raise ValueError(f"Empty range: {value!r}")
+    if low is not None and high is not None and low > high:
+        raise ValueError(f"Invalid range: {value!r}")
+    return low, high
+
+
+def parse_search_query(query: Dict[str, str]) -> Dict[str, Any]:
+    """Turn the query parameters of /instance/search into InstanceCatalog.search() arguments
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    ranges = {f: parse_range(query[f]) for f in RANGE_FIELDS if query.get(f)}
+    flags = {}
+    for field in FLAG_FIELDS:
+        if query.get(field):
+            if query[field].lower() not in ('true', 'false'):
+                raise ValueError(f"{field} must be true or false")
+            flags[field] = query[field].lower() == 'true'
+    architectures = [a for a in query.get('arch', '').split(',') if a]
+    unknown = [a for a in architectures if a not in ARCHITECTURES]
+    if unknown:
+        raise ValueError(f"Unknown architecture: {', '.join(unknown)}")
+    families = [f for f in query.get('family', '').split(',') if f]
+
+    sort = query.get('sort', 'vcpus')
+    if sort.lstrip('-') not in RANGE_FIELDS:
+        raise ValueError(f"Cannot sort by {sort}")
+    limit = int(query.get('limit', DEFAULT_LIMIT))
+    if not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    return {
+        'ranges': ranges,
+        'flags': flags,
+        'architectures': architectures,
+        'families': families,
+        'sort': sort,
+        'limit': limit
+    }
+
+
+class InstanceCatalog:
+    """Columnar catalog of instance types for spec-based search
+
+    Built from describe_instance_types records. Every searchable attribute is
+    a NumPy array with one element per instance type, in instance type order,
+    so predicates are evaluated over whole columns at once. The result row of
+    every instance type is built once, a search only picks rows.
+    """
+    def __init__(self, instances: Iterable[Dict[str, Any]]) -> None:
+        instances = sorted(instances, key=lambda i: i['InstanceType'])
+        rows = []
+        columns = {f: [] for f in RANGE_FIELDS + FLAG_FIELDS + ('arch', 'family')}
+        for i in instances:
+            instance_type = sys.intern(i['InstanceType'])
+            family = sys.intern(instance_type.split('.')[0])
+            storage = i.get('InstanceStorageInfo') or {}
+            processor = i.get('ProcessorInfo') or {}
+            architectures = [a for a in processor.get('SupportedArchitectures', []) if a in ARCHITECTURES]
+            values = {
+                'vcpus': i.get('VCpuInfo', {}).get('DefaultVCpus', 0),
+                'memory': i.get('MemoryInfo', {}).get('SizeInMiB', 0) / 1024,
+                'network': parse_network(i.get('NetworkInfo') or {}),
+                'gpus': sum(g.get('Count', 0) for g in (i.get('GpuInfo') or {}).get('Gpus', [])),
+                'storage': storage.get('TotalSizeInGB', 0),
+                'clock': processor.get('SustainedClockSpeedInGhz', np.nan),
+                'nvme': storage.get('NvmeSupport') in ('required', 'supported'),
+                'burstable': bool(i.get('BurstablePerformanceSupported')),
+                'arch': sum(ARCHITECTURES[a] for a in architectures),
+                'family': family,
+            }
+            for field, value in values.items():
+                columns[field].append(value)
+            rows.append({
+                'instanceType': instance_type,
+                'instanceFamily': family,
+                'vcpus': values['vcpus'],
+                'memoryGiB': values['memory'],
+                'networkGbps': values['network'],
+                'gpus': values['gpus'],
+                'storageGB': values['storage'],
+                'nvme': values['nvme'],
+                'architectures': architectures
+            })
+
+        self.rows = tuple(rows)
+        self.vcpus = np.array(columns['vcpus'], dtype=np.int32)
+        self.memory = np.array(columns['memory'], dtype=np.float64)
+        self.network = np.array(columns['network'], dtype=np.float64)
+        self.gpus = np.array(columns['gpus'], dtype=np.int32)
+        self.storage = np.array(columns['storage'], dtype=np.float64)
+        self.clock = np.array(columns['clock'], dtype=np.float64)
+        self.nvme = np.array(columns['nvme'], dtype=bool)
+        self.burstable = np.array(columns['burstable'], dtype=bool)
+        self.arch = np.array(columns['arch'], dtype=np.uint8)
+        self.family = np.array(columns['family'], dtype=str)
+        # Price tables joined with this catalog, see price_columns()
+        self._price_columns = TTLCache(ttl=86400, maxsize=64)
+        logger.debug(f"Built instance catalog with {len(self.rows)} instance types")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def match(
+        self,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        architectures: Sequence[str] = (),
+        families: Sequence[str] = ()
+    ) -> np.ndarray:
+        """Evaluate the predicates of a search over the columns
+
+        Args:
+            ranges: Inclusive (min, max) bounds by field in RANGE_FIELDS,
+                either bound may be None
+            flags: Required value by field in FLAG_FIELDS
+            architectures: Any of these architectures must be supported
+            families: Instance families to search in (default: all)
+
+        Returns:
+            Boolean mask of the matching instance types
+        """
+        mask = np.ones(len(self.rows), dtype=bool)
+        for field, (low, high) in (ranges or {}).items():
+            column = getattr(self, field)
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        for field, value in (flags or {}).items():
+            mask &= getattr(self, field) == value
+        if architectures:
+            mask &= (self.arch & sum(ARCHITECTURES[a] for a in architectures)) != 0
+        if families:
+            mask &= np.isin(self.family, list(families))
+        return mask
+
+    def search(
+        self,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        architectures: Sequence[str] = (),
+        families: Sequence[str] = (),
+        sort: str = 'vcpus',
+        limit: int = DEFAULT_LIMIT
+    ) -> Dict[str, Any]:
+        """Find the instance types matching all predicates
+
+        Args:
+            ranges, flags, architectures, families: Predicates, see match()
+            sort: Field in RANGE_FIELDS to sort by, '-' prefix for descending;
+                ties are ordered by instance type
+            limit: Maximum number of results
+
+        Returns:
+            Dict with the number of matches (`count`) and the top `limit`
+            result rows (`results`)
+        """
+        mask = self.match(ranges, flags, architectures, families)
+        index = np.flatnonzero(mask)
+        keys = getattr(self, sort.lstrip('-'))[index]
+        if sort.startswith('-'):
+            keys = -keys
+        return {
+            'count': int(mask.sum()),
+            'results': [self.rows[i] for i in top_k(index, keys, limit)]
+        }
+
+    def price_columns(self, price_table: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Align a price table with the catalog
+
+        Cached price tables are the same object on every hit, so the join is
+        done once per table and catalog.
+
+        Args:
+            price_table: Result of PricingClient.get_instance_price_table()
+
+        Returns:
+            Tuple of (hourly price, normalization size factor) columns, NaN
+            for instance types without a price or factor
+        """
+        entry, _ = self._price_columns.get(id(price_table))
+        # The entry holds a reference to the table, so its id cannot be reused
+        if entry is not _MISSING and entry[0] is price_table:
+            return entry[1]
+        hourly = price_table['hourly']
+        factors = price_table['normalizationSizeFactor']
+        types = [row['instanceType'] for row in self.rows]
+        columns = (
+            np.array([hourly.get(t, np.nan) for t in types], dtype=np.float64),
+            np.array([factors.get(t) if factors.get(t) is not None else np.nan for t in types], dtype=np.float64)
+        )
+        self._price_columns.set(id(price_table), (price_table, columns))
+        return columns
+
+    def cheapest(
+        self,
+        price_table: Dict[str, Any],
+        hours: float,
+        unit: str = 'Month',
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        flags: Optional[Dict[str, bool]] = None,
+        architectures: Sequence[str] = (),
+        families: Sequence[str] = (),
+        limit: int = DEFAULT_LIMIT
+    ) -> Dict[str, Any]:
+        """Find the cheapest instance types matching all predicates
+
+        Args:
+            price_table: Result of PricingClient.get_instance_price_table()
+            hours: Hours the price is given for, e.g. 730 for a monthly price
+            unit: Unit of the price, as in get_product_instance() results
+            ranges, flags, architectures, families: Predicates, see match()
+            limit: Maximum number of results
+
+        Returns:
+            Dict with the number of priced matches (`count`) and the top
+            `limit` result rows, cheapest first, each with its `pricePerUnit`,
+            `unit` and `normalizationSizeFactor`
+        """
+        hourly, factors = self.price_columns(price_table)
+        mask = self.match(ranges, flags, architectures, families) & ~np.isnan(hourly)
+        index = np.flatnonzero(mask)
+        currency = price_table['currency']
+        results = []
+        for i in top_k(index, hourly[index], limit):
+            factor = factors[i]
+            results.append({
+                **self.rows[i],
+                'pricePerUnit': {'currency': currency, 'value': float(hourly[i] * hours)},
+                'unit': unit,
+                'normalizationSizeFactor': None if np.isnan(factor) else float(factor)
+            })
+        return {'count': int(mask.sum()), 'results': results}
+
+
+def top_k(index: np.ndarray, keys: np.ndarray, limit: int) -> np.ndarray:
+    """Pick the entries of `index` with the `limit` smallest keys, in key order
+
+    Ties are ordered by index, which is instance type order. Missing values
+    (NaN) sort last.
+    """
+    if limit < len(index):
+        # Keep the k smallest keys, plus everything tied with the k-th
+        kth = np.partition(keys, limit - 1)[limit - 1]
+        if not np.isnan(kth):
+            keep = keys <= kth
+            index, keys = index[keep], keys[keep]
+    return index[np.lexsort((index, keys))[:limit]]
@@ -392,30 +392,25 @@ new Vue({
   },
   async created() {
     try {
-      // Load initial data
-      const [regionResponse, operationResponse, voltypeResponse, categoryResponse] = await Promise.all([
-        axios.get('instance/regions'),
-        axios.get('instance/operations'),
-        axios.get('instance/voltypes'),
-        axios.get('instance/categories')
-      ]);
+      // Load initial data in one request
+      const { data } = await axios.get('instance/bootstrap');
 
-      this.regionOptions = regionResponse.data.map(region => ({
+      this.regionOptions = data.regions.map(region => ({
         value: region.code,
         text: `${region.code} ${region.name}`
       }));
 
-      this.operationOptions = operationResponse.data.map(op => ({
+      this.operationOptions = data.operations.map(op => ({
         value: op.operation,
         text: op.platform
       }));
 
-      this.voltypeOptions = voltypeResponse.data.map(vt => ({
+      this.voltypeOptions = data.voltypes.map(vt => ({
         value: vt,
         text: vt
       }));
 
-      this.categoryOptions = categoryResponse.data;
+      this.categoryOptions = data.categories;
 
       // Set default operation
       this.form.operation = this.operationOptions.find(op => op.text === 'Linux/UNIX')?.value;
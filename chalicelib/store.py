@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Tuple
+from chalice.app import Chalice
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+# Bump to invalidate every persisted cache entry after a response format change
+CACHE_VERSION = 1
+# Prefix of cache items, keeps them apart from config items in the app table
+KEY_PREFIX = 'cache'
+# Attribute holding the expiry epoch, enabled as the DynamoDB TTL attribute
+TTL_ATTRIBUTE = 'expires_at'
+
+_CACHE_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def versioned_key(key: str) -> str:
+    """Prefix a cache key with the cache version"""
+    return f"{KEY_PREFIX}#v{CACHE_VERSION}#{key}"
+
+
+class CacheStore(ABC):
+    """Base class of persistent cache stores
+
+    Values are stored as JSON with an absolute expiry. Writes are queued and
+    applied by a background thread so that callers never wait on the store;
+    the queue is flushed at the end of every request, see register_store_flush().
+    """
+    def __init__(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Read a value with its remaining lifetime in seconds
+
+        Returns:
+            Tuple of (value, remaining ttl), or None if missing or expired
+        """
+        try:
+            record = self._read(versioned_key(key))
+        except Exception as ex:
+            logger.warning(f"Persistent cache read failed for {key}: {str(ex)}")
+            return None
+        if record is None:
+            return None
+        payload, expires_at = record
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            # Expired items may linger until the TTL sweeper removes them
+            return None
+        return json.loads(payload), remaining
+
+    def put(self, key: str, value: Any, ttl: int) -> None:
+        """Write a value synchronously"""
+        try:
+            payload = json.dumps(value, separators=(',', ':'))
+        except (TypeError, ValueError) as ex:
+            logger.debug(f"Skipping persistent cache for {key}: {str(ex)}")
+            return
+        self._write(versioned_key(key), payload, int(time.time() + ttl))
+
+    def put_async(self, key: str, value: Any, ttl: int) -> None:
+        """Queue a write to be applied by the write-behind thread"""
+        self._ensure_worker()
+        self._queue.put((key, value, ttl))
+
+    def flush(self) -> None:
+        """Block until all queued writes have been applied"""
+        if self._worker is not None:
+            self._queue.join()
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._drain, daemon=True)
+                self._worker.start()
+
+    def _drain(self) -> None:
+        while True:
+            key, value, ttl = self._queue.get()
+            try:
+                self.put(key, value, ttl)
+            except Exception as ex:
+                logger.warning(f"Persistent cache write failed for {key}: {str(ex)}")
+            finally:
+                self._queue.task_done()
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[Tuple[str, int]]:
+        """Read the (payload, expires_at) record of a versioned key, None if missing"""
+
+    @abstractmethod
+    def _write(self, key: str, payload: str, expires_at: int) -> None:
+        """Write the record of a versioned key"""
+
+
+class DynamoDBCacheStore(CacheStore):
+    """Cache store backed by the DynamoDB app table"""
+    def __init__(self, table) -> None:
+        super().__init__()
+        self._table = table
+
+    def _read(self, key: str) -> Optional[Tuple[str, int]]:
+        item = self._table.get_item(Key={'name': key}).get('Item')
+        if item is None:
+            return None
+        return item['payload'], int(item[TTL_ATTRIBUTE])
+
+    def _write(self, key: str, payload: str, expires_at: int) -> None:
+        self._table.put_item(Item={
+            'name': key,
+            'payload': payload,
+            TTL_ATTRIBUTE: expires_at
+        })
+
+
+class SQLiteCacheStore(CacheStore):
+    """Cache store backed by a local SQLite file, intended for development"""
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(name TEXT PRIMARY KEY, payload TEXT NOT NULL, expires_at INTEGER NOT NULL)'
+            )
+            self._conn.execute('DELETE FROM cache WHERE expires_at <= ?', (int(time.time()),))
+
+    def _read(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT payload, expires_at FROM cache WHERE name = ?', (key,)
+            ).fetchone()
+
+    def _write(self, key: str, payload: str, expires_at: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (name, payload, expires_at) VALUES (?, ?, ?)',
+                (key, payload, expires_at)
+            )
+
+
+def get_cache_store() -> Optional[CacheStore]:
+    """Get the persistent cache store configured for this stage
+
+    Returns:
+        CacheStore instance, or None if the persistent tier is disabled
+
+    Note:
+        Uses environment variables:
+        - CACHE_STORE: 'dynamodb' (app table) or 'sqlite', unset to disable
+        - CACHE_SQLITE_PATH: SQLite file path for the 'sqlite' store
+    """
+    global _CACHE_STORE
+    if _CACHE_STORE is None:
+        backend = os.environ.get('CACHE_STORE', '').lower()
+        if not backend:
+            return None
+        with _STORE_LOCK:
+            if _CACHE_STORE is None:
+                if backend == 'dynamodb':
+                    from chalicelib.config import get_conf_db
+                    _CACHE_STORE = DynamoDBCacheStore(get_conf_db())
+                elif backend == 'sqlite':
+                    path = os.environ.get('CACHE_SQLITE_PATH', '/tmp/ec2-quicklook-cache.db')
+                    _CACHE_STORE = SQLiteCacheStore(path)
+                else:
+                    raise RuntimeError(f"Unsupported CACHE_STORE backend: {backend}")
+                logger.debug(f"Persistent cache store enabled: {backend}")
+    return _CACHE_STORE
+
+
+def set_cache_store(store: Optional[CacheStore]) -> None:
+    """Replace the persistent cache store, mainly for tests"""
+    global _CACHE_STORE
+    _CACHE_STORE = store
+
+
+def flush_cache_store() -> None:
+    """Apply the queued writes of the persistent cache store, if one is in use"""
+    store = _CACHE_STORE
+    if store is not None:
+        try:
+            store.flush()
+        except Exception as ex:
+            logger.warning(f"Persistent cache flush failed: {str(ex)}")
+
+
+def register_store_flush(app: Chalice) -> None:
+    """Flush queued cache writes before every response is returned
+
+    Lambda freezes the container once the handler returns, so writes still
+    queued at that point would stall until the next invocation, or be lost
+    when the container is reclaimed.
+    """
+    @app.middleware('http')
+    def store_flush_middleware(event, get_response):
+        try:
+            return get_response(event)
+        finally:
+            flush_cache_store()
@@ -1,9 +1,13 @@
-import boto3
 import json
+import logging
 from chalice import Chalice
+from chalicelib.file import get_static_registry
 from chalicelib.utils import build_api_endpoint, remove_base_path_slash
 from .webui import docs
-from app import logger
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
 
 
 def get_swagger_ui(app: Chalice) -> str:
@@ -20,14 +24,16 @@ def get_swagger_ui(app: Chalice) -> str:
     """
     try:
         # Call internal API to retrieve static resource
+        # Fingerprinted URLs let browsers cache the bundles as immutable
+        registry = get_static_registry()
         css_url = build_api_endpoint(
             current_request=app.current_request, 
             request_path="swagger/css"
-        )
+        ) + f"?v={registry.fingerprint('swagger-ui.css')}"
         ui_bundle_js_url = build_api_endpoint(
             current_request=app.current_request, 
             request_path="swagger/bundle"
-        )    
+        ) + f"?v={registry.fingerprint('swagger-ui-bundle.js')}"
         open_api_url = build_api_endpoint(
             current_request=app.current_request,
             request_path="api/json",
@@ -74,6 +80,7 @@ def export_api_to_json(app: Chalice, exportType: str = "oas30") -> str:
             raise ValueError("Missing required query parameters: api_id and stage")
 
         # send export command
+        import boto3
         client = boto3.client("apigateway")
         export_response = client.get_export(
             restApiId=api_id,
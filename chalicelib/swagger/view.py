@@ -1,10 +1,15 @@
+import logging
 from chalice.app import Response
-from chalicelib.file import get_static_file
+from chalicelib.file import get_static_registry
+from chalicelib.responses import asset_response
 from .utils import export_api_to_json, get_swagger_ui
-from app import logger
 from . import bp
 
 
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+
 @bp.route("/api/docs", methods=["GET"])
 def get_doc() -> Response:
     """Get Swagger UI Main Page
@@ -42,11 +47,10 @@ def get_swagger_css() -> Response:
     """
     css_file = "swagger-ui.css"
     try:
-        content = get_static_file(file_name=css_file)
-        return Response(
-            body=content, 
-            status_code=200,
-            headers={"Content-Type": "text/css"},
+        return asset_response(
+            get_static_registry().get(css_file),
+            request=bp.current_request,
+            fingerprint=(bp.current_request.query_params or {}).get('v')
         )
     except Exception as ex:
         logger.error(f"Failed to get Swagger CSS file: {str(ex)}")
@@ -67,11 +71,10 @@ def get_swagger_ui_bundle() -> Response:
     """
     ui_js_file = "swagger-ui-bundle.js"
     try:
-        content = get_static_file(file_name=ui_js_file)
-        return Response(
-            body=content,
-            status_code=200,
-            headers={"Content-Type": "application/javascript; charset=utf-8"},
+        return asset_response(
+            get_static_registry().get(ui_js_file),
+            request=bp.current_request,
+            fingerprint=(bp.current_request.query_params or {}).get('v')
         )
     except Exception as ex:
         logger.error(f"Failed to get Swagger UI bundle: {str(ex)}")
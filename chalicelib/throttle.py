@@ -0,0 +1,182 @@
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, TypeVar
+from botocore.exceptions import ClientError
+
+
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+T = TypeVar('T')
+
+# Error codes AWS APIs return when a caller exceeds its request rate
+THROTTLE_ERROR_CODES = frozenset({
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'RequestThrottledException',
+})
+
+
+def is_throttle_error(ex: BaseException) -> bool:
+    """Check whether an exception is an AWS throttling error"""
+    return isinstance(ex, ClientError) and ex.response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the rate of upstream calls
+
+    Tokens accrue at `rate` per second up to `burst`. Each call takes one
+    token and waits for the next one when the bucket is empty.
+    """
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.wait_time = 0.0
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative queues callers behind each other in arrival order
+            self._tokens -= 1
+            self.acquired += 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.wait_time += delay
+            return delay
+
+    def acquire(self) -> float:
+        """Block until a token is available
+
+        Returns:
+            Seconds spent waiting
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def on_success(self) -> None:
+        """Report a call that was accepted upstream, a fixed-rate bucket ignores it"""
+
+    def on_throttle(self) -> None:
+        """Report a call that was throttled upstream, a fixed-rate bucket ignores it"""
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate adapts to upstream throttling (AIMD)
+
+    Every throttled call multiplies the rate by `decrease`; healthy traffic
+    raises it by `increase` calls per second for every second of successful
+    calls. The rate stays within [`min_rate`, `max_rate`].
+    """
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        min_rate: float = 0.5,
+        max_rate: Optional[float] = None,
+        increase: float = 1.0,
+        decrease: float = 0.5
+    ) -> None:
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase
+        self.decrease = decrease
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # Drop the burst allowance so the lower rate applies at once
+            self._tokens = min(self._tokens, 0.0)
+        logger.debug(f"Throttled upstream, rate lowered to {self.rate:.2f}/s")
+
+
+class RetryController:
+    """Run upstream calls through a rate limiter, retrying throttled calls
+
+    Throttled calls are retried after a full-jitter exponential backoff, up to
+    `max_attempts` attempts in total. Outcomes are reported to the limiter so
+    an adaptive limiter can follow the upstream capacity.
+    """
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        max_attempts: int = 5,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0
+    ) -> None:
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+        self.backoff_time = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay before retry number `attempt`"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Call `func(*args, **kwargs)` within the rate limit, retrying on throttling
+
+        Raises:
+            ClientError: The last throttling error once all attempts are used,
+                or any other error at once
+        """
+        with self._lock:
+            self.calls += 1
+        attempt = 1
+        while True:
+            self.limiter.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except ClientError as ex:
+                if not is_throttle_error(ex):
+                    raise
+                self.limiter.on_throttle()
+                with self._lock:
+                    self.throttles += 1
+                if attempt >= self.max_attempts:
+                    logger.warning(f"Still throttled after {attempt} attempts")
+                    raise
+                delay = self.backoff(attempt)
+                with self._lock:
+                    self.retries += 1
+                    self.backoff_time += delay
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.limiter.on_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return throttling counters"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'retries': self.retries,
+                'backoffTime': round(self.backoff_time, 3),
+                'waitTime': round(self.limiter.wait_time, 3),
+                'rate': round(self.limiter.rate, 3)
+            }
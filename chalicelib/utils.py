@@ -1,6 +1,8 @@
 import os
 import re
 import json
+import hashlib
+import threading
 import random
 import string
 import logging
@@ -12,6 +14,10 @@ from chalice.app import Request
 # Set up logger
 logger = logging.getLogger('ec2-quicklook')
 
+# Optimized JavaScript by SHA-256 of the source content
+_OPTIMIZED_JS: Dict[str, str] = {}
+_OPTIMIZED_JS_LOCK = threading.Lock()
+
 
 def load_json_file(filename: str) -> Dict[str, Any]:
     """Load example config list from json file"""    
@@ -208,3 +214,25 @@ var d=s=>s[0]=="_"?[...s.slice(1)].map(c=>String.fromCharCode((c.charCodeAt(0)-5
     except Exception as ex:
         logger.error(f"JavaScript obfuscation failed: {str(ex)}")
         return content  # Return original content if obfuscation fails
+
+
+def optimize_js_cached(content: str, digest: Optional[str] = None) -> str:
+    """Get the optimize_js output, computed once per source content
+
+    Args:
+        content: Original JavaScript code
+        digest: SHA-256 hex digest of the content when already known
+
+    Returns:
+        Optimized JavaScript code
+    """
+    if digest is None:
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    optimized = _OPTIMIZED_JS.get(digest)
+    if optimized is None:
+        with _OPTIMIZED_JS_LOCK:
+            optimized = _OPTIMIZED_JS.get(digest)
+            if optimized is None:
+                optimized = _OPTIMIZED_JS[digest] = optimize_js(content)
+                logger.debug(f"Optimized JavaScript {digest[:12]}: {len(content)} -> {len(optimized)} chars")
+    return optimized
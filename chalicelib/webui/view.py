@@ -1,18 +1,38 @@
 import os
-import jinja2
-import boto3
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, List
 from chalice.app import Response
-from chalicelib import sdk, file, config
-from chalicelib.utils import build_api_endpoint, optimize_js
-from app import logger, app
+from chalicelib import file, config
+from chalicelib.clients import get_ec2_client, get_pricing_client
+from chalicelib.responses import asset_response
+from chalicelib.cache import ttl_cache
+from chalicelib.fanout import fan_out
+from chalicelib.utils import build_api_endpoint, optimize_js_cached
 from . import bp
 
+if TYPE_CHECKING:
+    import jinja2
 
 
-_EC2_CLIENT = None
-_PRICE_CLIENT = None
+# Set up logger
+logger = logging.getLogger('ec2-quicklook')
+
+
+# Folder of the page templates
+TEMPLATE_PATH = os.path.dirname(os.path.abspath(__file__))
+# Templates precompiled to Python modules, see compile-templates.py
+COMPILED_TEMPLATE_PATH = os.path.join(TEMPLATE_PATH, 'compiled')
+# Check templates for changes only in development (chalice local), not on Lambda
+TEMPLATE_AUTO_RELOAD = os.environ.get(
+    'TEMPLATE_AUTO_RELOAD',
+    'false' if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else 'true'
+).lower() == 'true'
+
+_TEMPLATE_ENV = None
+
+# Seconds a rendered homepage is served from cache
+INDEX_PAGE_TTL = int(os.environ.get('INDEX_PAGE_TTL', 3600))
 
 
 def get_cache_headers(type: str = 'application/json', max_age: int = 3600) -> Dict[str, str]:
@@ -25,47 +45,44 @@ def get_cache_headers(type: str = 'application/json', max_age: int = 3600) -> Di
     }
 
 
-def get_ec2_client(region: str) -> sdk.EC2Client:
-    """Get or create EC2 client for a region
-    
+def asset_url(route: str) -> str:
+    """Get the fingerprinted URL of a static asset route
+
     Args:
-        region: AWS region name
-        
+        route: Route without extension, e.g. 'css/custom' or 'js/main'
+
     Returns:
-        EC2Client instance
+        Route with the content fingerprint appended, e.g. 'js/main.0123456789ab'
     """
-    global _EC2_CLIENT
-    if _EC2_CLIENT is None:
-        logger.debug(f"Initializing EC2 client for region: {region}")
-        _EC2_CLIENT = sdk.EC2Client(
-            boto3.client('ec2', region_name=region)
-        )
-    return _EC2_CLIENT
+    kind, name = route.split('/', 1)
+    return f"{route}.{file.get_static_registry().fingerprint(f'{name}.{kind}')}"
 
 
-def get_price_client(region: str = 'ap-south-1') -> sdk.PricingClient:
-    """Get or create pricing client for a region
-    
-    Args:
-        region: AWS region name, defaults to ap-south-1
-        
-    Returns:
-        PricingClient instance
+def get_template_env() -> 'jinja2.Environment':
+    """Get the shared Jinja2 environment, creating it on first use
+
+    Templates precompiled by compile-templates.py are loaded as Python modules,
+    the others are compiled once and kept in the environment's cache. Template
+    files are only checked for changes when auto-reload is on.
     """
-    global _PRICE_CLIENT
-    if _PRICE_CLIENT is None:
-        logger.debug(f"Initializing pricing client for region: {region}")
-        _PRICE_CLIENT = sdk.PricingClient(
-            boto3.client('pricing', region_name=region)
-        )
-    return _PRICE_CLIENT
+    global _TEMPLATE_ENV
+    if _TEMPLATE_ENV is None:
+        # Loaded with the first page, API-only cold starts never need it
+        import jinja2
+        loader = jinja2.FileSystemLoader(TEMPLATE_PATH)
+        if os.path.isdir(COMPILED_TEMPLATE_PATH) and not TEMPLATE_AUTO_RELOAD:
+            loader = jinja2.ChoiceLoader([jinja2.ModuleLoader(COMPILED_TEMPLATE_PATH), loader])
+        env = jinja2.Environment(loader=loader, auto_reload=TEMPLATE_AUTO_RELOAD)
+        env.globals['asset_url'] = asset_url
+        _TEMPLATE_ENV = env
+    return _TEMPLATE_ENV
 
 
 def render(templ_path: str, context: Dict[str, Any]) -> str:
     """Render a Jinja2 template
     
     Args:
-        templ_path: Path to template file
+        templ_path: Path to template file in the webui folder
         context: Template context variables
         
     Returns:
@@ -75,8 +92,7 @@ def render(templ_path: str, context: Dict[str, Any]) -> str:
         Exception: If template rendering fails
     """
     try:
-        path, filename = os.path.split(templ_path)
-        return jinja2.Environment(loader=jinja2.FileSystemLoader(path or "./")).get_template(filename).render(context)
+        return get_template_env().get_template(os.path.basename(templ_path)).render(context)
     except Exception as ex:
         logger.error(f"Template rendering failed for {templ_path}: {str(ex)}")
         raise
@@ -94,6 +110,7 @@ def list_ec2_regions() -> List[Dict[str, str]]:
     try:
         # Query region list from Dynamodb table
         region_dict = config.load_config('regions')
+        import boto3
         aws_regions = boto3._get_default_session().get_available_regions('ec2')
         gcr_regions = boto3._get_default_session().get_available_regions('ec2', 'aws-cn')
         aws_regions.extend(gcr_regions)
@@ -104,6 +121,97 @@ def list_ec2_regions() -> List[Dict[str, str]]:
         raise
 
 
+@ttl_cache(seconds=INDEX_PAGE_TTL, maxsize=32)  # Cache rendered pages, keyed by (region, docs url, version)
+def render_index_page(region: str, apiDocsUrl: str, version: str) -> str:
+    """Render the homepage for a region
+
+    The region list, usage operations, instance families and volume types
+    are looked up concurrently.
+
+    Args:
+        region: AWS region code
+        apiDocsUrl: URL of the API docs for the current stage
+        version: Application version, part of the cache key
+
+    Returns:
+        Rendered HTML
+    """
+    eclient = get_ec2_client(region)
+    pclient = get_pricing_client()
+    lookups = {
+        'region_list': list_ec2_regions,
+        'operation_list': eclient.list_usage_operations,
+        #set default architecture: x86_64
+        'family_list': lambda: eclient.list_instance_family(architecture='x86_64'),
+        'voltype_list': lambda: pclient.get_attribute_values(
+            service_code='AmazonEC2',
+            attribute_name='volumeApiName'
+        ).get('data', []),
+    }
+    data = {}
+    for name, result, error in fan_out(lambda name: lookups[name](), list(lookups), max_workers=len(lookups)):
+        if error is not None:
+            raise error
+        data[name] = result
+
+    #remove sc1, st1 types that can't support system disk, without mutating the cached list
+    voltype_list = [v for v in data['voltype_list'] if v not in ['sc1', 'st1']]
+
+    # gen blank data
+    instance = {
+        "productMeta": {
+            "instanceFamily": "Not selected",
+            "tenancy": "Shared",
+            "location": region,
+            "introduceUrl": "#"
+        },
+        "hardwareSpecs": {},
+        "softwareSpecs": {},
+        "productFeature": {},
+        "instanceStorage": {},
+        "listPrice": {
+            "pricePerUnit": {
+                "currency": "USD",
+                "value": 0.00
+            },
+            "unit": "Hour",
+            "effectiveDate": "-"
+        }
+    }
+    volume = {
+        "productMeta": {
+            "volumeType": "Not selected",
+            "usagetype": "-",
+            "storageMedia": "-",
+            "introduceUrl": "#"
+        },
+        "productSpecs": {},
+        "listPrice": {
+            "pricePerUnit": {
+                "currency": "USD",
+                "value": 0.00
+            },
+            "unit": "GB-Month",
+            "effectiveDate": "-"
+        }
+    }
+
+    # send to front-end
+    context = {
+        'region_list': data['region_list'],
+        'family_list': data['family_list'],
+        'voltype_list': voltype_list,
+        # 'types_list':types_list,
+        'operation_list': data['operation_list'], 
+        'instance': instance,
+        'volume': volume,
+        'apiDocsUrl': apiDocsUrl,
+        'version': version
+    }
+    logger.debug(f"Rendered homepage for region: {region}")
+    return render('chalicelib/webui/main.html', context)
+
+
 @bp.route('/', methods=['GET'])
 def index() -> Response:
     """EC2 QuickLook homepage
@@ -115,29 +223,6 @@ def index() -> Response:
         query = bp.current_request.query_params
         #set default region: us-east-1
         region = 'us-east-1' if not query else query.get('region')
-        
-        region_list = list_ec2_regions()
-
-        eclient = get_ec2_client(region)
-        operation_list = eclient.list_usage_operations()
-        
-        #set default architecture: x86_64
-        family_list = eclient.list_instance_family(
-            # architecture = 'arm64', 
-            architecture = 'x86_64'
-        )
-
-        pclient = get_price_client()
-        voltype_list = pclient.get_attribute_values(
-            service_code='AmazonEC2',
-            attribute_name='volumeApiName'
-        ).get('data', [])
-        
-        #remove sc1, st1 types that can't support system disk 
-        if 'sc1' in voltype_list:
-            voltype_list.remove('sc1')
-        if 'st1' in voltype_list:
-            voltype_list.remove('st1')
 
         #api docs url
         apiDocsUrl = build_api_endpoint(
@@ -145,60 +230,8 @@ def index() -> Response:
             request_path="api/docs"
         )
 
-        # gen blank data
-        instance = {
-            "productMeta": {
-                "instanceFamily": "Not selected",
-                "tenancy": "Shared",
-                "location": region,
-                "introduceUrl": "#"
-            },
-            "hardwareSpecs": {},
-            "softwareSpecs": {},
-            "productFeature": {},
-            "instanceStorage": {},
-            "listPrice": {
-                "pricePerUnit": {
-                    "currency": "USD",
-                    "value": 0.00
-                },
-                "unit": "Hour",
-                "effectiveDate": "-"
-            }
-        }
-        volume = {
-            "productMeta": {
-                "volumeType": "Not selected",
-                "usagetype": "-",
-                "storageMedia": "-",
-                "introduceUrl": "#"
-            },
-            "productSpecs": {},
-            "listPrice": {
-                "pricePerUnit": {
-                    "currency": "USD",
-                    "value": 0.00
-                },
-                "unit": "GB-Month",
-                "effectiveDate": "-"
-            }
-        }
-
-        # send to front-end
-        context = {
-            'region_list': region_list,
-            'family_list': family_list,
-            'voltype_list': voltype_list,
-            # 'types_list':types_list,
-            'operation_list': operation_list, 
-            'instance': instance,
-            'volume': volume,
-            'apiDocsUrl': apiDocsUrl,
-            'version': app.version['version']
-        }
-
         return Response(
-            body=render('chalicelib/webui/main.html', context),
+            body=render_index_page(region, apiDocsUrl, bp.current_app.version['version']),
             status_code=200, 
             headers={"Content-Type": "text/html"}
         )
@@ -239,7 +272,7 @@ def detail() -> Response:
             'region_list': region_list,
             'instance_type': instance_type,
             'apiDocsUrl': apiDocsUrl,
-            'version': app.version['version']
+            'version': bp.current_app.version['version']
         }
 
         return Response(
@@ -266,13 +299,14 @@ def get_main_css(file_name: str) -> Response:
     Returns:
         Response with CSS content or error page
     """
-    css_file = file_name + '.css'
+    name, fingerprint = file.split_fingerprint(file_name)
+    css_file = name + '.css'
     try:
-        content = file.get_static_file(file_name=css_file)
-        return Response(
-            body=content, 
-            status_code=200,
-            headers=get_cache_headers(type="text/css", max_age=86400) # Cache for 24 hours
+        return asset_response(
+            file.get_static_registry().get(css_file),
+            request=bp.current_request,
+            fingerprint=fingerprint,
+            max_age=86400  # Cache plain URLs for 24 hours
         )
     except Exception as ex:
         logger.error(f"Failed to get CSS file {css_file}: {str(ex)}")
@@ -293,22 +327,22 @@ def get_optimized_js(file_path: str, is_optz: bool = True) -> Response:
     Returns:
         Response with JavaScript content or error page
     """
-    js_file = file_path + '.js'
+    name, fingerprint = file.split_fingerprint(file_path)
+    js_file = name + '.js'
     try:
-        # Read the original content
-        content = file.get_static_file(file_name=js_file)
+        asset = file.get_static_registry().get(js_file)
+        content = asset.content.decode('utf-8')
 
-        # Only optimize file if is_obfs is true
+        # Only optimize file if is_obfs is true, once per asset content
         if is_optz :
-            content = optimize_js(content)
-
-        return Response(
-            body=content, 
-            status_code=200,
-            headers={
-                "Content-Type": "application/javascript; charset=utf-8",
-                "Cache-Control": "no-cache"
-            },
+            content = optimize_js_cached(content, asset.digest)
+
+        return asset_response(
+            asset,
+            request=bp.current_request,
+            fingerprint=fingerprint,
+            max_age=0,  # Revalidate plain URLs every time
+            body=content
         )
     except Exception as ex:
         logger.error(f"Failed to get JS file {js_file}: {str(ex)}")
@@ -0,0 +1,32 @@
+import os
+import shutil
+import argparse
+import jinja2
+
+
+TEMPLATE_PATH = os.path.join('chalicelib', 'webui')
+COMPILED_TEMPLATE_PATH = os.path.join(TEMPLATE_PATH, 'compiled')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Precompile the web UI templates to Python modules before deployment'
+    )
+    parser.add_argument('--clean', action='store_true',
+                        help='Remove the compiled templates, e.g. before local development')
+    args = parser.parse_args()
+
+    if os.path.isdir(COMPILED_TEMPLATE_PATH):
+        shutil.rmtree(COMPILED_TEMPLATE_PATH)
+    if args.clean:
+        print(f"Removed {COMPILED_TEMPLATE_PATH}")
+        return
+
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_PATH))
+    names = [n for n in env.list_templates() if n.endswith('.html')]
+    env.compile_templates(COMPILED_TEMPLATE_PATH, zip=None, filter_func=lambda n: n in names, log_function=print)
+    print(f"Compiled {len(names)} templates to {COMPILED_TEMPLATE_PATH}")
+
+
+if __name__ == '__main__':
+    main()
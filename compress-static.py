@@ -0,0 +1,42 @@
+import os
+import argparse
+from chalicelib.compression import COMPRESS_MIN_SIZE, ENCODING_SUFFIXES, compress, supported_encodings
+
+
+DEFAULT_STATIC_DIR = os.path.join('chalicelib', 'static')
+STATIC_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json')
+
+
+def compress_file(path, encodings):
+    '''Write the compressed variants of a static file next to it'''
+    with open(path, 'rb') as f:
+        content = f.read()
+    sizes = []
+    for encoding in encodings:
+        data = compress(content, encoding, static=True)
+        with open(path + ENCODING_SUFFIXES[encoding], 'wb') as f:
+            f.write(data)
+        sizes.append(f"{encoding} {len(data) / 1024:.0f} KiB")
+    print(f"- {path}: {len(content) / 1024:.0f} KiB -> {', '.join(sizes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Prebuild gzip/brotli variants of the static assets before deployment'
+    )
+    parser.add_argument('-d', '--static-dir', default=DEFAULT_STATIC_DIR,
+                        help=f'Static asset directory (default: {DEFAULT_STATIC_DIR})')
+    args = parser.parse_args()
+
+    encodings = supported_encodings()
+    if 'br' not in encodings:
+        print("brotli is not installed, building gzip variants only")
+    for root, _, files in os.walk(args.static_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(STATIC_EXTENSIONS) and os.path.getsize(path) >= COMPRESS_MIN_SIZE:
+                compress_file(path, encodings)
+
+
+if __name__ == '__main__':
+    main()
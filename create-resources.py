@@ -109,6 +109,15 @@ def create_table(table_name_prefix, hash_key, range_key=None):
         # Wait for table creation to complete
         waiter = client_ddb.get_waiter('table_exists')
         waiter.wait(TableName=table_name, WaiterConfig={'Delay': 1})
+
+        # Expire persistent cache items automatically
+        client_ddb.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={
+                'Enabled': True,
+                'AttributeName': 'expires_at'
+            }
+        )
         return table_name
 
     except boto3.exceptions.Boto3Error as ex:
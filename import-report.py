@@ -0,0 +1,67 @@
+import re
+import sys
+import argparse
+import subprocess
+from chalicelib.coldstart import COLD_START_BUDGET_MS, DEFERRED_MODULES
+
+
+_IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+_INIT_DURATION = re.compile(r'initialized in (\d+) ms')
+
+
+def measure(module: str):
+    """Import a module in a fresh interpreter with -X importtime
+
+    Returns:
+        Tuple of (list of (name, self us, cumulative us, depth), init log line match)
+    """
+    code = f"import {module}, sys; print('deferred:' + ','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    )
+    entries = []
+    init_ms = None
+    # The app logs its init duration, on stdout or stderr depending on the handler
+    for line in proc.stderr.splitlines() + proc.stdout.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+            continue
+        init = _INIT_DURATION.search(line)
+        if init:
+            init_ms = int(init.group(1))
+    marker = next(line for line in proc.stdout.splitlines() if line.startswith('deferred:'))
+    loaded = [m for m in marker[len('deferred:'):].split(',') if m]
+    return entries, init_ms, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Report the import time of the app on a cold start, per module'
+    )
+    parser.add_argument('-m', '--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('-n', '--top', type=int, default=15, help='Number of modules to list')
+    parser.add_argument('--budget', type=float, default=COLD_START_BUDGET_MS,
+                        help='Fail when the import takes longer, in milliseconds')
+    args = parser.parse_args()
+
+    entries, init_ms, loaded = measure(args.module)
+    total_ms = next(c for name, _, c, depth in reversed(entries) if name == args.module and depth == 0) / 1000
+
+    print(f"{'module':50} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{name:50} {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}")
+    print()
+    print(f"Import of {args.module}: {total_ms:.1f} ms (budget {args.budget:.0f} ms)")
+    if init_ms is not None:
+        print(f"App init reported: {init_ms} ms")
+    if loaded:
+        print(f"Deferred modules loaded at import: {', '.join(loaded)}")
+
+    if total_ms > args.budget or loaded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,10 @@
+from chalicelib.cache import clear_caches
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """SDK caches are keyed by region, not client, so reset them between tests"""
+    clear_caches()
+    yield
+    clear_caches()
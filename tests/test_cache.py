@@ -0,0 +1,100 @@
+from chalicelib.cache import TTLCache, ttl_cache, _MISSING
+from chalicelib import cache as cache_module
+import threading
+import time
+
+
+def test_entries_expire_independently():
+    cache = TTLCache(ttl=60, maxsize=8)
+    cache.set('a', 1, ttl=0)
+    cache.set('b', 2)
+    value, is_stale = cache.get('a')
+    assert value is _MISSING and not is_stale
+    assert cache.get('b') == (2, False)
+    info = cache.info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == (1, False)
+    assert cache.get('c') == (3, False)
+    assert len(cache) == 2
+    assert cache.info().misses == 0
+    value, _ = cache.get('b')
+    assert value != 2
+
+
+def test_stale_while_revalidate_single_refresh():
+    calls = []
+    release = threading.Event()
+
+    @ttl_cache(seconds=60, maxsize=8, stale_seconds=60)
+    def lookup(key):
+        calls.append(key)
+        if len(calls) > 1:
+            release.wait(5)
+        return len(calls)
+
+    assert lookup('k') == 1
+    # Force the entry past its fresh window but inside the stale window
+    lookup.cache.set(('k',), 1, ttl=0)
+
+    results = [lookup('k') for _ in range(5)]
+    assert results == [1] * 5
+    assert lookup.cache_info().stale == 5
+
+    release.set()
+    for _ in range(100):
+        if lookup('k') == 2:
+            break
+        time.sleep(0.01)
+    assert lookup('k') == 2
+    assert len(calls) == 2
+
+
+def test_method_cache_clear():
+    class Client:
+        @ttl_cache(seconds=60)
+        def get(self, key):
+            return object()
+
+    client = Client()
+    first = client.get('x')
+    assert client.get('x') is first
+    client.get.cache_clear()
+    assert client.get('x') is not first
+    assert client.get.cache_info().misses == 1
+
+
+def test_keyword_and_default_calls_share_entry():
+    calls = []
+
+    @ttl_cache(seconds=60)
+    def lookup(region, kind='all'):
+        calls.append((region, kind))
+        return object()
+
+    first = lookup('us-east-1')
+    assert lookup('us-east-1', 'all') is first
+    assert lookup(region='us-east-1', kind='all') is first
+    assert lookup.cache_get(region='us-east-1') is first
+    assert calls == [('us-east-1', 'all')]
+
+
+def test_drop_listeners_see_replaced_and_evicted_values(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(cache_module, '_DROP_LISTENERS', [dropped.append])
+    cache = TTLCache(ttl=60, maxsize=1)
+    cache.set('a', 1)
+    cache.set('a', 2)
+    cache.set('b', 3)
+    cache.pop('b')
+
+    assert dropped == [1, 2, 3]
@@ -0,0 +1,79 @@
+from chalicelib.catalog import CatalogIndex, get_catalog_index
+from chalicelib.config_cache import ConfigCache, set_config_cache
+from chalicelib.sdk import EC2Client
+from tests.test_sdk import FakeEC2
+from tests.test_config_cache import FakeConfigTable
+import os
+import json
+import pytest
+
+
+EXAMPLE_CATALOG = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'example', 'ec2_instance.json')
+
+
+@pytest.fixture
+def catalog_item():
+    with open(EXAMPLE_CATALOG) as f:
+        return json.load(f)
+
+
+def scan(catalog, architecture, category=None):
+    """The former linear scan over the catalog"""
+    return [
+        {'category': g['category'], 'name': i['name'], 'note': i['note'], 'architecture': i['architecture']}
+        for g in catalog for i in g['family']
+        if i['architecture'] == architecture and category in (None, g['category'])
+    ]
+
+
+def test_index_matches_scan(catalog_item):
+    catalog = catalog_item['config']
+    index = CatalogIndex(catalog, catalog_item['version'])
+
+    for architecture in ('x86_64', 'arm64'):
+        assert list(index.find(architecture)) == scan(catalog, architecture)
+        for group in catalog:
+            assert list(index.find(architecture, group['category'])) == scan(catalog, architecture, group['category'])
+    assert [c['category'] for c in index.categories] == [g['category'] for g in catalog]
+    assert index.category_of('m5') == 'general'
+    assert index.category_of('unknown') is None
+    assert index.find('unknown') == ()
+
+
+def test_index_rebuilt_per_version(catalog_item):
+    table = FakeConfigTable([dict(catalog_item)])
+    cache = ConfigCache(table, names=('instance',), check_interval=60)
+    set_config_cache(cache)
+    try:
+        index = get_catalog_index()
+        assert get_catalog_index() is index
+
+        table.items['instance'] = {**catalog_item, 'version': '2099.01', 'config': catalog_item['config'][:1]}
+        cache.check_interval = 0
+        rebuilt = get_catalog_index()
+        assert rebuilt is not index
+        assert rebuilt.version == '2099.01'
+        assert len(rebuilt.categories) == 1
+    finally:
+        set_config_cache(None)
+
+
+def test_client_lists_follow_config_version(catalog_item):
+    table = FakeConfigTable([dict(catalog_item)])
+    cache = ConfigCache(table, names=('instance',), check_interval=60)
+    set_config_cache(cache)
+    try:
+        eclient = EC2Client(FakeEC2(delay=0))
+        categories = eclient.list_instance_categories()
+        assert len(categories) == len(catalog_item['config'])
+        # Unchanged versions serve the index's own objects
+        assert eclient.list_instance_categories() is categories
+
+        first = catalog_item['config'][0]
+        table.items['instance'] = {**catalog_item, 'version': '2099.01', 'config': [first]}
+        cache.check_interval = 0
+
+        assert [c['category'] for c in eclient.list_instance_categories()] == [first['category']]
+        assert {f['category'] for f in eclient.list_instance_family('x86_64')} <= {first['category']}
+    finally:
+        set_config_cache(None)
@@ -0,0 +1,83 @@
+from chalicelib import clients
+from chalicelib.clients import ClientPool, get_cn_credentials, get_ec2_client
+from tests.test_sdk import FakeEC2
+import pytest
+
+
+class FakeSecrets:
+    def __init__(self):
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        return {'SecretString': "{'access_key': 'AK', 'secret_key': 'SK'}"}
+
+
+@pytest.fixture
+def fake_boto3(monkeypatch):
+    """Replace boto3.client in the clients module, recording created clients"""
+    created = {'ec2': [], 'secretsmanager': FakeSecrets()}
+
+    def client(service, region_name=None, **kwargs):
+        if service == 'secretsmanager':
+            return created['secretsmanager']
+        fake = FakeEC2(region=region_name, delay=0)
+        fake.kwargs = kwargs
+        created['ec2'].append(fake)
+        return fake
+
+    monkeypatch.setattr('boto3.client', client)
+    monkeypatch.setattr(clients, 'EC2_CLIENT_POOL', ClientPool(maxsize=2))
+    monkeypatch.setenv('SECRET_NAME', 'test-secret')
+    return created
+
+
+def test_pool_lru_metrics():
+    pool = ClientPool(maxsize=2)
+    pool.get('us-east-1', object)
+    pool.get('ap-southeast-1', object)
+    pool.get('us-east-1', object)
+    pool.get('eu-west-1', object)
+
+    info = pool.info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 3, 1, 2)
+
+
+def test_alternating_regions_reuse_clients(fake_boto3):
+    for region in ['us-east-1', 'ap-southeast-1'] * 5:
+        assert get_ec2_client(region).region == region
+    assert len(fake_boto3['ec2']) == 2
+    assert clients.EC2_CLIENT_POOL.info().hits == 8
+
+
+def test_cn_credentials_cached(fake_boto3):
+    get_ec2_client('cn-north-1')
+    get_ec2_client('cn-northwest-1')
+    assert get_cn_credentials() == {'access_key': 'AK', 'secret_key': 'SK'}
+    assert fake_boto3['secretsmanager'].calls == 1
+    assert fake_boto3['ec2'][0].kwargs['aws_access_key_id'] == 'AK'
+
+
+def test_cache_survives_client_eviction(fake_boto3):
+    get_ec2_client('us-east-1').get_instance_sizes('arm64', 'm7g')
+    # Push us-east-1 out of the two-client pool, then come back
+    get_ec2_client('ap-southeast-1')
+    get_ec2_client('eu-west-1')
+    get_ec2_client('us-east-1').get_instance_sizes('arm64', 'm7g')
+
+    us_east = [c for c in fake_boto3['ec2'] if c._client_config.region_name == 'us-east-1']
+    assert len(us_east) == 2
+    assert sum(c.calls for c in us_east) == 1
+
+
+def test_cn_client_rebuilt_after_key_rotation(fake_boto3, monkeypatch):
+    first = get_ec2_client('cn-north-1')
+    assert get_ec2_client('cn-north-1') is first
+
+    rotated = "{'access_key': 'AK2', 'secret_key': 'SK2'}"
+    monkeypatch.setattr(fake_boto3['secretsmanager'], 'get_secret_value', lambda SecretId: {'SecretString': rotated})
+    get_cn_credentials.cache_clear()  # The 1-hour credentials entry expires
+
+    second = get_ec2_client('cn-north-1')
+    assert second is not first
+    assert fake_boto3['ec2'][-1].kwargs['aws_access_key_id'] == 'AK2'
@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import subprocess
+from chalicelib.coldstart import COLD_START_BUDGET_MS, DEFERRED_MODULES
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cold_import(statement):
+    """Run an import statement in a fresh interpreter, returning its duration and modules"""
+    code = (
+        "import sys, time, json\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(json.dumps({'ms': (time.perf_counter() - started) * 1000, 'modules': sorted(sys.modules)}))\n"
+    )
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_within_budget():
+    # Best of three, to keep a busy machine from failing the build
+    runs = [cold_import('import app') for _ in range(3)]
+
+    assert [m for m in DEFERRED_MODULES if m in runs[0]['modules']] == []
+    assert min(r['ms'] for r in runs) < COLD_START_BUDGET_MS
+
+
+def test_sdk_imports_standalone():
+    result = cold_import('import chalicelib.sdk')
+
+    assert 'app' not in result['modules']
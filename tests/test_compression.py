@@ -0,0 +1,133 @@
+from chalicelib import compression
+from chalicelib.compression import compress_response, negotiate_encoding, static_response
+from chalicelib.file import get_static_registry
+from chalicelib.product import view as product_view
+from chalicelib.webui.view import optimize_js_cached
+from chalice.app import Response
+from chalice.local import LambdaContext, LambdaEventConverter, RouteMatcher
+from types import SimpleNamespace
+import base64
+import gzip
+import json
+import pytest
+
+
+def make_request(accept_encoding=None):
+    return SimpleNamespace(headers={'accept-encoding': accept_encoding} if accept_encoding else {})
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding('gzip, deflate, br', ['br', 'gzip']) == 'br'
+    assert negotiate_encoding('gzip;q=1.0, br;q=0.5', ['br', 'gzip']) == 'gzip'
+    assert negotiate_encoding('br;q=0, *', ['br', 'gzip']) == 'gzip'
+    assert negotiate_encoding('identity', ['br', 'gzip']) is None
+    assert negotiate_encoding(None, ['gzip']) is None
+
+
+def test_compress_response_above_threshold(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    body = [{'instanceType': f"m7g.{i}xlarge"} for i in range(100)]
+    resp = compress_response(
+        Response(body=body, headers={'Content-Type': 'application/json', 'ETag': '"abc"'}),
+        make_request('gzip, br')
+    )
+
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert resp.headers['ETag'] == 'W/"abc"'
+    assert json.loads(gzip.decompress(resp.body)) == body
+
+
+def test_compress_response_small_or_unaccepted():
+    small = compress_response(Response(body={'a': 1}), make_request('gzip'))
+    plain = compress_response(Response(body='x' * 4096, headers={'Content-Type': 'text/css'}), make_request())
+
+    assert small.body == b'{"a":1}'
+    assert 'Content-Encoding' not in small.headers
+    # Every response is binary under '*/*', so bodies are always bytes
+    assert plain.body == b'x' * 4096
+    assert 'Content-Encoding' not in plain.headers
+
+
+def test_static_response_uses_prebuilt_variant(tmp_path):
+    path = tmp_path / 'bundle.js'
+    path.write_bytes(b'var a = 1;' * 500)
+    (tmp_path / 'bundle.js.br').write_bytes(b'prebuilt-brotli')
+    headers = {'Content-Type': 'application/javascript'}
+
+    br = static_response(str(path), headers, make_request('gzip, br'))
+    gz = static_response(str(path), headers, make_request('gzip'))
+    identity = static_response(str(path), headers, make_request())
+
+    assert (br.headers['Content-Encoding'], br.body) == ('br', b'prebuilt-brotli')
+    assert gzip.decompress(gz.body) == path.read_bytes()
+    assert identity.body == path.read_bytes()
+    assert 'Content-Encoding' not in identity.headers
+
+
+def api_gateway_request(method, path, headers, body=b''):
+    """Invoke the app as API Gateway's Lambda proxy integration would
+
+    Under '*/*' API Gateway base64 encodes request bodies, and decodes a
+    base64 response body only when the request's Accept header (its first
+    media type) matches a binary media type. Other bodies pass through as text.
+    """
+    from app import app
+    event = LambdaEventConverter(RouteMatcher(list(app.routes)), app.api.binary_types).create_lambda_event(
+        method=method, path=path, headers=headers
+    )
+    if body:
+        event['body'], event['isBase64Encoded'] = base64.b64encode(body).decode('ascii'), True
+    response = app(event, LambdaContext('ec2-quicklook', 128))
+
+    accept = headers.get('Accept', '*/*').split(',')[0].split(';')[0].strip()
+    binary = '*/*' in app.api.binary_types or accept in app.api.binary_types
+    body = response['body']
+    if response.get('isBase64Encoded') and binary:
+        body = base64.b64decode(body)
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    headers = {k.lower(): v for k, v in response['headers'].items()}
+    if headers.get('content-encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return response['statusCode'], headers, body
+
+
+@pytest.mark.parametrize('headers', [
+    {'Accept': '*/*'},
+    {'Accept': '*/*', 'Accept-Encoding': 'gzip'},
+    {'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8', 'Accept-Encoding': 'gzip'},
+    {},
+])
+def test_api_gateway_delivers_raw_bodies(monkeypatch, headers):
+    monkeypatch.setattr(compression, 'brotli', None)
+    regions = [{'code': f"region-{i}", 'name': f"Region {i}"} for i in range(100)]
+    monkeypatch.setattr(product_view, 'list_ec2_regions', lambda: regions)
+    bundle = get_static_registry().get('swagger-ui-bundle.js').content
+    assert len(bundle) > 1024 * 1024
+
+    status, _, body = api_gateway_request('GET', '/instance/regions', headers)
+    assert (status, json.loads(body)) == (200, regions)
+
+    status, _, body = api_gateway_request('GET', '/swagger/bundle', headers)
+    assert (status, body) == (200, bundle)
+
+    status, response_headers, body = api_gateway_request('GET', '/js/main', headers)
+    assert status == 200
+    assert response_headers['content-type'].startswith('application/javascript')
+    assert body.decode('utf-8') == optimize_js_cached(
+        get_static_registry().get('main.js').content.decode('utf-8'),
+        get_static_registry().get('main.js').digest
+    )
+
+
+def test_api_gateway_decodes_request_bodies(monkeypatch):
+    pclient = SimpleNamespace(get_product_instances=lambda items: {'results': [], 'errors': [], 'count': len(items)})
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: pclient)
+
+    status, _, body = api_gateway_request(
+        'POST', '/product/instances', {'Content-Type': 'application/json'},
+        body=json.dumps([{'region': 'us-east-1'}]).encode('utf-8')
+    )
+
+    assert (status, json.loads(body)['count']) == (200, 1)
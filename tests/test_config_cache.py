@@ -0,0 +1,82 @@
+from chalicelib.config_cache import ConfigCache, set_config_cache
+from chalicelib.sdk import EC2Client
+from tests.test_sdk import FakeEC2
+from types import SimpleNamespace
+import pytest
+
+
+class FakeConfigTable:
+    """In-memory stand-in for the app table, recording the reads it serves"""
+    def __init__(self, items):
+        self.name = 'quicklook-test'
+        self.items = {item['name']: item for item in items}
+        self.calls = []
+        self.meta = SimpleNamespace(client=SimpleNamespace(batch_get_item=self.batch_get_item))
+
+    def batch_get_item(self, RequestItems):
+        request = RequestItems[self.name]
+        self.calls.append(('batch', len(request['Keys'])))
+        found = [dict(self.items[k['name']]) for k in request['Keys'] if k['name'] in self.items]
+        return {'Responses': {self.name: found}, 'UnprocessedKeys': {}}
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, ConsistentRead=False):
+        item = self.items.get(Key['name'])
+        if ProjectionExpression:
+            self.calls.append(('version', ConsistentRead))
+            return {'Item': {'version': item['version']}} if item else {}
+        self.calls.append(('full', ConsistentRead))
+        return {'Item': dict(item)} if item else {}
+
+
+def make_table():
+    return FakeConfigTable([
+        {'name': 'regions', 'version': '2025.01', 'config': {'us-east-1': 'N. Virginia'}},
+        {'name': 'operation', 'version': '2025.01', 'config': [{'operation': 'RunInstances'}]},
+        {'name': 'instance', 'version': '2025.01', 'config': []},
+    ])
+
+
+def test_warm_loads_all_configs_in_one_batch():
+    table = make_table()
+    cache = ConfigCache(table, check_interval=60)
+
+    assert cache.get('regions') == {'us-east-1': 'N. Virginia'}
+    assert cache.get('operation') == [{'operation': 'RunInstances'}]
+    assert cache.get('instance') == []
+    assert table.calls == [('batch', 3)]
+
+
+def test_revalidates_by_version():
+    table = make_table()
+    cache = ConfigCache(table, check_interval=60)
+    cache.get('regions')
+    cache.check_interval = 0
+
+    # Unchanged version: a projected, eventually consistent read only
+    assert cache.get('regions') == {'us-east-1': 'N. Virginia'}
+    assert table.calls[1:] == [('version', False)]
+
+    table.items['regions'] = {'name': 'regions', 'version': '2025.02', 'config': {'eu-west-1': 'Ireland'}}
+    assert cache.get('regions') == {'eu-west-1': 'Ireland'}
+    assert table.calls[2:] == [('version', False), ('full', True)]
+
+
+def test_missing_config_raises():
+    cache = ConfigCache(make_table(), check_interval=60)
+    with pytest.raises(KeyError):
+        cache.get('unknown')
+
+
+def test_operations_follow_config_version():
+    table = make_table()
+    cache = ConfigCache(table, check_interval=60)
+    set_config_cache(cache)
+    try:
+        eclient = EC2Client(FakeEC2(delay=0))
+        assert eclient.list_usage_operations() == [{'operation': 'RunInstances'}]
+
+        table.items['operation'] = {'name': 'operation', 'version': '2025.02', 'config': [{'operation': 'RunInstances:0002'}]}
+        cache.check_interval = 0
+        assert eclient.list_usage_operations() == [{'operation': 'RunInstances:0002'}]
+    finally:
+        set_config_cache(None)
@@ -0,0 +1,36 @@
+from chalicelib.fanout import fan_out
+import threading
+import time
+
+
+def test_fan_out_keeps_order_and_errors():
+    def square(n):
+        if n == 3:
+            raise ValueError('bad item')
+        time.sleep(0.01 * (5 - n))
+        return n * n
+
+    results = fan_out(square, [1, 2, 3, 4], max_workers=4)
+
+    assert [(item, result) for item, result, _ in results] == [(1, 1), (2, 4), (3, None), (4, 16)]
+    assert isinstance(results[2][2], ValueError)
+
+
+def test_fan_out_times_out_slow_items():
+    start = time.monotonic()
+    results = fan_out(lambda n: time.sleep(n) or n, [0, 2, 0], max_workers=3, timeout=0.2)
+
+    assert time.monotonic() - start < 1
+    assert [r[1] for r in results] == [0, None, 0]
+    assert isinstance(results[1][2], TimeoutError)
+
+
+def test_fan_out_deadline_covers_queued_items():
+    release = threading.Event()
+    start = time.monotonic()
+    # Both workers hang, so the last two items never get a worker
+    results = fan_out(lambda n: release.wait(5) or n, [1, 2, 3, 4], max_workers=2, timeout=10, deadline=0.3)
+    release.set()
+
+    assert time.monotonic() - start < 1
+    assert all(isinstance(error, TimeoutError) for _, _, error in results)
@@ -1,4 +1,4 @@
-from chalicelib.file import find_file, get_static_file
+from chalicelib.file import find_file, get_static_file, get_static_registry, split_fingerprint
 import pytest
 import os
 
@@ -37,3 +37,57 @@ def test_read_file_empty():
     with pytest.raises(ValueError):
         get_static_file(file_name="empty_file.json", search_from_base_path=os.getcwd())
         # print(target_content)
+
+
+def test_static_registry_index():
+    registry = get_static_registry()
+
+    asset = registry.get("main.js")
+    assert asset is registry.get("js/main.js")
+    assert asset.mime_type == "application/javascript"
+    with open(find_file("main.js"), "rb") as f:
+        assert asset.content == f.read()
+    with pytest.raises(FileNotFoundError):
+        registry.get("file_not_exist")
+
+
+def test_split_fingerprint():
+    assert split_fingerprint("main.0123456789ab") == ("main", "0123456789ab")
+    assert split_fingerprint("main") == ("main", None)
+    assert split_fingerprint("bootstrap.min") == ("bootstrap.min", None)
+
+
+def test_fingerprinted_css_is_immutable():
+    from app import app
+    from chalice.test import Client
+
+    fingerprint = get_static_registry().fingerprint("custom.css")
+    with Client(app) as client:
+        headers = {"Accept": "text/css,*/*;q=0.1"}
+        pinned = client.http.get(f"/css/custom.{fingerprint}", headers=headers)
+        plain = client.http.get("/css/custom", headers=headers)
+        cached = client.http.get("/css/custom", headers={**headers, "If-None-Match": plain.headers["ETag"]})
+
+    assert pinned.status_code == 200
+    assert "immutable" in pinned.headers["Cache-Control"]
+    assert plain.headers["Cache-Control"] == "public, max-age=86400"
+    assert plain.body == get_static_registry().get("custom.css").content
+    assert cached.status_code == 304
+
+
+def test_optimized_js_computed_once(monkeypatch):
+    from chalicelib import utils
+
+    calls = []
+    original = utils.optimize_js
+    monkeypatch.setattr(utils, "optimize_js", lambda content: calls.append(content) or original(content))
+    monkeypatch.setattr(utils, "_OPTIMIZED_JS", {})
+    asset = get_static_registry().get("detail.js")
+    content = asset.content.decode("utf-8")
+
+    first = utils.optimize_js_cached(content, asset.digest)
+    second = utils.optimize_js_cached(content, asset.digest)
+
+    assert first is second
+    assert first == original(content)
+    assert len(calls) == 1
@@ -0,0 +1,158 @@
+from chalicelib.pricelist import OfferReader, PriceIndex, build_price_index, iter_offer
+from chalicelib.sdk import PricingClient
+import io
+import os
+import json
+import tracemalloc
+import pytest
+
+
+OFFER_FILE = os.path.join(os.path.dirname(__file__), 'test_data', 'offer_ec2_sample.json')
+
+
+class OfflinePricing:
+    """boto3 pricing stand-in that fails on any network call"""
+    def __getattr__(self, name):
+        raise AssertionError(f"Unexpected Pricing API call: {name}")
+
+
+@pytest.fixture
+def price_index(tmp_path):
+    index_path = str(tmp_path / 'price-index.db')
+    build_price_index(OFFER_FILE, index_path, regions=['us-east-1'])
+    return PriceIndex(index_path)
+
+
+def test_build_price_index_filters_regions_and_locations(tmp_path):
+    index_path = str(tmp_path / 'price-index.db')
+    result = build_price_index(OFFER_FILE, index_path, regions=['us-east-1'])
+    # Local Zone, other region and non-compute products are left out
+    assert (result['instances'], result['volumes']) == (3, 1)
+    assert result['rows'] == 14
+    assert result['peakRssMb'] > 0
+
+    # Indexing another region keeps the rows already present
+    result = build_price_index(OFFER_FILE, index_path, regions=['ap-southeast-1'])
+    assert (result['instances'], result['volumes']) == (1, 0)
+    index = PriceIndex(index_path)
+    assert index.lookup_instance('us-east-1', 'm7g.large', 'RunInstances', capacitystatus='Used')
+    assert index.lookup_instance('ap-southeast-1', 'm7g.2xlarge', 'RunInstances')
+    assert index.meta()['publicationDate'] == '2024-10-18T20:13:15Z'
+
+
+def test_lookup_instance(price_index):
+    record = price_index.lookup_instance('us-east-1', 'm7g.2xlarge', 'RunInstances')
+    assert record['sku'] == '22DKQ7CJBZNQPNCE'
+    assert record['attributes']['normalizationSizeFactor'] == '16'
+    assert record['term']['offerTermCode'] == 'JRTCKXETXF'
+    assert price_index.lookup_instance('us-east-1', 'm7g.2xlarge', 'RunInstances', tenancy='Dedicated') is None
+
+
+def test_pricing_client_answers_from_index(price_index):
+    pclient = PricingClient(OfflinePricing(), price_index=price_index)
+
+    instance = pclient.get_product_instance(
+        {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+    )
+    volume = pclient.get_product_volume({'region': 'us-east-1', 'type': 'gp3', 'size': '100'})
+
+    assert instance['productMeta']['instancesku'] == 'QG5G45WKDWDDHTFV'
+    assert instance['listPrice']['pricePerUnit']['value'] == pytest.approx(0.3264 * 730)
+    assert volume['listPrice']['pricePerUnit']['value'] == pytest.approx(0.08 * 100)
+
+
+def test_offer_reader_matches_json_load():
+    with open(OFFER_FILE, encoding='utf-8') as f:
+        offer = json.load(f)
+    with open(OFFER_FILE, encoding='utf-8') as f:
+        # A tiny chunk size forces records to straddle chunk boundaries
+        records = list(OfferReader(f, chunk_size=7).records(term_types=('OnDemand', 'Reserved')))
+
+    products = {r.key: r.data for r in records if r.kind == 'product'}
+    reserved = {r.key: r.data for r in records if r.kind == 'term' and r.term_type == 'Reserved'}
+    meta = {r.key: r.data for r in records if r.kind == 'meta'}
+    assert products == offer['products']
+    assert reserved == offer['terms']['Reserved']
+    assert meta['version'] == offer['version']
+
+
+def test_iter_offer_filters_products():
+    records = list(iter_offer(OFFER_FILE, {
+        'productFamily': 'Compute Instance',
+        'locationType': 'AWS Region',
+        'regionCode': 'us-east-1',
+        'instanceType': 'm7g.2xlarge',
+        'operation': 'RunInstances',
+        'tenancy': 'Shared',
+        'capacitystatus': {'Used'},
+        'marketoption': 'OnDemand',
+    }))
+    assert [r.key for r in records if r.kind == 'product'] == ['3UVM4VHXG4TCHGKC']
+
+
+def test_terms_before_products(tmp_path):
+    with open(OFFER_FILE, encoding='utf-8') as f:
+        offer = json.load(f)
+    reordered = {'terms': offer['terms'], 'products': offer['products'], 'version': offer['version']}
+    offer_path = tmp_path / 'offer.json'
+    offer_path.write_text(json.dumps(reordered))
+
+    result = build_price_index(str(offer_path), str(tmp_path / 'index.db'), regions=['us-east-1'])
+    assert (result['instances'], result['volumes']) == (3, 1)
+
+
+def synthetic_offer(count):
+    """Build an offer file body with `count` products and OnDemand terms"""
+    with open(OFFER_FILE, encoding='utf-8') as f:
+        offer = json.load(f)
+    product = offer['products']['22DKQ7CJBZNQPNCE']
+    term = offer['terms']['OnDemand']['22DKQ7CJBZNQPNCE']
+    products = {f"SKU{i:08d}": dict(product, sku=f"SKU{i:08d}") for i in range(count)}
+    terms = {f"SKU{i:08d}": term for i in range(count)}
+    return json.dumps({'version': '1', 'products': products, 'terms': {'OnDemand': terms}}, indent=4)
+
+
+def peak_stream_memory(body):
+    fileobj = io.StringIO(body)
+    tracemalloc.start()
+    try:
+        reader = OfferReader(fileobj, chunk_size=16 * 1024)
+        for _ in reader.records():
+            pass
+        return reader.stats.rows, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_offer_reader_memory_is_flat():
+    small, large = synthetic_offer(200), synthetic_offer(4000)
+    small_rows, small_peak = peak_stream_memory(small)
+    large_rows, large_peak = peak_stream_memory(large)
+
+    assert (small_rows, large_rows) == (400, 8000)
+    # 20x the rows must not mean 20x the memory
+    assert large_peak < small_peak * 2
+
+
+def peak_build_memory(body, tmp_path):
+    offer_path = tmp_path / 'offer.json'
+    offer_path.write_text(body)
+    index_path = tmp_path / 'index.db'
+    if index_path.exists():
+        index_path.unlink()
+    tracemalloc.start()
+    try:
+        result = build_price_index(str(offer_path), str(index_path))
+        return result['rows'], tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_build_price_index_memory_is_flat(tmp_path):
+    # Both files are larger than a read chunk, which bounds the parser's share
+    small_rows, small_peak = peak_build_memory(synthetic_offer(1000), tmp_path)
+    large_rows, large_peak = peak_build_memory(synthetic_offer(4000), tmp_path)
+
+    assert (small_rows, large_rows) == (2000, 8000)
+    # Products wait for their terms in SQLite, not in Python objects
+    assert large_peak < small_peak * 1.5
@@ -0,0 +1,186 @@
+from app import app
+from chalice.test import Client
+from chalicelib.responses import encode_json, etag_matches, json_response
+from chalicelib import responses
+from chalicelib.cache import TTLCache
+from chalicelib.sdk import EC2Client, PricingClient
+from chalicelib.product import view as product_view
+from types import SimpleNamespace
+from tests.test_sdk import FakeEC2, FakePricing, load_price_item
+import json
+
+
+def make_request(if_none_match=None):
+    return SimpleNamespace(headers={'if-none-match': if_none_match} if if_none_match else {})
+
+
+def test_encode_json_memoized_by_identity():
+    body = {'instanceType': 'm7g.large'}
+
+    payload, etag = encode_json(body, cached=True)
+
+    assert json.loads(payload) == body
+    assert encode_json(body, cached=True) == (payload, etag)
+    assert encode_json(body, cached=True)[0] is payload
+    # Equal content gives the same strong ETag
+    assert encode_json(dict(body))[1] == etag
+
+
+def test_encode_json_skips_bodies_built_per_request():
+    body = {'instanceType': 'm7g.xlarge'}
+    before = len(responses._ENCODED_BODIES)
+
+    assert encode_json(body) == encode_json(body)
+    assert len(responses._ENCODED_BODIES) == before
+
+
+
+def test_encoding_released_with_cached_body(monkeypatch):
+    monkeypatch.setattr(responses, '_ENCODED_BODIES', TTLCache(ttl=60))
+    cache = TTLCache(ttl=60, maxsize=1)
+    old, new = {'version': 1}, {'version': 2}
+    cache.set('k', old)
+    encode_json(old, cached=True)
+    assert len(responses._ENCODED_BODIES) == 1
+
+    # A refresh replaces the cached body, its encoding can never hit again
+    cache.set('k', new)
+    assert len(responses._ENCODED_BODIES) == 0
+
+    encode_json(new, cached=True)
+    cache.set('other', object())  # LRU eviction
+    assert len(responses._ENCODED_BODIES) == 0
+
+def test_product_route_reuses_encoding(monkeypatch):
+    pclient = PricingClient(FakePricing([load_price_item('price_list_instance.json')], delay=0))
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: pclient)
+    monkeypatch.setattr(responses, '_ENCODED_BODIES', TTLCache(ttl=60))
+
+    with Client(app) as client:
+        path = '/product/instance?region=us-east-1&typesize=m7g.2xlarge&op=RunInstances'
+        bodies = [client.http.get(path).body for _ in range(5)]
+
+    assert len(set(bodies)) == 1
+    # One serialization, reused by the four requests after it
+    assert len(responses._ENCODED_BODIES) == 1
+    assert responses._ENCODED_BODIES.info().hits == 4
+
+
+def test_etag_matches():
+    etag = encode_json(['a'])[1]
+
+    assert etag_matches(make_request(etag), etag)
+    assert etag_matches(make_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(make_request('*'), etag)
+    assert not etag_matches(make_request('"other"'), etag)
+    assert not etag_matches(make_request(), etag)
+
+
+def test_json_response_not_modified():
+    headers = {'Cache-Control': 'public, max-age=60', 'Content-Type': 'application/json'}
+    full = json_response([1, 2], headers, make_request())
+    etag = full.headers['ETag']
+
+    resp = json_response([1, 2], headers, make_request(etag))
+
+    assert full.status_code == 200
+    assert resp.status_code == 304
+    assert resp.body == ''
+    assert resp.headers['ETag'] == etag
+    assert resp.headers['Cache-Control'] == 'public, max-age=60'
+
+
+def test_instance_route_conditional_get(monkeypatch):
+    eclient = EC2Client(FakeEC2(delay=0))
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: eclient)
+
+    with Client(app) as client:
+        path = '/instance/sizes?region=us-east-1&arch=arm64&family=m7g'
+        first = client.http.get(path)
+        etag = first.headers['ETag']
+        second = client.http.get(path, headers={'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert [s['instanceType'] for s in json.loads(first.body)] == ['m7g.2xlarge', 'm7g.large']
+    assert second.status_code == 304
+    assert second.body == b''
+
+
+
+def test_detail_route_served_from_sizes_pages(monkeypatch):
+    fake = FakeEC2(delay=0)
+    eclient = EC2Client(fake)
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: eclient)
+
+    with Client(app) as client:
+        client.http.get('/instance/sizes?region=us-east-1&arch=arm64&family=m7g')
+        # The route calls get_instance_detail with keyword arguments
+        detail = client.http.get('/instance/detail?region=us-east-1&type=m7g.large')
+
+    assert detail.status_code == 200
+    assert fake.describe_batches == []
+
+
+
+def test_details_route_rejects_missing_types(monkeypatch):
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: EC2Client(FakeEC2(delay=0)))
+
+    with Client(app) as client:
+        empty = client.http.get('/instance/details?region=us-east-1&types=,')
+        missing = client.http.get('/instance/details?region=us-east-1')
+
+    assert (empty.status_code, missing.status_code) == (400, 400)
+
+
+
+def test_compare_route_separates_client_and_internal_errors(monkeypatch):
+    def broken(params, regions):
+        raise KeyError('location')
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: SimpleNamespace(compare_instance_regions=broken))
+    monkeypatch.setattr(product_view, 'list_ec2_regions', lambda: [{'code': 'us-east-1', 'name': 'N. Virginia'}])
+
+    with Client(app) as client:
+        missing = client.http.get('/product/instance/regions?typesize=m7g.large')
+        internal = client.http.get('/product/instance/regions?typesize=m7g.large&op=RunInstances')
+
+    assert missing.status_code == 400
+    assert b'op' in missing.body
+    # A bug in the lookup is not blamed on the query
+    assert internal.status_code == 500
+
+
+class BootstrapEC2:
+    def __init__(self):
+        self.calls = 0
+
+    def list_usage_operations(self):
+        self.calls += 1
+        return [{'operation': 'RunInstances', 'platform': 'Linux/UNIX'}]
+
+    def list_instance_categories(self):
+        self.calls += 1
+        return ['General purpose']
+
+
+def test_bootstrap_route_single_document(monkeypatch):
+    eclient = BootstrapEC2()
+    pclient = SimpleNamespace(get_attribute_values=lambda **kw: {'count': 2, 'data': ['gp3', 'st1']})
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: eclient)
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: pclient)
+    monkeypatch.setattr(product_view, 'list_ec2_regions', lambda: [{'code': 'us-east-1', 'name': 'N. Virginia'}])
+
+    with Client(app) as client:
+        first = client.http.get('/instance/bootstrap')
+        etag = first.headers['ETag']
+        second = client.http.get('/instance/bootstrap', headers={'If-None-Match': etag})
+
+    assert first.status_code == 200
+    assert json.loads(first.body) == {
+        'regions': [{'code': 'us-east-1', 'name': 'N. Virginia'}],
+        'operations': [{'operation': 'RunInstances', 'platform': 'Linux/UNIX'}],
+        'voltypes': ['gp3'],
+        'categories': ['General purpose']
+    }
+    assert second.status_code == 304
+    # The document is assembled once and then served from cache
+    assert eclient.calls == 2
@@ -0,0 +1,287 @@
+from chalicelib.sdk import EC2Client, PricingClient, PriceItem
+from chalicelib import sdk
+from chalicelib.models import PricingServiceError
+from chalicelib.throttle import RetryController, TokenBucket
+from botocore.exceptions import ClientError
+from types import SimpleNamespace
+import threading
+import json
+import time
+import os
+import pytest
+
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), 'test_data')
+CONCURRENCY = 16
+
+
+def load_price_item(name):
+    with open(os.path.join(TEST_DATA, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class FakePricing:
+    """Minimal stand-in for the boto3 pricing client"""
+    def __init__(self, price_list, delay=0.1, error=None):
+        self.price_list = price_list
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_products(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {'PriceList': self.price_list}
+
+
+class FakePaginator:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def paginate(self, **kwargs):
+        with self.owner._lock:
+            self.owner.calls += 1
+        time.sleep(self.owner.delay)
+        return [{'InstanceTypes': [
+            {'InstanceType': t, 'VCpuInfo': {'DefaultVCpus': 2}, 'ProcessorInfo': {'SupportedArchitectures': ['arm64']}}
+            for t in ('m7g.large', 'm7g.2xlarge')
+        ]}]
+
+
+class FakeEC2:
+    """Minimal stand-in for the boto3 ec2 client"""
+    def __init__(self, region='us-east-1', delay=0.1, known_types=None):
+        self._client_config = SimpleNamespace(region_name=region)
+        self.delay = delay
+        self.calls = 0
+        self.describe_batches = []
+        self.known_types = known_types
+        self._lock = threading.Lock()
+
+    def get_paginator(self, name):
+        return FakePaginator(self)
+
+    def describe_instance_types(self, InstanceTypes):
+        self.describe_batches.append(list(InstanceTypes))
+        unknown = [t for t in InstanceTypes if self.known_types is not None and t not in self.known_types]
+        if unknown:
+            raise ClientError(
+                {'Error': {'Code': 'InvalidInstanceType', 'Message': f"Invalid: {unknown}"}},
+                'DescribeInstanceTypes'
+            )
+        return {'InstanceTypes': [{'InstanceType': t, 'VCpuInfo': {'DefaultVCpus': 2}} for t in InstanceTypes]}
+
+
+def run_concurrently(func, count=CONCURRENCY):
+    results, errors = [], []
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(func())
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_product_instance_single_upstream_call():
+    fake = FakePricing([load_price_item('price_list_instance.json')])
+    pclient = PricingClient(fake)
+    params = {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+
+    results, errors = run_concurrently(lambda: pclient.get_product_instance(params))
+
+    assert not errors
+    assert len(results) == CONCURRENCY
+    assert fake.calls == 1
+    assert all(r['listPrice']['pricePerUnit']['value'] == pytest.approx(0.3264 * 730) for r in results)
+
+
+def test_concurrent_product_instance_shares_error():
+    fake = FakePricing([], error=RuntimeError('ThrottlingException'))
+    pclient = PricingClient(fake)
+    params = {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+
+    results, errors = run_concurrently(lambda: pclient.get_product_instance(params))
+
+    assert not results
+    assert len(errors) == CONCURRENCY
+    assert all(isinstance(e, PricingServiceError) for e in errors)
+    assert fake.calls == 1
+
+
+def test_concurrent_instance_sizes_single_upstream_call():
+    fake = FakeEC2()
+    eclient = EC2Client(fake)
+
+    results, errors = run_concurrently(lambda: eclient.get_instance_sizes('arm64', 'm7g'))
+
+    assert not errors
+    assert fake.calls == 1
+    assert all(r == results[0] for r in results)
+    assert [r['instanceType'] for r in results[0]] == ['m7g.2xlarge', 'm7g.large']
+
+
+def test_product_instance_cached_by_canonical_key():
+    fake = FakePricing([load_price_item('price_list_instance.json')], delay=0)
+    pclient = PricingClient(fake)
+
+    first = pclient.get_product_instance(
+        {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+    )
+    second = pclient.get_product_instance(
+        {'region': ' US-EAST-1', 'typesize': 'M7G.2xlarge', 'op': 'RunInstances',
+         'option': 'OnDemand', 'tenancy': 'shared'}
+    )
+
+    assert fake.calls == 1
+    assert first == second
+    assert first['listPrice']['unit'] == 'Month'
+
+
+def test_product_volume_sizes_share_entry():
+    fake = FakePricing([load_price_item('price_list_volume.json')], delay=0)
+    pclient = PricingClient(fake)
+
+    small = pclient.get_product_volume({'region': 'us-east-1', 'type': 'gp3', 'size': '10'})
+    large = pclient.get_product_volume({'region': 'us-east-1', 'type': 'gp3', 'size': '500'})
+
+    assert fake.calls == 1
+    assert small['listPrice']['pricePerUnit']['value'] == pytest.approx(0.08 * 10)
+    assert large['listPrice']['pricePerUnit']['value'] == pytest.approx(0.08 * 500)
+    # The cached per-unit price is left untouched by reads
+    assert pclient.get_product_volume(
+        {'region': 'us-east-1', 'type': 'gp3', 'size': '1'}
+    )['listPrice']['pricePerUnit']['value'] == pytest.approx(0.08)
+
+
+@pytest.mark.parametrize('backend', ['json', sdk.JSON_BACKEND])
+def test_price_item_extract(monkeypatch, backend):
+    monkeypatch.setattr(sdk, 'JSON_BACKEND', backend)
+    raw = load_price_item('price_list_instance.json')
+    document = json.loads(raw)
+
+    record = PriceItem(raw).extract('OnDemand')
+
+    assert record['attributes'] == document['product']['attributes']
+    assert record['term'] == next(iter(document['terms']['OnDemand'].values()))
+    assert PriceItem(raw).term('Reserved') is None
+
+
+def test_instance_details_batched_and_cached():
+    fake = FakeEC2(delay=0)
+    eclient = EC2Client(fake)
+    eclient.get_instance_detail('m5.large')
+    fake.describe_batches.clear()
+
+    types = ['m5.large'] + [f"c5.{i}xlarge" for i in range(150)]
+    details = eclient.get_instance_details(types + ['m5.large'])
+
+    assert list(details) == types
+    # The cached type is not fetched again, the rest is split at 100 per call
+    assert [len(b) for b in fake.describe_batches] == [100, 50]
+    fake.describe_batches.clear()
+    assert eclient.get_instance_detail('c5.7xlarge') == details['c5.7xlarge']
+    assert fake.describe_batches == []
+
+
+def test_instance_details_skip_unknown_types():
+    fake = FakeEC2(delay=0, known_types={'m5.large', 't3.micro'})
+    eclient = EC2Client(fake)
+
+    details = eclient.get_instance_details(['m5.large', 'x9.bogus', 't3.micro'])
+
+    assert list(details) == ['m5.large', 't3.micro']
+
+
+def test_instance_sizes_populate_detail_cache():
+    fake = FakeEC2(delay=0)
+    eclient = EC2Client(fake)
+    eclient.get_instance_sizes(architecture='arm64', instance_type='m7g')
+
+    detail = eclient.get_instance_detail('m7g.2xlarge')
+
+    assert detail['VCpuInfo'] == {'DefaultVCpus': 2}
+    assert fake.describe_batches == []
+    assert eclient.get_instance_detail('m7g.large')['InstanceType'] == 'm7g.large'
+    assert fake.describe_batches == []
+
+
+def test_product_instances_dedupes_and_reports_errors():
+    fake = FakePricing([load_price_item('price_list_instance.json')], delay=0)
+    pclient = PricingClient(fake)
+    params = {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+
+    resp = pclient.get_product_instances([
+        params,
+        {'region': 'US-EAST-1', 'typesize': 'M7G.2XLARGE', 'op': 'RunInstances', 'tenancy': 'shared'},
+        {'region': 'us-east-1', 'op': 'RunInstances'},
+    ])
+
+    assert fake.calls == 1
+    assert len(resp['results']) == 1
+    assert resp['results'][0]['request']['typesize'] == 'm7g.2xlarge'
+    assert resp['results'][0]['product']['listPrice']['pricePerUnit']['value'] == pytest.approx(0.3264 * 730)
+    assert [e['code'] for e in resp['errors']] == ['INVALID_PARAMS']
+
+
+def test_product_instances_share_rate_limit():
+    fake = FakePricing([load_price_item('price_list_instance.json')], delay=0)
+    limiter = TokenBucket(rate=100, burst=1)
+    pclient = PricingClient(fake, retry=RetryController(limiter))
+    items = [{'region': 'us-east-1', 'typesize': f"m7g.{i}xlarge", 'op': 'RunInstances'} for i in range(10)]
+
+    resp = pclient.get_product_instances(items, max_workers=10)
+
+    assert len(resp['results']) == 10
+    assert limiter.acquired == 10
+    assert limiter.wait_time >= 0.08
+
+
+class RegionalPricing(FakePricing):
+    """Pricing stand-in with a price per region and optional slow or missing regions"""
+    def __init__(self, prices, slow=()):
+        super().__init__([], delay=0)
+        self.document = json.loads(load_price_item('price_list_instance.json'))
+        self.prices = prices
+        self.slow = slow
+
+    def get_products(self, **kwargs):
+        region = next(f['Value'] for f in kwargs['Filters'] if f['Field'] == 'RegionCode')
+        if region in self.slow:
+            time.sleep(0.6)
+        if region not in self.prices:
+            return {'PriceList': []}
+        document = json.loads(json.dumps(self.document))
+        document['product']['attributes']['regionCode'] = region
+        term = next(iter(document['terms']['OnDemand'].values()))
+        next(iter(term['priceDimensions'].values()))['pricePerUnit'] = {'USD': str(self.prices[region])}
+        return {'PriceList': [json.dumps(document)]}
+
+
+def test_compare_instance_regions_sorted_with_partial_results():
+    fake = RegionalPricing({'us-east-1': 0.3, 'eu-west-1': 0.2, 'ap-south-1': 0.25, 'sa-east-1': 0.4}, slow={'sa-east-1'})
+    pclient = PricingClient(fake)
+    params = {'region': '', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+    regions = ['us-east-1', 'eu-west-1', 'ap-south-1', 'me-central-1', 'sa-east-1']
+
+    resp = pclient.compare_instance_regions(params, regions, max_workers=5, timeout=0.3)
+
+    assert [r['regionCode'] for r in resp['results']] == ['eu-west-1', 'ap-south-1', 'us-east-1']
+    assert resp['results'][0]['pricePerUnit']['value'] == pytest.approx(0.2 * 730)
+    assert {e['regionCode']: e['code'] for e in resp['errors']}['sa-east-1'] == 'TIMEOUT'
+    assert {e['regionCode'] for e in resp['errors']} == {'me-central-1', 'sa-east-1'}
+    # The comparison shares cache entries with single-region lookups
+    assert pclient.get_product_instance({**params, 'region': 'eu-west-1'}) is not None
+    assert PricingClient._load_product_instance.cache_info().hits == 1
@@ -0,0 +1,188 @@
+from app import app
+from chalice.test import Client
+from chalicelib.sdk import EC2Client
+from chalicelib.search import InstanceCatalog, parse_network, parse_range, parse_search_query
+from chalicelib.product import view as product_view
+from types import SimpleNamespace
+import json
+import pytest
+
+
+def instance(name, vcpus, memory_gib, network, arch='x86_64', nvme=None, gpus=0):
+    record = {
+        'InstanceType': name,
+        'VCpuInfo': {'DefaultVCpus': vcpus},
+        'MemoryInfo': {'SizeInMiB': memory_gib * 1024},
+        'NetworkInfo': {'NetworkPerformance': network},
+        'ProcessorInfo': {'SupportedArchitectures': [arch]},
+    }
+    if nvme:
+        record['InstanceStorageInfo'] = {'TotalSizeInGB': 950, 'NvmeSupport': nvme}
+    if gpus:
+        record['GpuInfo'] = {'Gpus': [{'Name': 'T4', 'Count': gpus}]}
+    return record
+
+
+INSTANCES = [
+    instance('m7g.large', 2, 8, 'Up to 12.5 Gigabit', 'arm64'),
+    instance('m7g.4xlarge', 16, 64, 'Up to 15 Gigabit', 'arm64'),
+    instance('m7gd.8xlarge', 32, 128, '15 Gigabit', 'arm64', nvme='required'),
+    instance('c7gn.4xlarge', 16, 32, '50 Gigabit', 'arm64'),
+    instance('r7gd.4xlarge', 16, 128, 'Up to 30 Gigabit', 'arm64', nvme='required'),
+    instance('m7gd.4xlarge', 16, 64, 'Up to 25 Gigabit', 'arm64', nvme='required'),
+    instance('m7i.4xlarge', 16, 64, 'Up to 12.5 Gigabit'),
+    instance('g4dn.4xlarge', 16, 64, 'Up to 25 Gigabit', nvme='required', gpus=1),
+    instance('p5.48xlarge', 192, 2048, '32x 100 Gigabit', nvme='required', gpus=8),
+]
+
+
+def test_parse_helpers():
+    assert parse_range('16') == (16, 16)
+    assert parse_range('16-') == (16, None)
+    assert parse_range('-64') == (None, 64)
+    assert parse_range('0.5-2') == (0.5, 2)
+    with pytest.raises(ValueError):
+        parse_range('64-16')
+    assert parse_network({'NetworkPerformance': '32x 100 Gigabit'}) == 3200
+    assert parse_network({'NetworkPerformance': 'Moderate'}) == 0
+    assert parse_network({'NetworkCards': [{'PeakBandwidthInGbps': 25.0}], 'NetworkPerformance': 'Up to 25 Gigabit'}) == 25
+    with pytest.raises(ValueError):
+        parse_search_query({'arch': 'sparc'})
+
+
+def test_search_predicates_sort_and_limit():
+    catalog = InstanceCatalog(INSTANCES)
+
+    # >=16 vCPU, >=64 GiB, arm64, >=25 Gbps, NVMe instance store
+    found = catalog.search(**parse_search_query({
+        'vcpus': '16-', 'memory': '64-', 'arch': 'arm64', 'network': '25-', 'nvme': 'true'
+    }))
+    assert [r['instanceType'] for r in found['results']] == ['m7gd.4xlarge', 'r7gd.4xlarge']
+    assert found['count'] == 2
+
+    top = catalog.search(ranges={'vcpus': (16, 16)}, sort='-memory', limit=2)
+    assert top['count'] == 6
+    # r7gd has the most memory, then the four 64 GiB types tie and sort by name
+    assert [r['instanceType'] for r in top['results']] == ['r7gd.4xlarge', 'g4dn.4xlarge']
+
+    gpus = catalog.search(ranges={'gpus': (1, None)}, families=['p5', 'g4dn'], sort='-gpus')
+    assert [r['instanceType'] for r in gpus['results']] == ['p5.48xlarge', 'g4dn.4xlarge']
+
+
+def test_search_route(monkeypatch):
+    fake = SimpleNamespace(
+        _client_config=SimpleNamespace(region_name='us-west-2'),
+        get_paginator=lambda name: SimpleNamespace(paginate=lambda **kw: [{'InstanceTypes': INSTANCES}])
+    )
+    eclient = EC2Client(fake)
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: eclient)
+
+    with Client(app) as client:
+        ok = client.http.get('/instance/search?region=us-west-2&vcpus=16-&arch=arm64&sort=-network&limit=1')
+        bad = client.http.get('/instance/search?region=us-west-2&sort=price')
+
+    assert ok.status_code == 200
+    body = json.loads(ok.body)
+    assert body['count'] == 5
+    assert body['results'][0]['instanceType'] == 'c7gn.4xlarge'
+    assert bad.status_code == 400
+
+
+def price_document(instance_type, hourly, factor='8'):
+    return json.dumps({
+        'product': {'attributes': {'instanceType': instance_type, 'normalizationSizeFactor': factor}},
+        'terms': {'OnDemand': {'SKU.TERM': {
+            'effectiveDate': '2025-01-01T00:00:00Z',
+            'priceDimensions': {'SKU.TERM.DIM': {'unit': 'Hrs', 'pricePerUnit': {'USD': str(hourly)}}}
+        }}}
+    })
+
+
+HOURLY = {
+    'm7g.4xlarge': 0.6528, 'm7gd.8xlarge': 1.7086, 'c7gn.4xlarge': 0.9984,
+    'r7gd.4xlarge': 1.0886, 'm7gd.4xlarge': 0.8543, 'm7i.4xlarge': 0.8064,
+}
+
+
+class PagedPricing:
+    """Pricing client serving the price documents two per page"""
+    def __init__(self):
+        self.pages = []
+
+    def get_products(self, **kwargs):
+        self.pages.append(kwargs.get('NextToken'))
+        docs = [price_document(t, p) for t, p in HOURLY.items()]
+        start = int(kwargs.get('NextToken') or 0)
+        result = {'PriceList': docs[start:start + 2]}
+        if start + 2 < len(docs):
+            result['NextToken'] = str(start + 2)
+        return result
+
+
+def test_price_table_paginates_once():
+    from chalicelib.sdk import PricingClient
+    boto_client = PagedPricing()
+    pclient = PricingClient(boto_client)
+
+    table = pclient.get_instance_price_table('us-east-1', 'RunInstances', 'OnDemand', 'Shared')
+
+    assert boto_client.pages == [None, '2', '4']
+    assert table['currency'] == 'USD'
+    assert table['hourly'] == HOURLY
+    assert table['normalizationSizeFactor']['m7g.4xlarge'] == 8
+    assert pclient.get_instance_price_table('us-east-1', 'RunInstances', 'OnDemand', 'Shared') is table
+
+
+def test_cheapest_joins_prices_vectorized():
+    catalog = InstanceCatalog(INSTANCES)
+    table = {'currency': 'USD', 'hourly': HOURLY, 'normalizationSizeFactor': {'m7gd.4xlarge': 32.0}}
+
+    found = catalog.cheapest(table, 730, ranges={'vcpus': (16, None), 'memory': (64, None)}, architectures=['arm64'], limit=2)
+
+    # Types without a price (m7g.large) never match
+    assert found['count'] == 4
+    assert [r['instanceType'] for r in found['results']] == ['m7g.4xlarge', 'm7gd.4xlarge']
+    assert found['results'][0]['pricePerUnit'] == {'currency': 'USD', 'value': pytest.approx(0.6528 * 730)}
+    assert found['results'][0]['unit'] == 'Month'
+    assert found['results'][0]['normalizationSizeFactor'] is None
+    assert found['results'][1]['normalizationSizeFactor'] == 32.0
+    # The join is done once per price table
+    assert catalog.price_columns(table) is catalog.price_columns(table)
+
+
+def test_recommend_route(monkeypatch):
+    fake_ec2 = SimpleNamespace(
+        _client_config=SimpleNamespace(region_name='eu-west-1'),
+        get_paginator=lambda name: SimpleNamespace(paginate=lambda **kw: [{'InstanceTypes': INSTANCES}])
+    )
+    from chalicelib.sdk import PricingClient
+    eclient, pclient = EC2Client(fake_ec2), PricingClient(PagedPricing())
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: eclient)
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: pclient)
+
+    with Client(app) as client:
+        ok = client.http.get('/product/recommend?region=eu-west-1&op=RunInstances&vcpus=16-&nvme=true&limit=1')
+        missing = client.http.get('/product/recommend?region=eu-west-1&vcpus=16-')
+
+    assert ok.status_code == 200
+    body = json.loads(ok.body)
+    assert body['count'] == 3
+    assert body['results'][0]['instanceType'] == 'm7gd.4xlarge'
+    assert body['results'][0]['pricePerUnit']['value'] == pytest.approx(0.8543 * 730)
+    assert missing.status_code == 400
+
+
+def test_recommend_route_separates_client_and_internal_errors(monkeypatch):
+    def broken(*args):
+        raise KeyError('pricePerUnit')
+    monkeypatch.setattr(product_view, 'get_ec2_client', lambda region: SimpleNamespace(get_instance_catalog=broken))
+    monkeypatch.setattr(product_view, 'get_pricing_client', lambda: SimpleNamespace(get_instance_price_table=broken))
+
+    with Client(app) as client:
+        missing = client.http.get('/product/recommend?region=eu-west-1&vcpus=16-')
+        internal = client.http.get('/product/recommend?region=eu-west-1&op=RunInstances&vcpus=16-')
+
+    assert missing.status_code == 400
+    assert b'op' in missing.body
+    # A bug in the lookup is not blamed on the query
+    assert internal.status_code == 500
@@ -0,0 +1,99 @@
+from chalicelib.store import (
+    CacheStore, DynamoDBCacheStore, SQLiteCacheStore, register_store_flush, set_cache_store, versioned_key
+)
+from chalicelib.sdk import EC2Client
+from tests.test_sdk import FakeEC2
+from chalice import Chalice
+from chalice.test import Client
+import time
+import pytest
+
+
+class FakeTable:
+    """In-memory stand-in for a DynamoDB Table resource"""
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def get_item(self, Key, **kwargs):
+        self.reads += 1
+        item = self.items.get(Key['name'])
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['name']] = dict(Item)
+
+
+@pytest.fixture
+def ddb_store():
+    store = DynamoDBCacheStore(FakeTable())
+    set_cache_store(store)
+    yield store
+    set_cache_store(None)
+
+
+def test_dynamodb_store_roundtrip():
+    table = FakeTable()
+    store = DynamoDBCacheStore(table)
+    store.put('ns#key', {'a': [1, 2]}, ttl=60)
+
+    item = table.items[versioned_key('ns#key')]
+    assert item['expires_at'] > time.time()
+    value, remaining = store.get('ns#key')
+    assert value == {'a': [1, 2]}
+    assert 0 < remaining <= 60
+
+
+def test_expired_entry_is_ignored(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.db'))
+    store.put('ns#key', 'value', ttl=-1)
+    assert store.get('ns#key') is None
+    store.put('ns#key', 'value', ttl=60)
+    assert store.get('ns#key')[0] == 'value'
+
+
+def test_write_behind_flush(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.db'))
+    store.put_async('ns#key', [1], ttl=60)
+    store.flush()
+    assert store.get('ns#key')[0] == [1]
+
+
+def test_read_through_survives_cold_start(ddb_store):
+    warm = FakeEC2(delay=0)
+    first = EC2Client(warm).get_instance_sizes('arm64', 'm7g')
+    ddb_store.flush()
+    assert warm.calls == 1
+
+    # A new container has an empty in-process cache and a new boto3 client
+    EC2Client.get_instance_sizes.cache_clear()
+    cold = FakeEC2(delay=0)
+    second = EC2Client(cold).get_instance_sizes('arm64', 'm7g')
+
+    assert cold.calls == 0
+    assert second == first
+
+
+def test_cache_store_is_abstract():
+    with pytest.raises(TypeError):
+        CacheStore()
+
+
+
+def test_queued_writes_flushed_before_response(ddb_store, monkeypatch):
+    app = Chalice(app_name='store-flush')
+    register_store_flush(app)
+    # A slow table keeps the write queued well past the end of the view
+    put_item = ddb_store._table.put_item
+    monkeypatch.setattr(ddb_store._table, 'put_item', lambda Item: (time.sleep(0.2), put_item(Item)))
+
+    @app.route('/')
+    def index():
+        ddb_store.put_async('ns#key', {'a': 1}, ttl=60)
+        return {'ok': True}
+
+    with Client(app) as client:
+        response = client.http.get('/')
+
+    assert response.status_code == 200
+    assert versioned_key('ns#key') in ddb_store._table.items
@@ -0,0 +1,110 @@
+from chalicelib.throttle import AdaptiveTokenBucket, RetryController, TokenBucket
+from chalicelib.models import PricingServiceError
+from chalicelib.sdk import PricingClient
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+import boto3
+import time
+import os
+import pytest
+
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), 'test_data')
+PARAMS = {'region': 'us-east-1', 'typesize': 'm7g.2xlarge', 'op': 'RunInstances'}
+
+
+@pytest.fixture
+def stubbed_pricing():
+    client = boto3.client(
+        'pricing', region_name='us-east-1',
+        aws_access_key_id='testing', aws_secret_access_key='testing',
+        config=Config(retries={'mode': 'standard', 'max_attempts': 1})
+    )
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def price_list_response():
+    with open(os.path.join(TEST_DATA, 'price_list_instance.json'), encoding='utf-8') as f:
+        return {'FormatVersion': 'aws_v1', 'PriceList': [f.read()]}
+
+
+def add_throttles(stubber, count):
+    for _ in range(count):
+        stubber.add_client_error(
+            'get_products', service_error_code='ThrottlingException',
+            service_message='Rate exceeded', http_status_code=400
+        )
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=5)
+
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # The burst passes at once, the remaining 10 calls are spaced at 20ms
+    assert elapsed >= 0.18
+    assert bucket.acquired == 15
+    assert bucket.wait_time > 0
+
+
+def test_adaptive_bucket_aimd():
+    bucket = AdaptiveTokenBucket(rate=8, min_rate=1, increase=2)
+
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 2
+    for _ in range(3):
+        bucket.on_throttle()
+    assert bucket.rate == 1
+
+    # Each success adds increase/rate, about `increase` per second of traffic
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 8
+
+
+def test_throttled_get_products_retried(stubbed_pricing):
+    client, stubber = stubbed_pricing
+    add_throttles(stubber, 2)
+    stubber.add_response('get_products', price_list_response())
+    limiter = AdaptiveTokenBucket(rate=10)
+    pclient = PricingClient(client, retry=RetryController(limiter, base_delay=0.01))
+
+    product = pclient.get_product_instance(PARAMS)
+
+    assert product['listPrice']['pricePerUnit']['value'] == pytest.approx(0.3264 * 730)
+    stats = pclient.throttle_stats()
+    assert stats['calls'] == 1
+    assert stats['throttles'] == 2
+    assert stats['retries'] == 2
+    assert stats['rate'] < 10
+
+
+def test_persistent_throttling_surfaces_as_throttled(stubbed_pricing):
+    client, stubber = stubbed_pricing
+    add_throttles(stubber, 3)
+    pclient = PricingClient(client, retry=RetryController(AdaptiveTokenBucket(rate=10), max_attempts=3, base_delay=0.01))
+
+    with pytest.raises(PricingServiceError) as ex:
+        pclient.get_product_instance(PARAMS)
+
+    assert ex.value.error_code == 'THROTTLED'
+    assert pclient.throttle_stats()['throttles'] == 3
+
+
+def test_other_errors_not_retried(stubbed_pricing):
+    client, stubber = stubbed_pricing
+    stubber.add_client_error('get_products', service_error_code='InvalidParameterException', http_status_code=400)
+    retry = RetryController(AdaptiveTokenBucket(rate=10), base_delay=0.01)
+
+    with pytest.raises(ClientError):
+        retry.call(client.get_products, ServiceCode='AmazonEC2', Filters=[])
+
+    assert retry.throttles == 0
+    assert retry.retries == 0
@@ -0,0 +1,65 @@
+from app import app  # noqa: F401
+from chalicelib.file import get_static_registry
+from chalicelib.webui import view
+
+
+def test_render_reuses_environment():
+    context = {
+        'region': 'us-east-1',
+        'region_list': [{'code': 'us-east-1', 'name': 'US East (N. Virginia)'}],
+        'instance_type': 'm5.xlarge',
+        'apiDocsUrl': '/api/docs',
+        'version': '0.0.0'
+    }
+
+    html = view.render('chalicelib/webui/detail.html', context)
+    env = view.get_template_env()
+
+    assert view.render('chalicelib/webui/detail.html', context) == html
+    assert view.get_template_env() is env
+    assert f"js/detail.{get_static_registry().fingerprint('detail.js')}" in html
+
+
+class CountingEC2:
+    def __init__(self):
+        self.calls = 0
+
+    def list_usage_operations(self):
+        self.calls += 1
+        return [{'operation': 'RunInstances', 'description': 'Linux/UNIX'}]
+
+    def list_instance_family(self, architecture):
+        self.calls += 1
+        return [{'family': 'm7i', 'category': 'General purpose'}]
+
+
+class CountingPricing:
+    def __init__(self):
+        self.calls = 0
+
+    def get_attribute_values(self, service_code, attribute_name):
+        self.calls += 1
+        return {'count': 3, 'data': ['gp3', 'sc1', 'st1']}
+
+
+def test_index_page_cached_per_region(monkeypatch):
+    from chalice.test import Client
+
+    eclient, pclient, region_calls = CountingEC2(), CountingPricing(), []
+    monkeypatch.setattr(view, 'list_ec2_regions', lambda: region_calls.append(1) or [{'code': 'us-east-1', 'name': 'N. Virginia'}])
+    monkeypatch.setattr(view, 'get_ec2_client', lambda region: eclient)
+    monkeypatch.setattr(view, 'get_pricing_client', lambda: pclient)
+    rendered = []
+    render = view.render
+    monkeypatch.setattr(view, 'render', lambda path, context: rendered.append(path) or render(path, context))
+
+    with Client(app) as client:
+        first = client.http.get('/')
+        second = client.http.get('/')
+        other = client.http.get('/?region=eu-west-1')
+
+    assert first.status_code == second.status_code == other.status_code == 200
+    assert second.body == first.body
+    assert b'sc1' not in first.body
+    # The warm request for a region neither calls AWS nor renders
+    assert (len(region_calls), eclient.calls, pclient.calls, len(rendered)) == (2, 4, 2, 2)